@@ -0,0 +1,11 @@
+"""Benchmarks for the agent data layer.
+
+Run from the backend directory, e.g. ``python -m benchmarks.loop_lag``.
+"""
+import sys
+from pathlib import Path
+
+# Add src directory to path for imports
+src_path = Path(__file__).parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
@@ -0,0 +1,79 @@
+"""Cost of day9 ``list_products`` filtering as the catalog grows.
+
+Compares the old scan of every product per call with ``FacetIndex.filter``
+(which also counts the matches per facet) for a few typical filters.
+
+Usage:
+    python -m benchmarks.facet_filter --sizes 1000 100000 1000000
+"""
+import argparse
+import json
+import random
+import time
+from functools import partial
+
+from shared.catalog import FacetIndex
+
+CATEGORIES = ["mug", "tshirt", "hoodie", "notebook", "cap", "bag", "poster", "sticker"]
+COLORS = ["black", "white", "navy", "gray", "red", "green", "blue", "brown"]
+
+FILTERS = [
+    {"category": "hoodie", "color": "navy"},
+    {"category": "mug", "max_price": 500},
+    {"color": "red", "max_price": 50},
+    {"max_price": 20},
+]
+
+
+def _scan(products: list, category=None, color=None, max_price=None) -> list:
+    matches = []
+    for product in products:
+        if category and product.get("category") != category:
+            continue
+        if max_price and product.get("price", 0) > max_price:
+            continue
+        if color and product.get("color", "").lower() != color.lower():
+            continue
+        matches.append(product)
+    return matches[:10]
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    results = []
+    for size in args.sizes:
+        products = [
+            {"id": f"p-{i}", "category": rng.choice(CATEGORIES), "color": rng.choice(COLORS), "price": rng.randrange(5000)}
+            for i in range(size)
+        ]
+        start = time.perf_counter()
+        facets = FacetIndex(products)
+        build_ms = (time.perf_counter() - start) * 1000
+        for query in FILTERS:
+            query = dict(query)
+            max_price = query.pop("max_price", None)
+            results.append({
+                "catalog_size": size,
+                "filters": {**query, "max_price": max_price},
+                "build_ms": round(build_ms, 1),
+                "scan_us": round(_time(partial(_scan, products, max_price=max_price, **query), args.repeat), 1),
+                "facet_us": round(_time(partial(facets.filter, query, max_price=max_price), args.repeat), 1),
+                "matches": facets.filter(query, max_price=max_price).total,
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
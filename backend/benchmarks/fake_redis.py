@@ -0,0 +1,235 @@
+"""A small in-memory server speaking the Redis protocol.
+
+Serves the commands the Redis state backend uses (plus a few for poking
+at it by hand), so the backend can be developed and tested without a real
+Redis:
+
+    python -m benchmarks.fake_redis --port 6379
+
+Keys expire lazily, like Redis does on access. Not for production use:
+there is no persistence, eviction, authentication or pub/sub.
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.state_backend import RespError
+
+
+_WRONGTYPE = RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+
+def _reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode("utf-8")
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(_reply(item) for item in value)
+
+
+class FakeRedis:
+    """The keyspace and command handlers, shared by every connection."""
+
+    def __init__(self) -> None:
+        # db -> key -> (value or list, expiry time or None)
+        self._dbs: Dict[int, Dict[bytes, Tuple[Any, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+        self.commands = 0
+
+    def _live(self, db: int, key: bytes) -> Any:
+        entry = self._dbs.get(db, {}).get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._dbs[db][key]
+            return None
+        return entry[0]
+
+    def execute(self, db: int, args: List[bytes]) -> Any:
+        """Run one command against database ``db``."""
+        name = args[0].decode("utf-8").upper()
+        handler = getattr(self, f"_cmd_{name.lower()}", None)
+        if handler is None:
+            return RespError(f"ERR unknown command '{name}'")
+        with self._lock:
+            self.commands += 1
+            try:
+                return handler(db, args[1:])
+            except (IndexError, ValueError):
+                return RespError(f"ERR wrong arguments for '{name}'")
+
+    def _cmd_ping(self, db: int, args: List[bytes]) -> Any:
+        return args[0] if args else "PONG"
+
+    def _cmd_get(self, db: int, args: List[bytes]) -> Any:
+        value = self._live(db, args[0])
+        return _WRONGTYPE if isinstance(value, list) else value
+
+    def _cmd_mget(self, db: int, args: List[bytes]) -> Any:
+        values = [self._live(db, key) for key in args]
+        return [None if isinstance(value, list) else value for value in values]
+
+    def _cmd_set(self, db: int, args: List[bytes]) -> Any:
+        key, value, options = args[0], args[1], [a.decode("utf-8").upper() for a in args[2:]]
+        expiry = None
+        if "EX" in options:
+            expiry = time.monotonic() + int(options[options.index("EX") + 1])
+        elif "PX" in options:
+            expiry = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+        self._dbs.setdefault(db, {})[key] = (value, expiry)
+        return "OK"
+
+    def _cmd_del(self, db: int, args: List[bytes]) -> Any:
+        return sum(self._dbs.get(db, {}).pop(key, None) is not None for key in args)
+
+    def _cmd_exists(self, db: int, args: List[bytes]) -> Any:
+        return sum(self._live(db, key) is not None for key in args)
+
+    def _cmd_expire(self, db: int, args: List[bytes]) -> Any:
+        value = self._live(db, args[0])
+        if value is None:
+            return 0
+        self._dbs[db][args[0]] = (value, time.monotonic() + int(args[1]))
+        return 1
+
+    def _cmd_rpush(self, db: int, args: List[bytes]) -> Any:
+        items = self._live(db, args[0])
+        if items is None:
+            items = []
+            self._dbs.setdefault(db, {})[args[0]] = (items, None)
+        elif not isinstance(items, list):
+            return _WRONGTYPE
+        items.extend(args[1:])
+        return len(items)
+
+    def _cmd_lrange(self, db: int, args: List[bytes]) -> Any:
+        items = self._live(db, args[0])
+        if items is None:
+            return []
+        if not isinstance(items, list):
+            return _WRONGTYPE
+        start, stop = int(args[1]), int(args[2])
+        # Redis ranges include the stop index
+        return items[start:None if stop == -1 else stop + 1]
+
+    def _cmd_llen(self, db: int, args: List[bytes]) -> Any:
+        items = self._live(db, args[0])
+        if items is not None and not isinstance(items, list):
+            return _WRONGTYPE
+        return len(items or ())
+
+    def _cmd_ttl(self, db: int, args: List[bytes]) -> Any:
+        if self._live(db, args[0]) is None:
+            return -2
+        expiry = self._dbs[db][args[0]][1]
+        return -1 if expiry is None else max(0, round(expiry - time.monotonic()))
+
+    def _cmd_keys(self, db: int, args: List[bytes]) -> Any:
+        pattern = args[0].decode("utf-8")
+        return [
+            key for key in list(self._dbs.get(db, {}))
+            if fnmatch.fnmatchcase(key.decode("utf-8"), pattern) and self._live(db, key) is not None
+        ]
+
+    def _cmd_dbsize(self, db: int, args: List[bytes]) -> Any:
+        return len(self._dbs.get(db, {}))
+
+    def _cmd_flushall(self, db: int, args: List[bytes]) -> Any:
+        self._dbs.clear()
+        return "OK"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "FakeRedisServer"
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, as typed into telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self) -> None:
+        db = 0
+        while True:
+            try:
+                args = self._read_command()
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+            if not args:
+                continue
+            if args[0].upper() == b"SELECT":
+                db = int(args[1])
+                reply: Any = "OK"
+            elif args[0].upper() == b"QUIT":
+                self.wfile.write(_reply("OK"))
+                return
+            else:
+                reply = self.server.redis.execute(db, args)
+            self.wfile.write(_reply(reply))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """A fake Redis listening on ``host:port`` (port 0 picks a free one).
+
+    Call ``start()`` to serve from a background thread and ``stop()`` when
+    done; ``url`` is what to set ``SESSION_STATE_URL`` to.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.redis = FakeRedis()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> "FakeRedisServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-redis", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Serving a fake Redis on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Cost of day5 ``search_faq`` as the FAQ grows.
+
+Compares the old keyword scan (first question containing any query word
+longer than three letters) with ``BM25Index.search`` and the semantic
+``VectorIndex.search`` over synthetic FAQs. Vector queries are timed
+uncached (a fresh query each time) and as one batch.
+
+Usage:
+    python -m benchmarks.faq_search --sizes 100 1000 10000
+"""
+import argparse
+import json
+import random
+import time
+from functools import partial
+
+from shared import vectors
+from shared.retrieval import faq_index
+
+TOPICS = [
+    "pricing", "billing", "invoice", "integration", "security", "support", "onboarding",
+    "export", "import", "automation", "workflow", "team", "permissions", "api", "webhook",
+    "refund", "trial", "discount", "language", "mobile", "calendar", "email", "report",
+]
+QUERIES = [
+    "how much does the enterprise plan cost",
+    "can I export my reports to excel",
+    "what happens to my data after the trial",
+    "do you support single sign on",
+]
+
+
+def _scan(faq: list, query: str):
+    for item in faq:
+        question = item["question"].lower()
+        if any(word in question for word in query.lower().split() if len(word) > 3):
+            return item
+    return None
+
+
+def synthetic_faq(size: int, seed: int = 1) -> dict:
+    """FAQ entries on two topics each, with answers mostly drawn from a
+    larger vocabulary of filler words."""
+    rng = random.Random(seed)
+    filler = [f"w{i}" for i in range(5000)]
+    faq = []
+    for i in range(size):
+        a, b = rng.sample(TOPICS, 2)
+        faq.append({
+            "question": f"How does {a} work with {b} number {i}?",
+            "answer": " ".join([a, b] + rng.sample(filler, 30)),
+        })
+    return {"faq": faq}
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        data = synthetic_faq(size)
+        start = time.perf_counter()
+        index = faq_index(data)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        vector_index = vectors.VectorIndex(vectors.SOURCES["faq"][1](data), cache_size=0)
+        vector_build_ms = (time.perf_counter() - start) * 1000
+        results.append({
+            "faq_size": size,
+            "numpy": vectors.np is not None,
+            "build_ms": round(build_ms, 1),
+            "vector_build_ms": round(vector_build_ms, 1),
+            "scan_us": round(_time(lambda data=data: [_scan(data["faq"], q) for q in QUERIES], args.repeat) / len(QUERIES), 1),
+            "bm25_us": round(_time(lambda index=index: [index.search(q) for q in QUERIES], args.repeat) / len(QUERIES), 1),
+            "vector_us": round(_time(lambda vector_index=vector_index: [vector_index.search(q) for q in QUERIES], args.repeat) / len(QUERIES), 1),
+            "vector_batch_us": round(_time(partial(vector_index.search_many, QUERIES), args.repeat) / len(QUERIES), 1),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
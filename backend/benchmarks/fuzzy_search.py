@@ -0,0 +1,59 @@
+"""Latency of fuzzy (misheard) catalog queries.
+
+Builds a ``FuzzyIndex`` over a synthetic grocery catalog with a realistic
+vocabulary (common food words plus thousands of made-up brand names) and
+times queries with typical speech-to-text slips.
+
+Usage:
+    python -m benchmarks.fuzzy_search --items 100000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from benchmarks.synthetic import ADJECTIVES, FOODS, brand
+from shared.fuzzy import FuzzyIndex
+
+QUERIES = ["whole weet bread", "panir", "peanut buter", "chees", "yoghurt", "massala", "choclate cookies", "basmatti rice"]
+
+
+def synthetic_names(items: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    brands = [brand(rng) for _ in range(max(10, items // 20))]
+    names = []
+    for i in range(items):
+        words = [rng.choice(brands), rng.choice(ADJECTIVES)] + rng.sample(FOODS, rng.randint(1, 2))
+        names.append((f"item-{i}", " ".join(words)))
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    names = synthetic_names(args.items)
+    start = time.perf_counter()
+    index = FuzzyIndex(names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    result = {"items": args.items, "vocabulary": len(index._vocabulary), "build_ms": round(build_ms, 1), "queries": {}}
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matches = index.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        result["queries"][query] = {
+            "p50_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "top": dict(names)[matches[0][0]] if matches else None,
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Event-loop lag while function tools do file I/O on a slow disk.
+
+A ticker coroutine wakes up every ``--tick-ms`` and records how late it ran,
+which is what audio frame, VAD and TTS tasks experience. Meanwhile simulated
+tool calls write orders and read history, either with the blocking file_ops
+calls (the old behavior) or with the async API.
+
+Usage:
+    python -m benchmarks.loop_lag --records 20000 --delay-ms 20
+"""
+import argparse
+import asyncio
+import builtins
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from shared.tools import file_ops
+
+
+def _slow_open(delay: float):
+    """Wrap ``open`` so every file access pays a fixed storage latency."""
+
+    def _open(*args, **kwargs):
+        time.sleep(delay)
+        return builtins.open(*args, **kwargs)
+
+    return _open
+
+
+async def _ticker(interval: float, lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _tool_calls(calls: int, use_async: bool) -> None:
+    for i in range(calls):
+        order = {"order_id": f"ORD-{i}", "items": [{"id": "milk", "quantity": 1}]}
+        if use_async:
+            await file_ops.aappend_json("bench_orders.json", order, journal=True)
+            await file_ops.aload_records("bench_orders.json")
+        else:
+            file_ops.append_json("bench_orders.json", order, journal=True)
+            file_ops.load_records("bench_orders.json")
+        # Give the ticker a chance to run between turns, like real tool calls
+        await asyncio.sleep(0)
+
+
+async def _measure(calls: int, use_async: bool, tick: float) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(tick, lags, stop))
+    await asyncio.sleep(tick * 2)
+    start = time.perf_counter()
+    await _tool_calls(calls, use_async)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    return {
+        "mode": "async" if use_async else "blocking",
+        "tool_calls": calls,
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "lag_p99_ms": round(lags_ms[int(len(lags_ms) * 0.99) - 1], 2),
+        "lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000, help="history size")
+    parser.add_argument("--calls", type=int, default=20, help="tool calls per mode")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="latency per open()")
+    parser.add_argument("--tick-ms", type=float, default=5.0, help="ticker interval")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_ops.DATA_DIR = Path(tmp)
+        history = [{"order_id": f"OLD-{i}", "items": []} for i in range(args.records)]
+        file_ops.save_json("bench_orders.json", history)
+        file_ops.open = _slow_open(args.delay_ms / 1000)
+        try:
+            results = [
+                asyncio.run(_measure(args.calls, use_async, args.tick_ms / 1000))
+                for use_async in (False, True)
+            ]
+        finally:
+            del file_ops.open
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cost of resolving order line items as the catalog grows.
+
+Compares the old per-line-item scan of ``CATALOG["products"]`` (day9
+``create_order``, day7 ``add_to_cart``) with ``ProductCatalog.get``.
+
+Usage:
+    python -m benchmarks.order_lookup --sizes 1000 10000 100000 --lines 20
+"""
+import argparse
+import json
+import random
+import time
+
+from shared.catalog import ProductCatalog
+
+
+def _scan(products: list, product_id: str):
+    for product in products:
+        if product["id"] == product_id:
+            return product
+    return None
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--lines", type=int, default=20, help="line items per order")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    results = []
+    for size in args.sizes:
+        products = [{"id": f"p-{i}", "name": f"Product {i}", "price": i % 900, "category": "misc"} for i in range(size)]
+        lookup = ProductCatalog(products)
+        order = [f"p-{rng.randrange(size)}" for _ in range(args.lines)]
+        results.append({
+            "catalog_size": size,
+            "line_items": args.lines,
+            "scan_us": round(_time(lambda products=products, order=order: [_scan(products, pid) for pid in order], args.repeat), 1),
+            "lookup_us": round(_time(lambda lookup=lookup, order=order: [lookup.get(pid) for pid in order], args.repeat), 1),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
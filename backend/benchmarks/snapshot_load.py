@@ -0,0 +1,73 @@
+"""Cold-start load time of a large catalog: JSON parse vs snapshot.
+
+Generates a day7-shaped catalog, then times what a fresh job process pays
+to load it: ``json.loads`` plus building the id index, against loading the
+prebuilt snapshot.
+
+Usage:
+    python -m benchmarks.snapshot_load --items 100000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from shared import snapshots
+from shared.tools import file_ops
+
+
+def _synthetic_catalog(items: int) -> dict:
+    categories = ["groceries", "snacks", "prepared", "beverages", "household"]
+    tags = ["vegetarian", "vegan", "protein", "dairy", "healthy", "spicy", "gluten"]
+    catalog = {"categories": {c: [] for c in categories}, "recipes": {}}
+    for i in range(items):
+        category = categories[i % len(categories)]
+        catalog["categories"][category].append({
+            "id": f"item-{i}",
+            "name": f"Product {i}",
+            "category": category,
+            "price": random.randint(10, 900),
+            "brand": f"Brand{i % 500}",
+            "size": "500g",
+            "tags": random.sample(tags, 2),
+        })
+    return catalog
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_ops.DATA_DIR = Path(tmp)
+        source = file_ops.DATA_DIR / "day7_catalog.json"
+        source.write_text(json.dumps(_synthetic_catalog(args.items)), encoding="utf-8")
+        snapshots.build_snapshot("day7_catalog.json")
+
+        def from_json() -> None:
+            data = json.loads(source.read_bytes())
+            snapshots.build_indexes("day7_catalog.json", data)
+
+        result = {
+            "items": args.items,
+            "json_bytes": source.stat().st_size,
+            "snapshot_bytes": snapshots.snapshot_path("day7_catalog.json").stat().st_size,
+            "json_load_ms": round(_time(from_json, args.repeat), 1),
+            "snapshot_load_ms": round(_time(lambda: snapshots.load("day7_catalog.json"), args.repeat), 1),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Synthetic catalogs for the benchmarks.
+
+``day7_catalog(items)`` and ``day9_catalog(items)`` generate catalogs shaped
+like the shipped ``day7_catalog.json`` and ``day9_catalog.json``, at any
+size, with realistic names (made-up brands, adjectives and everyday grocery
+or merchandise words), tags, sizes and prices. Generation is seeded, so
+runs on different releases see the same catalog.
+
+Usage:
+    python -m benchmarks.synthetic --items 100000 --out /tmp/catalogs
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+FOODS = [
+    "paneer", "wheat", "bread", "butter", "cheese", "yogurt", "milk", "rice", "basmati",
+    "lentils", "chickpeas", "tomato", "onion", "potato", "spinach", "masala", "turmeric",
+    "cumin", "coriander", "ghee", "oats", "cornflakes", "biscuits", "cookies", "chocolate",
+    "noodles", "pasta", "ketchup", "pickle", "mango", "banana", "apple", "almonds",
+    "cashews", "peanut", "coffee", "tea", "juice", "honey", "jaggery", "sugar", "salt",
+    "flour", "semolina", "vermicelli", "chips", "namkeen", "sandwich", "pizza", "burger",
+]
+ADJECTIVES = ["whole", "fresh", "organic", "classic", "spicy", "roasted", "salted", "low", "fat", "premium"]
+
+# Food words that put an item in a category other than groceries
+SNACKS = {"biscuits", "cookies", "chocolate", "chips", "namkeen"}
+PREPARED = {"sandwich", "pizza", "burger", "noodles"}
+TAGS = ["vegetarian", "vegan", "gluten", "healthy", "organic", "spicy", "sweet", "dairy", "protein", "kids"]
+SIZES = ["100g", "200g", "250g", "400g", "500g", "1kg", "500ml", "1L", "pack of 6"]
+DISHES = ["curry", "salad", "sandwich", "bowl", "pulao", "smoothie", "toast", "stir fry"]
+
+MERCH = {
+    "mug": ["350ml", "500ml"], "tshirt": ["S", "M", "L", "XL"], "hoodie": ["S", "M", "L", "XL"],
+    "notebook": ["A4", "A5"], "cap": ["Free size"], "bag": ["15L", "25L"], "poster": ["A3", "A2"],
+    "sticker": ["Pack of 10"], "bottle": ["750ml", "1L"], "socks": ["Free size"],
+}
+COLORS = ["black", "white", "navy", "gray", "red", "green", "blue", "brown", "maroon", "olive", "multicolor"]
+STYLES = ["Classic", "Premium", "Travel", "Vintage", "Minimal", "Organic Cotton", "Oversized", "Graphic"]
+
+
+def brand(rng: random.Random) -> str:
+    syllables = ["ka", "ro", "mi", "ta", "su", "ne", "pa", "li", "go", "ve", "dha", "ri"]
+    return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+
+
+def _price(rng: random.Random, low: int, high: int) -> int:
+    """Prices skewed toward the cheap end, like a real catalog."""
+    return int(low + (high - low) * rng.random() ** 2.5)
+
+
+def day7_catalog(items: int, seed: int = 7) -> Dict[str, Any]:
+    """Generate a food catalog with ``items`` items and about one recipe per 50."""
+    rng = random.Random(seed)
+    brands = [brand(rng) for _ in range(max(10, items // 20))]
+    categories: Dict[str, List[Dict[str, Any]]] = {"groceries": [], "snacks": [], "prepared_food": []}
+    ids = []
+    for i in range(items):
+        foods = rng.sample(FOODS, rng.randint(1, 2))
+        name = " ".join([rng.choice(ADJECTIVES)] + foods).title()
+        category = "snacks" if SNACKS & set(foods) else "prepared_food" if PREPARED & set(foods) else "groceries"
+        item_id = f"{'-'.join(foods)}-{i}"
+        ids.append(item_id)
+        categories[category].append({
+            "id": item_id,
+            "name": name,
+            "category": category,
+            "price": _price(rng, 10, 1500),
+            "brand": rng.choice(brands),
+            "size": rng.choice(SIZES),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        })
+
+    recipes = {}
+    for j in range(max(5, items // 50)):
+        name = f"{rng.choice(FOODS).title()} {rng.choice(FOODS).title()} {rng.choice(DISHES).title()}"
+        recipes[f"{name.lower().replace(' ', '_')}_{j}"] = {
+            "name": name,
+            "items": rng.sample(ids, min(len(ids), rng.randint(2, 5))),
+            "description": f"Homestyle {name.lower()}",
+        }
+    return {"categories": categories, "recipes": recipes}
+
+
+def day9_catalog(items: int, seed: int = 9) -> Dict[str, Any]:
+    """Generate a merchandise catalog with ``items`` products."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(items):
+        category = rng.choice(list(MERCH))
+        color = rng.choice(COLORS)
+        style = rng.choice(STYLES)
+        products.append({
+            "id": f"{category}-{i}",
+            "name": f"{style} {category.title()} - {color.title()}",
+            "description": f"{style} {category} in {color}",
+            "price": _price(rng, 99, 4999),
+            "currency": "INR",
+            "category": category,
+            "color": color,
+            "size": rng.choice(MERCH[category]),
+        })
+    return {"products": products}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--out", type=Path, required=True, help="directory for the catalog files")
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    for filename, catalog in (("day7_catalog.json", day7_catalog(args.items)), ("day9_catalog.json", day9_catalog(args.items))):
+        (args.out / filename).write_text(json.dumps(catalog), encoding="utf-8")
+        print(f"wrote {args.out / filename}")
+
+
+if __name__ == "__main__":
+    main()
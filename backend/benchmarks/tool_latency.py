@@ -0,0 +1,261 @@
+"""Latency, throughput and memory of the catalog tools at scale.
+
+For each catalog size, synthetic day7 and day9 catalogs (see
+``benchmarks.synthetic``) and their snapshots, as the Docker build makes
+them, are written to a scratch data directory. Each tool then runs in a
+fresh process: the agent module loads the catalog, the tool method is
+called ``--calls`` times with a fake ``RunContext`` over a seeded mix of
+requests (exact, partial and misheard names, filter combinations, orders),
+and the process reports latency percentiles, throughput and its peak RSS.
+
+The output is JSON, one record per size and tool, meant to be saved and
+diffed between releases.
+
+The 1M-item run takes a few minutes and peaks at about 4 GB RSS.
+
+Usage:
+    python -m benchmarks.tool_latency --sizes 1000 100000 1000000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import COLORS, MERCH, day7_catalog, day9_catalog
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class FakeRunContext:
+    """Stands in for ``livekit.agents.RunContext``; the catalog tools only
+    pass it through."""
+
+    userdata: Any = None
+    session: Any = None
+    speech_handle: Any = None
+    function_call: Any = None
+
+
+def _misheard(rng: random.Random, text: str) -> str:
+    """Drop or double one letter, like a speech-to-text slip."""
+    i = rng.randrange(len(text))
+    return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + text[i] + text[i:]
+
+
+def _search_catalog(rng: random.Random, catalog: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+    items = [item for items in catalog["categories"].values() for item in items]
+
+    def request() -> Dict[str, Any]:
+        item = rng.choice(items)
+        kind = rng.random()
+        if kind < 0.25:
+            query = item["name"]
+        elif kind < 0.45:
+            query = item["name"].split()[-1][:4]
+        elif kind < 0.6:
+            query = item["brand"]
+        elif kind < 0.8:
+            query = " ".join(item["name"].split()[-2:])
+        else:
+            query = _misheard(rng, item["name"].split()[-1])
+        return {"query": query, "category": item["category"] if rng.random() < 0.2 else None}
+
+    return request
+
+
+def _get_recipe_items(rng: random.Random, catalog: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+    recipes = [recipe["name"] for recipe in catalog["recipes"].values()]
+
+    def request() -> Dict[str, Any]:
+        name = rng.choice(recipes)
+        return {"recipe_name": name if rng.random() < 0.7 else _misheard(rng, name)}
+
+    return request
+
+
+def _list_products(rng: random.Random, catalog: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+    def request() -> Dict[str, Any]:
+        return {
+            "category": rng.choice(list(MERCH)) if rng.random() < 0.7 else None,
+            "color": rng.choice(COLORS) if rng.random() < 0.5 else None,
+            "max_price": rng.choice([300, 500, 1000, 2000]) if rng.random() < 0.5 else None,
+        }
+
+    return request
+
+
+def _create_order(rng: random.Random, catalog: Dict[str, Any]) -> Callable[[], Dict[str, Any]]:
+    ids = [product["id"] for product in catalog["products"]]
+
+    def request() -> Dict[str, Any]:
+        return {"line_items": [
+            {"product_id": rng.choice(ids), "quantity": rng.randint(1, 3)} for _ in range(rng.randint(1, 3))
+        ]}
+
+    return request
+
+
+# Tool name -> (agent module, agent class, request generator)
+TOOLS = {
+    "day7.search_catalog": ("agents.day7_food", "FoodOrderingAgent", _search_catalog),
+    "day7.get_recipe_items": ("agents.day7_food", "FoodOrderingAgent", _get_recipe_items),
+    "day9.list_products": ("agents.day9_ecommerce", "EcommerceAgent", _list_products),
+    "day9.create_order": ("agents.day9_ecommerce", "EcommerceAgent", _create_order),
+}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _measure(data_dir: str, tool: str, calls: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """Run one tool in this (fresh) process and measure it."""
+    import importlib
+
+    from shared import snapshots
+    from shared.tools import file_ops
+
+    logging.disable(logging.WARNING)
+    file_ops.DATA_DIR = Path(data_dir)
+    module_name, class_name, requests = TOOLS[tool]
+    module = importlib.import_module(module_name)
+    # The import is dominated by livekit; load the catalog once more to see
+    # what it costs on its own
+    before = _rss_mb()
+    start = time.perf_counter()
+    extra_copy = snapshots.load(module.CATALOG_FILE)
+    load_ms = (time.perf_counter() - start) * 1000
+    catalog_mb = round(_rss_mb() - before, 1) if before is not None else None
+    del extra_copy
+
+    agent = getattr(module, class_name)()
+    method = getattr(type(agent), tool.split(".", 1)[1])
+    context = FakeRunContext()
+    next_request = requests(random.Random(seed), module.CATALOG.current.data)
+    batch = [next_request() for _ in range(warmup + calls)]
+
+    async def run() -> List[float]:
+        timings = []
+        for kwargs in batch:
+            begin = time.perf_counter()
+            await method(agent, context, **kwargs)
+            timings.append((time.perf_counter() - begin) * 1000)
+        return timings[warmup:]
+
+    start = time.perf_counter()
+    timings = asyncio.run(run())
+    # Includes the warmup calls, so slightly conservative
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "tool": tool,
+        "calls": calls,
+        "p50_ms": round(_percentile(timings, 0.50), 3),
+        "p99_ms": round(_percentile(timings, 0.99), 3),
+        "max_ms": round(timings[-1], 3),
+        "throughput_per_s": round(len(batch) / elapsed, 1),
+        "catalog_load_ms": round(load_ms, 1),
+        "catalog_mb": catalog_mb,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _write_catalogs(data_dir: Path, size: int) -> Dict[str, float]:
+    """Write the synthetic catalogs and their snapshots; returns timings."""
+    from shared import snapshots
+    from shared.tools import file_ops
+
+    file_ops.DATA_DIR = data_dir
+    timings = {}
+    for filename, generate in (("day7_catalog.json", day7_catalog), ("day9_catalog.json", day9_catalog)):
+        start = time.perf_counter()
+        (data_dir / filename).write_text(json.dumps(generate(size)), encoding="utf-8")
+        timings[f"{filename}_generate_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        start = time.perf_counter()
+        snapshots.build_snapshot(filename)
+        timings[f"{filename}_snapshot_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000])
+    parser.add_argument("--tools", nargs="+", choices=list(TOOLS), default=list(TOOLS))
+    parser.add_argument("--calls", type=int, default=500, help="measured calls per tool")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "calls": args.calls,
+            "seed": args.seed,
+        },
+        "catalogs": [],
+        "results": [],
+    }
+    spawn = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="tool-bench-") as tmp:
+            report["catalogs"].append({"catalog_size": size, **_write_catalogs(Path(tmp), size)})
+            for tool in args.tools:
+                # A process per tool, so its peak RSS is its own
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    result = pool.submit(_measure, tmp, tool, args.calls, args.warmup, args.seed).result()
+                report["results"].append({"catalog_size": size, **result})
+                print(f"{size} {tool}: p50 {result['p50_ms']}ms p99 {result['p99_ms']}ms", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Time-window queries over a multi-year wellness log.
+
+Compares ``get_wellness_history``'s "past N days" lookup on the old single
+journal (parse everything, filter by date) with the day-partitioned store.
+
+Usage:
+    python -m benchmarks.wellness_window --years 3 --per-day 50
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from shared import store as store_module
+from shared.tools import file_ops
+
+
+def _synthetic_log(years: int, per_day: int) -> list:
+    moods = ["calm", "tired", "anxious", "energetic", "happy", "stressed"]
+    start = datetime.now() - timedelta(days=365 * years)
+    records = []
+    for day in range(365 * years):
+        for i in range(per_day):
+            ts = start + timedelta(days=day, seconds=i * 60)
+            records.append({
+                "date": ts.isoformat(),
+                "mood": random.choice(moods),
+                "energy": random.choice(["low", "medium", "high"]),
+                "objectives": ["walk", "read"],
+                "summary": "Synthetic check-in",
+            })
+    return records
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=50, help="check-ins per day")
+    parser.add_argument("--days", type=int, default=7, help="query window")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_ops.DATA_DIR = Path(tmp)
+        records = _synthetic_log(args.years, args.per_day)
+        file_ops.write_records("day3_wellness_log.json", records)
+        since = datetime.now() - timedelta(days=args.days)
+
+        def full_scan() -> list:
+            # Old behaviour: parse the whole log, then filter
+            file_ops.read_cache.clear()
+            return [r for r in file_ops.load_records("day3_wellness_log.json") if r["date"] >= since.isoformat()]
+
+        expected = len(full_scan())
+        checkins = store_module._open("day3_checkins", "json")
+        seed_start = time.perf_counter()
+        checkins._seed()
+        seed_ms = (time.perf_counter() - seed_start) * 1000
+
+        def partitioned() -> list:
+            file_ops.read_cache.clear()
+            return checkins.query_range(since)
+
+        assert len(partitioned()) == expected
+        result = {
+            "records": len(records),
+            "window_days": args.days,
+            "matches": expected,
+            "partition_seed_ms": round(seed_ms, 1),
+            "full_scan_ms": round(_time(full_scan, args.repeat), 2),
+            "partitioned_ms": round(_time(partitioned, args.repeat), 2),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Concurrent order writers across processes.
+
+Each writer is a separate process, like a LiveKit job, placing orders
+through the day7 record store (journal appends) and through the legacy
+read-modify-write path of ``append_json``. After every run the records on
+disk are counted, so lost writes show up as ``lost > 0``.
+
+Usage:
+    python -m benchmarks.write_contention --writers 1 8 32 --orders 50
+"""
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from shared import store as store_module
+from shared.tools import file_ops
+
+
+def _writer(data_dir: str, mode: str, writer_id: int, orders: int, start) -> None:
+    file_ops.DATA_DIR = Path(data_dir)
+    orders_store = store_module.JsonStore("day7_orders", **store_module.STORE_SPECS["day7_orders"])
+    start.wait()
+    for i in range(orders):
+        order = {"order_id": f"ORD-{writer_id}-{i}", "items": [], "total": 0}
+        if mode == "journal":
+            ok = orders_store.insert(order)
+        else:
+            ok = file_ops.append_json("day7_orders.json", order)
+        if not ok:
+            raise RuntimeError(f"writer {writer_id} failed on order {i}")
+
+
+def _run(writers: int, orders: int, mode: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        file_ops.DATA_DIR = Path(tmp)
+        start = multiprocessing.Event()
+        procs = [
+            multiprocessing.Process(target=_writer, args=(tmp, mode, w, orders, start))
+            for w in range(writers)
+        ]
+        for proc in procs:
+            proc.start()
+        began = time.perf_counter()
+        start.set()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - began
+
+        written = len(file_ops.load_records("day7_orders.json"))
+        expected = writers * orders
+        return {
+            "mode": mode,
+            "writers": writers,
+            "orders": expected,
+            "orders_per_s": round(expected / elapsed, 1),
+            "lost": expected - written,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--orders", type=int, default=50, help="orders per writer")
+    parser.add_argument("--modes", nargs="+", default=["journal", "rewrite"])
+    args = parser.parse_args()
+
+    results = [
+        _run(writers, args.orders, mode) for mode in args.modes for writers in args.writers
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
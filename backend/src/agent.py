@@ -1,4 +1,5 @@
 """Main agent router for multi-day voice agent platform."""
+import gc
 import logging
 
 from dotenv import load_dotenv
@@ -10,7 +11,8 @@ from livekit.agents import (
 )
 from livekit.plugins import silero
 
-from agents import get_agent_entrypoint
+from agents import day8_gamemaster, get_agent_entrypoint
+from shared import reload, vectors
 
 logger = logging.getLogger("agent")
 
@@ -20,6 +22,16 @@ load_dotenv(".env.local")
 def prewarm(proc: JobProcess):
     """Prewarm function to load models before agents start."""
     proc.userdata["vad"] = silero.VAD.load()
+    # Semantic indexes for the FAQ and tutor content, so no job pays for them
+    vectors.prewarm()
+    # The day8 world template, so starting an adventure only copies it
+    day8_gamemaster.prewarm()
+    # Keep the data loaded so far out of every later collection; done once,
+    # since hot reloads would otherwise freeze each replaced snapshot for good
+    gc.collect()
+    gc.freeze()
+    # Pick up edits to the catalogs and content files without a restart
+    reload.start()
 
 
 async def entrypoint(ctx: JobContext):
@@ -3,15 +3,18 @@ import logging
 import json
 import random
 import asyncio
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 from livekit.agents import (
     Agent,
     AgentSession,
+    FunctionToolsExecutedEvent,
     JobContext,
     MetricsCollectedEvent,
     RoomInputOptions,
     function_tool,
+    get_job_context,
     metrics,
     tokenize,
     RunContext,
@@ -19,6 +22,16 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+import sys
+from pathlib import Path as PathLib
+
+# Add src directory to path for imports
+src_path = PathLib(__file__).parent.parent
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from shared.session_store import SessionStore, release_all
+
 logger = logging.getLogger("agent.day10")
 
 # Scenarios
@@ -31,20 +44,19 @@ SCENARIOS = [
     "You are a superhero whose only power is making toast perfectly, trying to join the Avengers.",
 ]
 
-# Session state
-_session_states: Dict[str, Dict[str, Any]] = {}
-
-def get_session_state(room_id: str) -> Dict[str, Any]:
-    if room_id not in _session_states:
-        _session_states[room_id] = {
-            "player_name": None,
-            "current_round": 0,
-            "max_rounds": 3,
-            "rounds": [],
-            "phase": "intro", # intro, awaiting_improv, reacting, done
-            "current_scenario": None
-        }
-    return _session_states[room_id]
+@dataclass
+class ImprovSession:
+    """State of one show, passed to tools as ``context.userdata``."""
+
+    player_name: Optional[str] = None
+    current_round: int = 0
+    max_rounds: int = 3
+    rounds: List[Dict[str, str]] = field(default_factory=list)
+    phase: str = "intro" # intro, awaiting_improv, reacting, done
+    current_scenario: Optional[str] = None
+
+# Live sessions, for the gauges and as a safety net if a job never shuts down
+SESSIONS = SessionStore("day10_sessions", factory=ImprovSession)
 
 class ImprovHostAgent(Agent):
     def __init__(self) -> None:
@@ -86,49 +98,47 @@ class ImprovHostAgent(Agent):
         )
 
     @function_tool
-    async def get_next_scenario(self, context: RunContext) -> str:
+    async def get_next_scenario(self, context: RunContext[ImprovSession]) -> str:
         """Get the next improv scenario to play. Call this at the start of each round."""
         try:
-            room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-            state = get_session_state(room_id)
+            state = context.userdata
             
-            if state["current_round"] >= state["max_rounds"]:
+            if state.current_round >= state.max_rounds:
                 return "GAME_OVER"
                 
-            state["current_round"] += 1
+            state.current_round += 1
             # Ensure we don't repeat scenarios if possible
-            available_scenarios = [s for s in SCENARIOS if s not in [r["scenario"] for r in state["rounds"]]]
+            available_scenarios = [s for s in SCENARIOS if s not in [r["scenario"] for r in state.rounds]]
             if not available_scenarios:
                 available_scenarios = SCENARIOS
                 
             scenario = random.choice(available_scenarios)
-            state["current_scenario"] = scenario
-            state["phase"] = "awaiting_improv"
+            state.current_scenario = scenario
+            state.phase = "awaiting_improv"
             
-            logger.info(f"Starting Round {state['current_round']} with scenario: {scenario}")
-            return f"Round {state['current_round']} Scenario: {scenario}"
+            logger.info(f"Starting Round {state.current_round} with scenario: {scenario}")
+            return f"Round {state.current_round} Scenario: {scenario}"
         except Exception as e:
             logger.error(f"Error in get_next_scenario: {e}")
             return "Error getting scenario. Let's just improvise something about a broken robot!"
 
     @function_tool
-    async def record_round_result(self, context: RunContext, reaction_summary: str) -> str:
+    async def record_round_result(self, context: RunContext[ImprovSession], reaction_summary: str) -> str:
         """Record the result of the round after you have given feedback.
         
         Args:
             reaction_summary: A brief summary of your reaction/feedback to the player's performance.
         """
         try:
-            room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-            state = get_session_state(room_id)
+            state = context.userdata
             
-            if state["current_scenario"]:
-                state["rounds"].append({
-                    "scenario": state["current_scenario"],
+            if state.current_scenario:
+                state.rounds.append({
+                    "scenario": state.current_scenario,
                     "reaction": reaction_summary
                 })
-                state["phase"] = "reacting"
-                logger.info(f"Recorded result for round {state['current_round']}")
+                state.phase = "reacting"
+                logger.info(f"Recorded result for round {state.current_round}")
                 
             return "Round recorded. Proceed to next round or outro."
         except Exception as e:
@@ -136,23 +146,26 @@ class ImprovHostAgent(Agent):
             return "Error recording result, but let's keep the show moving!"
 
     @function_tool
-    async def get_player_name(self, context: RunContext) -> str:
+    async def get_player_name(self, context: RunContext[ImprovSession]) -> str:
         """Get the player's name from the session metadata."""
         try:
             # Try to get from metadata first
-            if hasattr(context.agent, 'room') and context.agent.room.metadata:
+            try:
+                job_ctx = get_job_context()
+            except RuntimeError:
+                # Not running inside a job
+                job_ctx = None
+            if job_ctx is not None and job_ctx.room.metadata:
                 try:
-                    metadata = json.loads(context.agent.room.metadata)
+                    metadata = json.loads(job_ctx.room.metadata)
                     name = metadata.get("player_name")
                     if name:
                         return name
                 except json.JSONDecodeError:
                     pass
             
-            room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-            state = get_session_state(room_id)
-            if state["player_name"]:
-                return state["player_name"]
+            if context.userdata.player_name:
+                return context.userdata.player_name
                 
             return "Contestant"
         except Exception as e:
@@ -169,7 +182,8 @@ async def entrypoint(ctx: JobContext):
     logger.info(f"Starting Day 10 Agent in room {ctx.room.name}")
 
     # Set up voice AI pipeline
-    session = AgentSession(
+    session = AgentSession[ImprovSession](
+        userdata=await SESSIONS.aget_or_create(ctx.room.name),
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
         tts=murf.TTS(
@@ -197,6 +211,17 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    async def release_session():
+        release_all(ctx.room.name)
+
+    ctx.add_shutdown_callback(release_session)
+
+    # Snapshot the session after each batch of tool calls, so another
+    # worker can resume it; the write happens in the background
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        SESSIONS.save(ctx.room.name, session.userdata)
+
     # Start the session
     await session.start(
         agent=ImprovHostAgent(),
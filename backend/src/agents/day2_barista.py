@@ -24,10 +24,13 @@ src_path = Path(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared.identity import get_user_key
+from shared.store import get_store
 
 logger = logging.getLogger("agent.day2")
 
+ORDERS = get_store("day2_orders")
+
 # Order state structure
 ORDER_SCHEMA = {
     "drinkType": "",
@@ -86,18 +89,11 @@ class BaristaAgent(Agent):
             "milk": milk,
             "extras": extras,
             "name": customer_name,
+            "user": get_user_key(),
         }
         
-        # Load existing orders
-        orders = load_json("day2_orders.json", default=[])
-        if not isinstance(orders, list):
-            orders = []
-        
-        # Add new order
-        orders.append(order)
-        
-        # Save to file
-        if save_json("day2_orders.json", orders):
+        # Append to the order journal
+        if await ORDERS.ainsert(order):
             logger.info(f"Order saved: {order}")
             return f"Order saved successfully! I've got your {size} {drink_type} with {milk} milk and {', '.join(extras) if extras else 'no extras'} ready for {customer_name}."
         else:
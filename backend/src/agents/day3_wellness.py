@@ -1,6 +1,6 @@
 """Day 3: Health & Wellness Voice Companion Agent."""
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from livekit.agents import (
@@ -25,10 +25,13 @@ src_path = Path(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared.identity import get_user_key
+from shared.store import get_store
 
 logger = logging.getLogger("agent.day3")
 
+CHECKINS = get_store("day3_checkins")
+
 
 class WellnessAgent(Agent):
     def __init__(self) -> None:
@@ -63,14 +66,12 @@ class WellnessAgent(Agent):
             Summary of past check-ins
         """
         try:
-            history = load_json("day3_wellness_log.json", default=[])
-            if not isinstance(history, list):
-                return "No previous check-ins found."
-            
-            # Filter by date (simplified - just get recent entries)
-            recent = history[-days:] if len(history) > days else history
+            user = get_user_key()
+            recent = await CHECKINS.aquery_range(datetime.now() - timedelta(days=days), key=user)
             
             if not recent:
+                if await CHECKINS.aquery_by_key(user, 1):
+                    return f"No check-ins in the past {days} days. Welcome back!"
                 return "This is your first check-in. Welcome!"
             
             # Build summary
@@ -112,15 +113,10 @@ class WellnessAgent(Agent):
                 "energy": energy,
                 "objectives": objectives,
                 "summary": summary or f"Check-in completed. Mood: {mood}, Energy: {energy}",
+                "user": get_user_key(),
             }
             
-            history = load_json("day3_wellness_log.json", default=[])
-            if not isinstance(history, list):
-                history = []
-            
-            history.append(checkin)
-            
-            if save_json("day3_wellness_log.json", history):
+            if await CHECKINS.ainsert(checkin):
                 logger.info(f"Wellness check-in saved: {checkin}")
                 objectives_str = ", ".join(objectives) if objectives else "none specified"
                 return f"Check-in saved! I've recorded that you're feeling {mood} with {energy} energy, and your objectives are: {objectives_str}. Take care today!"
@@ -1,7 +1,5 @@
 """Day 4: Active Recall Tutor Agent with 3 learning modes."""
 import logging
-import json
-from pathlib import Path
 from typing import Literal
 
 from livekit.agents import (
@@ -18,19 +16,28 @@ from livekit.agents import (
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+import sys
+from pathlib import Path as PathLib
+
+# Add src directory to path for imports
+src_path = PathLib(__file__).parent.parent
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from shared import reload, vectors
+
 logger = logging.getLogger("agent.day4")
 
 # Load tutor content
-CONTENT_FILE = Path(__file__).parent.parent / "shared" / "data" / "day4_tutor_content.json"
+CONTENT_FILE = "day4_tutor_content.json"
 
 def load_tutor_content():
-    """Load tutor content from JSON file."""
-    try:
-        with open(CONTENT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading tutor content: {e}")
-        return []
+    """Load tutor content from its prebuilt snapshot, or the JSON file.
+
+    The returned handle's ``current`` snapshot is swapped when the file
+    changes; read it once per tool call.
+    """
+    return reload.watch(CONTENT_FILE, default=[], fallback_indexes={"concepts_by_id": {}})
 
 # Load content at module level
 TUTOR_CONTENT = load_tutor_content()
@@ -84,25 +91,31 @@ class TutorAgent(Agent):
         """Get information about a programming concept.
         
         Args:
-            concept_id: ID of the concept (e.g., "variables", "loops"). If None, returns list of available concepts.
+            concept_id: ID of the concept (e.g., "variables", "loops"), or a few words describing it (e.g., "if else"). If None, returns list of available concepts.
             
         Returns:
             Concept information or list of available concepts
         """
+        content = TUTOR_CONTENT.current
+        concepts = content.data
+        concepts_by_id = content.indexes["concepts_by_id"]
         if not concept_id:
-            concepts_list = [f"- {c['id']}: {c['title']}" for c in TUTOR_CONTENT]
+            concepts_list = [f"- {c['id']}: {c['title']}" for c in concepts]
             return "Available concepts:\n" + "\n".join(concepts_list)
         
-        for concept in TUTOR_CONTENT:
-            if concept["id"] == concept_id.lower():
-                if self.mode == "learn":
-                    return f"Concept: {concept['title']}\n\n{concept['summary']}"
-                elif self.mode == "quiz":
-                    return f"Question: {concept['sample_question']}"
-                else:  # teach_back
-                    return f"Please explain: {concept['title']}\n\nHere's a brief summary to help: {concept['summary']}"
+        concept = concepts_by_id.get(concept_id.lower())
+        if not concept:
+            similar = vectors.get("concepts").best(concept_id)
+            concept = concepts_by_id.get(similar[0]) if similar else None
+        if concept:
+            if self.mode == "learn":
+                return f"Concept: {concept['title']}\n\n{concept['summary']}"
+            elif self.mode == "quiz":
+                return f"Question: {concept['sample_question']}"
+            else:  # teach_back
+                return f"Please explain: {concept['title']}\n\nHere's a brief summary to help: {concept['summary']}"
         
-        return f"Concept '{concept_id}' not found. Available concepts: {', '.join([c['id'] for c in TUTOR_CONTENT])}"
+        return f"Concept '{concept_id}' not found. Available concepts: {', '.join([c['id'] for c in concepts])}"
 
     @function_tool
     async def list_concepts(self, context: RunContext) -> str:
@@ -111,7 +124,7 @@ class TutorAgent(Agent):
         Returns:
             List of available concepts
         """
-        concepts = [f"{i+1}. {c['title']} ({c['id']})" for i, c in enumerate(TUTOR_CONTENT)]
+        concepts = [f"{i+1}. {c['title']} ({c['id']})" for i, c in enumerate(TUTOR_CONTENT.current.data)]
         return "Available concepts:\n" + "\n".join(concepts)
 
 
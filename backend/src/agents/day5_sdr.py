@@ -1,7 +1,5 @@
 """Day 5: Sales Development Representative (SDR) Agent."""
 import logging
-import json
-from pathlib import Path
 from datetime import datetime
 from typing import Optional
 
@@ -27,29 +25,37 @@ src_path = PathLib(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared import reload, vectors
+from shared.retrieval import MIN_CONFIDENCE, BM25Index
+from shared.store import get_store
 
 logger = logging.getLogger("agent.day5")
 
+LEADS = get_store("day5_leads")
+
 # Load company FAQ
-FAQ_FILE = Path(__file__).parent.parent / "shared" / "data" / "day5_company_faq.json"
+FAQ_FILE = "day5_company_faq.json"
 
 def load_faq():
-    """Load company FAQ from JSON file."""
-    try:
-        with open(FAQ_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading FAQ: {e}")
-        return {"company_name": "TechFlow Solutions", "faq": []}
+    """Load company FAQ from its prebuilt snapshot, or the JSON file.
+
+    The returned handle's ``current`` snapshot is swapped when the file
+    changes; read it once per tool call.
+    """
+    return reload.watch(
+        FAQ_FILE,
+        default={"company_name": "TechFlow Solutions", "faq": []},
+        fallback_indexes={"search": BM25Index([])},
+    )
 
-COMPANY_DATA = load_faq()
+FAQ = load_faq()
 
 
 class SDRAgent(Agent):
     def __init__(self) -> None:
+        company_data = FAQ.current.data
         super().__init__(
-            instructions=f"""You are a Sales Development Representative (SDR) for {COMPANY_DATA.get('company_name', 'TechFlow Solutions')}, an Indian startup.
+            instructions=f"""You are a Sales Development Representative (SDR) for {company_data.get('company_name', 'TechFlow Solutions')}, an Indian startup.
 
             Your role:
             - Greet visitors warmly and professionally
@@ -81,23 +87,31 @@ class SDRAgent(Agent):
         Returns:
             Relevant FAQ answer or information
         """
-        query_lower = query.lower()
-        faq_list = COMPANY_DATA.get("faq", [])
+        faq = FAQ.current
+        company_data = faq.data
+        faq_list = company_data.get("faq", [])
+        results = faq.indexes["search"].search(query, limit=3)
+        confident = [faq_list[i] for i, confidence in results if confidence >= MIN_CONFIDENCE]
+        if not confident:
+            # Paraphrases share few keywords with the FAQ; try the vectors
+            similar = vectors.get("faq").best(query)
+            confident = [similar[0]] if similar else []
         
-        # Simple keyword matching
-        for item in faq_list:
-            question = item.get("question", "").lower()
-            answer = item.get("answer", "")
-            
-            # Check if query matches question keywords
-            if any(word in question for word in query_lower.split() if len(word) > 3):
-                return f"{item['question']}\n\n{answer}"
+        if confident:
+            best = confident[0]
+            answer = f"{best['question']}\n\n{best.get('answer', '')}"
+            if len(confident) > 1:
+                answer += "\n\nRelated questions: " + "; ".join(item["question"] for item in confident[1:])
+            return answer
         
-        # If no match, return general info
-        company_name = COMPANY_DATA.get("company_name", "TechFlow Solutions")
-        description = COMPANY_DATA.get("description", "An AI-powered workflow automation platform.")
+        # If no confident match, return general info
+        company_name = company_data.get("company_name", "TechFlow Solutions")
+        description = company_data.get("description", "An AI-powered workflow automation platform.")
         
-        return f"I don't have a specific answer for that, but {company_name} is {description}. Would you like to know more about our pricing, features, or how it works?"
+        fallback = f"I don't have a specific answer for that, but {company_name} is {description.rstrip('.')}."
+        if results:
+            fallback += " Closest FAQ topics: " + "; ".join(faq_list[i]["question"] for i, _ in results) + "."
+        return fallback + " Would you like to know more about our pricing, features, or how it works?"
 
     @function_tool
     async def save_lead(
@@ -137,13 +151,7 @@ class SDRAgent(Agent):
                 "date": datetime.now().isoformat(),
             }
             
-            leads = load_json("day5_leads.json", default=[])
-            if not isinstance(leads, list):
-                leads = []
-            
-            leads.append(lead)
-            
-            if save_json("day5_leads.json", leads):
+            if await LEADS.ainsert(lead):
                 logger.info(f"Lead saved: {lead}")
                 summary = f"Great! I've saved your information. Here's a quick summary: {name} from {company} ({role}) is interested in using our platform for {use_case} with a team of {team_size}, looking to implement {timeline}. We'll be in touch soon at {email}!"
                 return summary
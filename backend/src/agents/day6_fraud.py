@@ -1,7 +1,6 @@
 """Day 6: Fraud Alert Voice Agent."""
 import logging
 import json
-from pathlib import Path
 from typing import Optional
 
 from livekit.agents import (
@@ -26,31 +25,31 @@ src_path = PathLib(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared.tools.file_ops import aload_json_view, aupdate_json
 
 logger = logging.getLogger("agent.day6")
 
-# Load fraud cases
-FRAUD_CASES_FILE = Path(__file__).parent.parent / "shared" / "data" / "day6_fraud_cases.json"
-
-def load_fraud_cases():
-    """Load fraud cases from JSON file."""
-    try:
-        with open(FRAUD_CASES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading fraud cases: {e}")
-        return []
-
-def save_fraud_cases(cases):
-    """Save fraud cases to JSON file."""
-    try:
-        with open(FRAUD_CASES_FILE, "w", encoding="utf-8") as f:
-            json.dump(cases, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving fraud cases: {e}")
-        return False
+# Fraud cases file in the shared data directory
+FRAUD_CASES_FILE = "day6_fraud_cases.json"
+
+
+async def load_fraud_cases():
+    """Load fraud cases from JSON file.
+
+    The cases come from the shared read cache and must not be modified; use
+    ``update_fraud_cases`` to change them.
+    """
+    cases = await aload_json_view(FRAUD_CASES_FILE, default=[])
+    return cases if isinstance(cases, list) else []
+
+
+async def update_fraud_cases(update):
+    """Apply ``update`` to the fraud cases and save them.
+
+    Runs under the file's cross-process lock, so concurrent calls from other
+    job processes cannot overwrite each other's outcome.
+    """
+    return await aupdate_json(FRAUD_CASES_FILE, update, default=[])
 
 
 class FraudAlertAgent(Agent):
@@ -88,7 +87,7 @@ class FraudAlertAgent(Agent):
         Returns:
             Fraud case details or error message
         """
-        cases = load_fraud_cases()
+        cases = await load_fraud_cases()
         
         # Find case by username
         for case in cases:
@@ -118,28 +117,33 @@ class FraudAlertAgent(Agent):
         Returns:
             Confirmation message
         """
-        cases = load_fraud_cases()
+        updated = {}
         
-        # Find and update case
-        for case in cases:
-            if case.get("userName", "").lower() == username.lower():
-                case["case"] = status
-                case["outcome"] = status
-                case["outcomeNote"] = outcome_note
-                
-                if save_fraud_cases(cases):
-                    logger.info(f"Fraud case updated: {username} -> {status}")
-                    
-                    if status == "confirmed_safe":
-                        return f"Transaction confirmed as legitimate. The case has been closed. Thank you for verifying."
-                    elif status == "confirmed_fraud":
-                        return f"Fraud confirmed. I've blocked the card ending in {case.get('cardEnding', '****')} and initiated a dispute. A new card will be issued within 5-7 business days. Thank you for reporting this."
-                    else:
-                        return f"Verification failed. For security reasons, I cannot proceed. Please contact our customer service directly. Thank you."
-                else:
-                    return "I had trouble updating the case, but I've noted the outcome."
+        def _apply(cases):
+            cases = cases if isinstance(cases, list) else []
+            # Find and update case
+            for case in cases:
+                if case.get("userName", "").lower() == username.lower():
+                    case["case"] = status
+                    case["outcome"] = status
+                    case["outcomeNote"] = outcome_note
+                    updated.update(case)
+                    break
+            return cases
+        
+        if not await update_fraud_cases(_apply):
+            return "I had trouble updating the case, but I've noted the outcome."
+        if not updated:
+            return f"Case not found for username: {username}"
+        
+        logger.info(f"Fraud case updated: {username} -> {status}")
         
-        return f"Case not found for username: {username}"
+        if status == "confirmed_safe":
+            return f"Transaction confirmed as legitimate. The case has been closed. Thank you for verifying."
+        elif status == "confirmed_fraud":
+            return f"Fraud confirmed. I've blocked the card ending in {updated.get('cardEnding', '****')} and initiated a dispute. A new card will be issued within 5-7 business days. Thank you for reporting this."
+        else:
+            return f"Verification failed. For security reasons, I cannot proceed. Please contact our customer service directly. Thank you."
 
 
 async def entrypoint(ctx: JobContext):
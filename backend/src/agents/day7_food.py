@@ -1,13 +1,13 @@
 """Day 7: Food & Grocery Ordering Voice Agent."""
 import logging
-import json
-from pathlib import Path
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 
 from livekit.agents import (
     Agent,
     AgentSession,
+    FunctionToolsExecutedEvent,
     JobContext,
     MetricsCollectedEvent,
     RoomInputOptions,
@@ -18,6 +18,7 @@ from livekit.agents import (
 )
 from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from pydantic import BaseModel, Field, ValidationError
 
 import sys
 from pathlib import Path as PathLib
@@ -27,26 +28,111 @@ src_path = PathLib(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared import reload
+from shared.catalog import CatalogIndex, ProductCatalog
+from shared.fuzzy import FuzzyIndex
+from shared.pagination import MAX_ORDERING, CursorError, OrderingCache, StaleCursorError, decode_cursor, describe_page, encode_cursor
+from shared.session_store import SessionStore, release_all
+from shared.store import get_store
+from shared.text import normalize
 
 logger = logging.getLogger("agent.day7")
 
+ORDERS = get_store("day7_orders")
+
 # Load catalog
-CATALOG_FILE = Path(__file__).parent.parent / "shared" / "data" / "day7_catalog.json"
+CATALOG_FILE = "day7_catalog.json"
 
 def load_catalog():
-    """Load food catalog from JSON file."""
-    try:
-        with open(CATALOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading catalog: {e}")
-        return {"categories": {}, "recipes": {}}
+    """Load food catalog from its prebuilt snapshot, or the JSON file.
+
+    The returned handle's ``current`` snapshot is swapped when the file
+    changes; read it once per tool call.
+    """
+    # Indexes come prebuilt with the snapshot; empty ones stand in if the
+    # catalog could not be indexed at all. The fuzzy indexes are typo- and
+    # sound-tolerant fallbacks for misheard item and recipe names.
+    return reload.watch(
+        CATALOG_FILE,
+        default={"categories": {}, "recipes": {}},
+        fallback_indexes={
+            "lookup": ProductCatalog(),
+            "search": CatalogIndex([]),
+            "fuzzy_items": FuzzyIndex([]),
+            "fuzzy_recipes": FuzzyIndex([]),
+        },
+    )
 
 CATALOG = load_catalog()
 
-# Session cart (in production, use proper session state)
-_session_carts: Dict[str, List[Dict]] = {}
+# Items per search_catalog page
+PAGE_SIZE = 5
+
+# Recent search orderings, so later pages of a search are a slice
+_ORDERINGS = OrderingCache(max_entries=128)
+
+
+def _search_ordering(indexes: Dict, query: str, category: Optional[str]) -> Tuple[bool, List[Dict]]:
+    """Rank every item matching a search (up to ``MAX_ORDERING``).
+
+    Returns:
+        Whether the items matched the query, rather than being the closest
+        names to a misheard one, and the items best first
+    """
+    results = indexes["search"].search(query, category=category, limit=MAX_ORDERING)
+    if results:
+        return True, results
+    # The query may be misheard ("panir", "whole weet"): offer the
+    # closest names instead of failing
+    lookup = indexes["lookup"]
+    results = [lookup.get(key) for key, _ in indexes["fuzzy_items"].search(query, limit=20)]
+    if category:
+        results = [item for item in results if normalize(item.get("category", "")) == normalize(category)]
+    return False, results[:PAGE_SIZE]
+
+
+def _find_recipe(indexes: Dict, recipe_name: str) -> Optional[str]:
+    """Get the key of a recipe, falling back to the closest recipe name
+    ("peanut butter sandwitch")."""
+    recipe_key = recipe_name.lower().replace(" ", "_")
+    if recipe_key in indexes["lookup"].recipes:
+        return recipe_key
+    matches = indexes["fuzzy_recipes"].search(recipe_name, limit=1)
+    return matches[0][0] if matches else None
+
+
+def _add_line(cart: List[Dict], item: Dict, quantity: int) -> Dict:
+    """Add an item to a cart, merging with its existing line; returns the line."""
+    for cart_item in cart:
+        if cart_item["id"] == item["id"]:
+            cart_item["quantity"] += quantity
+            return cart_item
+    cart_item = {
+        "id": item["id"],
+        "name": item["name"],
+        "price": item["price"],
+        "quantity": quantity,
+    }
+    cart.append(cart_item)
+    return cart_item
+
+@dataclass
+class FoodSession:
+    """State of one ordering session, passed to tools as ``context.userdata``."""
+
+    cart: List[Dict] = field(default_factory=list)
+
+
+# Live sessions, for the gauges and as a safety net if a job never shuts down
+SESSIONS = SessionStore("day7_sessions", factory=FoodSession)
+
+
+class CartItem(BaseModel):
+    """One item for add_items_to_cart; a typed model so the tool schema
+    describes its fields (Gemini rejects objects without properties)."""
+
+    item_id: str = Field(description="ID of the item to add")
+    quantity: int = Field(default=1, description="Quantity to add")
 
 
 class FoodOrderingAgent(Agent):
@@ -58,6 +144,7 @@ class FoodOrderingAgent(Agent):
             - Greet customers warmly and explain what you can help with
             - Help customers add items to their cart
             - Handle "ingredients for X" requests intelligently (e.g., "ingredients for peanut butter sandwich")
+            - To add a whole recipe or several items at once, use the add_items_to_cart tool in a single call
             - Ask for clarifications when needed (size, brand, quantity)
             - When asked "what's in my cart", use the get_cart tool
             - Support cart operations: add, remove, update quantities
@@ -74,45 +161,62 @@ class FoodOrderingAgent(Agent):
     @function_tool
     async def search_catalog(
         self,
-        context: RunContext,
-        query: str,
+        context: RunContext[FoodSession],
+        query: str = "",
         category: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> str:
         """Search the food catalog for items.
         
         Args:
             query: Search query (item name, brand, etc.)
             category: Optional category filter (groceries, snacks, prepared_food)
+            cursor: Cursor from a previous search, to get its next page
+                (query and category are then taken from the cursor)
             
         Returns:
-            List of matching items with prices
+            A page of matching items with prices, the total, and a cursor
+            for the next page if there is one
         """
-        query_lower = query.lower()
-        results = []
+        snapshot = CATALOG.current
+        start = 0
+        if cursor:
+            try:
+                fields = decode_cursor(cursor, snapshot.version)
+                query, category, start = fields["q"], fields.get("c"), int(fields["o"])
+            except StaleCursorError:
+                return "That cursor has expired because the catalog was updated; please search again."
+            except (CursorError, KeyError, TypeError, ValueError):
+                return "That cursor is not valid; please search again without it."
         
-        categories_to_search = [category] if category else CATALOG.get("categories", {}).keys()
-        
-        for cat in categories_to_search:
-            items = CATALOG.get("categories", {}).get(cat, [])
-            for item in items:
-                name = item.get("name", "").lower()
-                if query_lower in name or any(query_lower in tag.lower() for tag in item.get("tags", [])):
-                    results.append(item)
+        # The whole ordering is computed once per query, so any page is a slice
+        exact, results = _ORDERINGS.get(
+            (snapshot.version, normalize(query), normalize(category or "")),
+            lambda: _search_ordering(snapshot.indexes, query, category),
+        )
         
         if not results:
             return f"No items found matching '{query}'. Try searching for bread, eggs, milk, pasta, or prepared food items."
         
+        page = results[start:start + PAGE_SIZE]
+        header = "Found items" if exact else f"No exact match for '{query}'. Closest items"
+        header += ". " + describe_page(start, len(page), len(results), capped=len(results) >= MAX_ORDERING)
+        
         # Format results
         formatted = []
-        for item in results[:5]:  # Limit to 5 results
+        for item in page:
             price = item.get("price", 0)
             size = item.get("size", "")
             formatted.append(f"- {item['name']} ({size}) - ₹{price} [ID: {item['id']}]")
         
-        return "Found items:\n" + "\n".join(formatted)
+        output = header + ":\n" + "\n".join(formatted)
+        if start + len(page) < len(results):
+            next_cursor = encode_cursor(snapshot.version, q=query, c=category, o=start + len(page))
+            output += f"\n\nFor more, call search_catalog with cursor='{next_cursor}'."
+        return output
 
     @function_tool
-    async def get_recipe_items(self, context: RunContext, recipe_name: str) -> str:
+    async def get_recipe_items(self, context: RunContext[FoodSession], recipe_name: str) -> str:
         """Get items needed for a recipe.
         
         Args:
@@ -121,21 +225,21 @@ class FoodOrderingAgent(Agent):
         Returns:
             List of items needed for the recipe
         """
-        recipes = CATALOG.get("recipes", {})
-        recipe_key = recipe_name.lower().replace(" ", "_")
+        indexes = CATALOG.current.indexes
+        recipes = indexes["lookup"].recipes
+        recipe_key = _find_recipe(indexes, recipe_name)
         
-        if recipe_key in recipes:
-            recipe = recipes[recipe_key]
-            item_ids = recipe.get("items", [])
-            
-            # Get item details
-            items = []
-            for cat_items in CATALOG.get("categories", {}).values():
-                for item in cat_items:
-                    if item["id"] in item_ids:
-                        items.append(f"- {item['name']} ({item['size']}) - ₹{item['price']} [ID: {item['id']}]")
+        if recipe_key is not None:
+            bundle = indexes["lookup"].bundles[recipe_key]
+            items = [
+                f"- {quantity}x {item['name']} ({item.get('size', '')}) - ₹{item['price']} [ID: {item['id']}]"
+                for item, quantity in bundle.lines
+            ]
             
-            return f"For {recipe['name']}, you'll need:\n" + "\n".join(items)
+            return (
+                f"For {bundle.name}, you'll need:\n" + "\n".join(items)
+                + f"\n\nBundle total: ₹{bundle.total}. To add everything at once, call add_items_to_cart with recipe_name='{recipe_key}'."
+            )
         else:
             available = ", ".join([r.replace("_", " ") for r in recipes.keys()])
             return f"Recipe '{recipe_name}' not found. Available recipes: {available}"
@@ -143,7 +247,7 @@ class FoodOrderingAgent(Agent):
     @function_tool
     async def add_to_cart(
         self,
-        context: RunContext,
+        context: RunContext[FoodSession],
         item_id: str,
         quantity: int = 1,
     ) -> str:
@@ -156,54 +260,88 @@ class FoodOrderingAgent(Agent):
         Returns:
             Confirmation message
         """
-        # Find item in catalog
-        item = None
-        for cat_items in CATALOG.get("categories", {}).values():
-            for i in cat_items:
-                if i["id"] == item_id:
-                    item = i
-                    break
-            if item:
-                break
-        
+        item = CATALOG.current.indexes["lookup"].get(item_id)
         if not item:
             return f"Item with ID '{item_id}' not found in catalog."
         
-        # Get or create cart for this session
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        if room_id not in _session_carts:
-            _session_carts[room_id] = []
+        cart = context.userdata.cart
         
-        cart = _session_carts[room_id]
+        cart_item = _add_line(cart, item, quantity)
+        total_price = cart_item["quantity"] * item["price"]
+        if cart_item["quantity"] > quantity:
+            return f"Updated quantity. You now have {cart_item['quantity']}x {item['name']} in your cart (₹{total_price} total)."
+        return f"Added {quantity}x {item['name']} to your cart (₹{total_price})."
+
+    @function_tool
+    async def add_items_to_cart(
+        self,
+        context: RunContext[FoodSession],
+        recipe_name: Optional[str] = None,
+        items: Optional[List[CartItem]] = None,
+        servings: int = 1,
+    ) -> str:
+        """Add a whole recipe, or several items, to the cart in one call.
         
-        # Check if item already in cart
-        for cart_item in cart:
-            if cart_item["id"] == item_id:
-                cart_item["quantity"] += quantity
-                total_price = cart_item["quantity"] * item["price"]
-                return f"Updated quantity. You now have {cart_item['quantity']}x {item['name']} in your cart (₹{total_price} total)."
+        Args:
+            recipe_name: Recipe whose ingredients to add (e.g., "peanut butter sandwich")
+            items: Items to add, each with item_id and an optional quantity
+            servings: Multiplies the recipe's default quantities (default: 1)
+            
+        Returns:
+            What was added, anything that could not be, and the cart total
+        """
+        indexes = CATALOG.current.indexes
+        lookup = indexes["lookup"]
+        lines = []
+        problems = []
         
-        # Add new item
-        cart_item = {
-            "id": item_id,
-            "name": item["name"],
-            "price": item["price"],
-            "quantity": quantity,
-        }
-        cart.append(cart_item)
+        if recipe_name:
+            recipe_key = _find_recipe(indexes, recipe_name)
+            if recipe_key is None:
+                available = ", ".join([r.replace("_", " ") for r in lookup.recipes.keys()])
+                return f"Recipe '{recipe_name}' not found. Available recipes: {available}"
+            bundle = lookup.bundles[recipe_key]
+            lines.extend((item, quantity * max(servings, 1)) for item, quantity in bundle.lines)
+            problems.extend(f"'{item_id}' from {bundle.name} is not in the catalog" for item_id in bundle.missing)
         
-        total_price = quantity * item["price"]
-        return f"Added {quantity}x {item['name']} to your cart (₹{total_price})."
+        for entry in items or []:
+            try:
+                entry = CartItem.model_validate(entry)
+            except ValidationError:
+                problems.append(f"{entry!r} is not an item_id with a quantity")
+                continue
+            item = lookup.get(entry.item_id)
+            if not item:
+                problems.append(f"item '{entry.item_id}' was not found")
+            elif entry.quantity < 1:
+                problems.append(f"{item['name']} needs a quantity of at least 1")
+            else:
+                lines.append((item, entry.quantity))
+        
+        if not lines:
+            reason = "; ".join(problems) if problems else "no recipe or items were given"
+            return f"Nothing was added to your cart: {reason}."
+        
+        cart = context.userdata.cart
+        for item, quantity in lines:
+            _add_line(cart, item, quantity)
+        
+        added = ", ".join(f"{quantity}x {item['name']}" for item, quantity in lines)
+        added_total = sum(quantity * item["price"] for item, quantity in lines)
+        cart_total = sum(line["quantity"] * line["price"] for line in cart)
+        result = f"Added {added} to your cart (₹{added_total}). Cart total: ₹{cart_total}."
+        if problems:
+            result += " Not added: " + "; ".join(problems) + "."
+        return result
 
     @function_tool
-    async def get_cart(self, context: RunContext) -> str:
+    async def get_cart(self, context: RunContext[FoodSession]) -> str:
         """Get current cart contents.
         
         Returns:
             Cart summary with items and total
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        cart = _session_carts.get(room_id, [])
+        cart = context.userdata.cart
         
         if not cart:
             return "Your cart is empty."
@@ -220,7 +358,7 @@ class FoodOrderingAgent(Agent):
     @function_tool
     async def remove_from_cart(
         self,
-        context: RunContext,
+        context: RunContext[FoodSession],
         item_id: str,
     ) -> str:
         """Remove an item from the cart.
@@ -231,8 +369,7 @@ class FoodOrderingAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        cart = _session_carts.get(room_id, [])
+        cart = context.userdata.cart
         
         for i, item in enumerate(cart):
             if item["id"] == item_id:
@@ -244,7 +381,7 @@ class FoodOrderingAgent(Agent):
     @function_tool
     async def place_order(
         self,
-        context: RunContext,
+        context: RunContext[FoodSession],
         customer_name: Optional[str] = None,
         address: Optional[str] = None,
     ) -> str:
@@ -257,8 +394,7 @@ class FoodOrderingAgent(Agent):
         Returns:
             Order confirmation
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        cart = _session_carts.get(room_id, [])
+        cart = context.userdata.cart
         
         if not cart:
             return "Your cart is empty. Add some items before placing an order."
@@ -279,14 +415,9 @@ class FoodOrderingAgent(Agent):
         }
         
         # Save order
-        orders = load_json("day7_orders.json", default=[])
-        if not isinstance(orders, list):
-            orders = []
-        orders.append(order)
-        
-        if save_json("day7_orders.json", orders):
+        if await ORDERS.ainsert(order):
             # Clear cart
-            _session_carts[room_id] = []
+            context.userdata.cart = []
             
             logger.info(f"Order placed: {order['order_id']}")
             return f"Order placed successfully! Order ID: {order['order_id']}. Total: ₹{total}. Your order will be prepared and delivered soon. Thank you!"
@@ -302,7 +433,8 @@ async def entrypoint(ctx: JobContext):
     }
 
     # Set up voice AI pipeline
-    session = AgentSession(
+    session = AgentSession[FoodSession](
+        userdata=await SESSIONS.aget_or_create(ctx.room.name),
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
         tts=murf.TTS(
@@ -330,6 +462,17 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    async def release_session():
+        release_all(ctx.room.name)
+
+    ctx.add_shutdown_callback(release_session)
+
+    # Snapshot the session after each batch of tool calls, so another
+    # worker can resume it; the write happens in the background
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        SESSIONS.save(ctx.room.name, session.userdata)
+
     # Start the session
     await session.start(
         agent=FoodOrderingAgent(),
@@ -1,8 +1,10 @@
 """Day 8: D&D-Style Game Master Agent."""
 import logging
 import json
+import pickle
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Optional, Tuple
 
 from livekit.agents import (
     Agent,
@@ -26,57 +28,139 @@ src_path = PathLib(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared import reload
+from shared.session_store import SessionStore, release_all
+from shared.snapshots import Snapshot
+from shared.tools.file_ops import freeze, thaw
 
 logger = logging.getLogger("agent.day8")
 
 # World state file
 WORLD_STATE_FILE = Path(__file__).parent.parent / "shared" / "data" / "day8_world_state.json"
 
-# Session-based world states (in production, use proper session management)
-_session_states: Dict[str, Dict[str, Any]] = {}
-
-
-def get_world_state(room_id: str) -> Dict[str, Any]:
-    """Get or initialize world state for a session."""
-    if room_id not in _session_states:
-        # Load default world state
-        default_state = load_json("day8_world_state.json", default={
-            "universe": "fantasy",
-            "tone": "dramatic",
-            "player_character": {
-                "name": "",
-                "class": "",
-                "hp": 100,
-                "max_hp": 100,
-                "status": "Healthy",
-                "inventory": [],
-                "traits": []
-            },
-            "npcs": [],
-            "locations": {
-                "current": {
-                    "name": "The Enchanted Forest",
-                    "description": "A mysterious forest filled with ancient trees and magical creatures.",
-                    "paths": ["north", "east", "south"]
-                }
-            },
-            "events": [],
-            "quests": {
-                "active": [],
-                "completed": []
-            },
-            "session_started": False
-        })
-        _session_states[room_id] = default_state.copy()
-    return _session_states[room_id]
-
-
-def save_world_state(room_id: str, state: Dict[str, Any]):
-    """Save world state (in-memory for now, can persist to file)."""
-    _session_states[room_id] = state
-    # Optionally save to file
-    # save_json(f"day8_world_state_{room_id}.json", state)
+# World every new adventure starts from if the file cannot be read
+DEFAULT_WORLD = freeze({
+    "universe": "fantasy",
+    "tone": "dramatic",
+    "player_character": {
+        "name": "",
+        "class": "",
+        "hp": 100,
+        "max_hp": 100,
+        "status": "Healthy",
+        "inventory": [],
+        "traits": []
+    },
+    "npcs": [],
+    "locations": {
+        "current": {
+            "name": "The Enchanted Forest",
+            "description": "A mysterious forest filled with ancient trees and magical creatures.",
+            "paths": ["north", "east", "south"]
+        }
+    },
+    "events": [],
+    "quests": {
+        "active": [],
+        "completed": []
+    },
+    "session_started": False
+})
+
+
+class WorldTemplate:
+    """The starting world, parsed once and frozen.
+
+    ``world`` is read-only and safe to share. ``new_world()`` gives each
+    session its own mutable copy: the template is kept pickled, so a copy is
+    one C-level unpickle of a few microseconds, and no list or dict is
+    shared between sessions or with the template.
+    """
+
+    def __init__(self, data: Dict[str, Any], source: Optional[Snapshot] = None) -> None:
+        self.world = freeze(data)
+        self.source = source
+        self._pickled = pickle.dumps(thaw(self.world), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def new_world(self) -> Dict[str, Any]:
+        return pickle.loads(self._pickled)
+
+
+_template: Optional[WorldTemplate] = None
+
+
+def world_template() -> WorldTemplate:
+    """Get the world template, parsing the file only on first use (normally
+    the worker's prewarm) and after it changes."""
+    global _template
+    snapshot = reload.watch(WORLD_STATE_FILE.name, default=DEFAULT_WORLD).current
+    template = _template
+    if template is None or template.source is not snapshot:
+        template = _template = WorldTemplate(snapshot.data, snapshot)
+    return template
+
+
+def prewarm() -> None:
+    """Parse the world template before the first adventure starts."""
+    world_template()
+
+
+@dataclass
+class GameSession:
+    """State of one game, passed to tools as ``context.userdata``.
+
+    Tools change the world through ``change()``, which logs each change to
+    the room's delta log so the game can be resumed.
+    """
+
+    world: Dict[str, Any]
+    room: str = ""
+
+    def apply(self, change: Dict[str, Any]) -> None:
+        """Apply a logged change: ``set``, ``append`` or ``remove`` ``value``
+        at ``path`` in the world."""
+        *parents, key = change["path"]
+        target = self.world
+        for parent in parents:
+            target = target[parent]
+        op, value = change["op"], change["value"]
+        if op == "set":
+            target[key] = value
+        elif op == "append":
+            target[key].append(value)
+        elif op == "remove":
+            if value in target[key]:
+                target[key].remove(value)
+        else:
+            raise ValueError(f"Unknown world change: {op}")
+
+    def change(self, op: str, path: Tuple[str, ...], value: Any) -> None:
+        """Change the world and log the change."""
+        change = {"op": op, "path": list(path), "value": value}
+        self.apply(change)
+        SESSIONS.record(self.room, change)
+
+
+# Live sessions, for the gauges and as a safety net if a job never shuts
+# down; each tool call logs only what it changed. Campaigns outlive the
+# worker, so without Redis they are kept in the data directory.
+SESSIONS = SessionStore(
+    "day8_sessions",
+    durable=True,
+    decode=lambda data: GameSession(**data),
+    apply=GameSession.apply,
+)
+
+
+async def start_session(room_id: str) -> GameSession:
+    """Get the game of a session, restoring its last snapshot and changes or
+    starting from the world template."""
+    session = await SESSIONS.aget(room_id)
+    if session is None:
+        session = SESSIONS.setdefault(room_id, GameSession(world=world_template().new_world(), room=room_id))
+        # Start the room's log from the template, not a previous campaign's
+        SESSIONS.save(room_id)
+    return session
 
 
 class GameMasterAgent(Agent):
@@ -112,7 +196,7 @@ class GameMasterAgent(Agent):
     @function_tool
     async def update_player_character(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         name: str = None,
         character_class: str = None,
         hp: int = None,
@@ -133,37 +217,35 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
-        pc = state["player_character"]
+        game = context.userdata
+        pc = game.world["player_character"]
         
         if name:
-            pc["name"] = name
+            game.change("set", ("player_character", "name"), name)
         if character_class:
-            pc["class"] = character_class
+            game.change("set", ("player_character", "class"), character_class)
         if hp is not None:
-            pc["hp"] = max(0, min(hp, pc["max_hp"]))
+            game.change("set", ("player_character", "hp"), max(0, min(hp, pc["max_hp"])))
             if pc["hp"] < 30:
-                pc["status"] = "Critical"
+                game.change("set", ("player_character", "status"), "Critical")
             elif pc["hp"] < 70:
-                pc["status"] = "Injured"
+                game.change("set", ("player_character", "status"), "Injured")
             else:
-                pc["status"] = "Healthy"
+                game.change("set", ("player_character", "status"), "Healthy")
         if status:
-            pc["status"] = status
+            game.change("set", ("player_character", "status"), status)
         if add_item:
             if add_item not in pc["inventory"]:
-                pc["inventory"].append(add_item)
+                game.change("append", ("player_character", "inventory"), add_item)
         if remove_item and remove_item in pc["inventory"]:
-            pc["inventory"].remove(remove_item)
+            game.change("remove", ("player_character", "inventory"), remove_item)
         
-        save_world_state(room_id, state)
         return f"Character updated: {pc['name']} ({pc['class']}) - HP: {pc['hp']}/{pc['max_hp']} ({pc['status']})"
 
     @function_tool
     async def add_npc(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         name: str,
         role: str,
         attitude: str = "neutral",
@@ -178,22 +260,18 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
-        
         npc = {
             "name": name,
             "role": role,
             "attitude": attitude,
         }
-        state["npcs"].append(npc)
-        save_world_state(room_id, state)
+        context.userdata.change("append", ("npcs",), npc)
         return f"Added NPC: {name} ({role}) - {attitude}"
 
     @function_tool
     async def update_location(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         name: str,
         description: str,
         paths: list[str] = None,
@@ -208,21 +286,18 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
-        
-        state["locations"]["current"] = {
+        location = {
             "name": name,
             "description": description,
             "paths": paths or [],
         }
-        save_world_state(room_id, state)
+        context.userdata.change("set", ("locations", "current"), location)
         return f"Location updated: {name}"
 
     @function_tool
     async def add_event(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         event_description: str,
     ) -> str:
         """Record a key event that happened.
@@ -233,17 +308,13 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
-        
-        state["events"].append(event_description)
-        save_world_state(room_id, state)
+        context.userdata.change("append", ("events",), event_description)
         return f"Event recorded: {event_description}"
 
     @function_tool
     async def add_quest(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         quest_name: str,
         description: str,
     ) -> str:
@@ -256,21 +327,17 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
-        
         quest = {
             "name": quest_name,
             "description": description,
         }
-        state["quests"]["active"].append(quest)
-        save_world_state(room_id, state)
+        context.userdata.change("append", ("quests", "active"), quest)
         return f"Quest added: {quest_name}"
 
     @function_tool
     async def complete_quest(
         self,
-        context: RunContext,
+        context: RunContext[GameSession],
         quest_name: str,
     ) -> str:
         """Mark a quest as completed.
@@ -281,27 +348,24 @@ class GameMasterAgent(Agent):
         Returns:
             Confirmation message
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
+        game = context.userdata
         
-        for quest in state["quests"]["active"]:
+        for quest in game.world["quests"]["active"]:
             if quest["name"] == quest_name:
-                state["quests"]["active"].remove(quest)
-                state["quests"]["completed"].append(quest)
-                save_world_state(room_id, state)
+                game.change("remove", ("quests", "active"), quest)
+                game.change("append", ("quests", "completed"), quest)
                 return f"Quest completed: {quest_name}"
         
         return f"Quest '{quest_name}' not found in active quests."
 
     @function_tool
-    async def get_world_state_summary(self, context: RunContext) -> str:
+    async def get_world_state_summary(self, context: RunContext[GameSession]) -> str:
         """Get a summary of the current world state.
         
         Returns:
             World state summary
         """
-        room_id = context.agent.room.name if hasattr(context.agent, 'room') else "default"
-        state = get_world_state(room_id)
+        state = context.userdata.world
         
         pc = state["player_character"]
         location = state["locations"]["current"]
@@ -324,7 +388,8 @@ async def entrypoint(ctx: JobContext):
     }
 
     # Set up voice AI pipeline
-    session = AgentSession(
+    session = AgentSession[GameSession](
+        userdata=await start_session(ctx.room.name),
         stt=deepgram.STT(model="nova-3"),
         llm=google.LLM(model="gemini-2.5-flash"),
         tts=murf.TTS(
@@ -352,6 +417,12 @@ async def entrypoint(ctx: JobContext):
 
     ctx.add_shutdown_callback(log_usage)
 
+    async def release_session():
+        release_all(ctx.room.name)
+
+    # Saves a final snapshot, compacting the room's delta log
+    ctx.add_shutdown_callback(release_session)
+
     # Start the session
     await session.start(
         agent=GameMasterAgent(),
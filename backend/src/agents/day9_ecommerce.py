@@ -1,7 +1,5 @@
 """Day 9: E-commerce Agent (ACP-inspired)."""
 import logging
-import json
-from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict
 
@@ -27,24 +25,54 @@ src_path = PathLib(__file__).parent.parent
 if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
-from shared.tools.file_ops import save_json, load_json
+from shared.identity import get_user_key
+from shared import reload
+from shared.catalog import FacetIndex, ProductCatalog
+from shared.pagination import CursorError, StaleCursorError, decode_cursor, describe_page, encode_cursor
+from shared.store import get_store
 
 logger = logging.getLogger("agent.day9")
 
+ORDERS = get_store("day9_orders")
+
 # Load catalog
-CATALOG_FILE = Path(__file__).parent.parent / "shared" / "data" / "day9_catalog.json"
+CATALOG_FILE = "day9_catalog.json"
 
 def load_catalog():
-    """Load product catalog from JSON file."""
-    try:
-        with open(CATALOG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading catalog: {e}")
-        return {"products": []}
+    """Load product catalog from its prebuilt snapshot, or the JSON file.
+
+    The returned handle's ``current`` snapshot is swapped when the file
+    changes; read it once per tool call.
+    """
+    return reload.watch(
+        CATALOG_FILE,
+        default={"products": []},
+        fallback_indexes={"lookup": ProductCatalog(), "facets": FacetIndex([])},
+    )
 
 CATALOG = load_catalog()
 
+# Products per list_products page
+PAGE_SIZE = 10
+
+# Facet counts mentioned per facet before "and N more"
+MAX_SPOKEN_VALUES = 4
+
+
+def describe_facets(counts: Dict[str, Dict[str, int]], skip: tuple = ()) -> str:
+    """Summarize facet counts as a short sentence the agent can say."""
+    parts = []
+    for facet, values in counts.items():
+        if facet in skip or not values:
+            continue
+        shown = [f"{value} ({n})" for value, n in list(values.items())[:MAX_SPOKEN_VALUES]]
+        more = len(values) - len(shown)
+        if more:
+            shown.append(f"{more} more")
+        noun = "categories" if facet == "category" else f"{facet}s"
+        parts.append(f"{len(values)} {noun}: " + ", ".join(shown))
+    return "; ".join(parts)
+
 
 class EcommerceAgent(Agent):
     def __init__(self) -> None:
@@ -75,6 +103,7 @@ class EcommerceAgent(Agent):
         category: Optional[str] = None,
         max_price: Optional[int] = None,
         color: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> str:
         """List products from the catalog with optional filters.
         
@@ -82,38 +111,48 @@ class EcommerceAgent(Agent):
             category: Filter by category (mug, tshirt, hoodie, notebook)
             max_price: Maximum price filter
             color: Filter by color
+            cursor: Cursor from a previous listing, to get its next page
+                (the filters are then taken from the cursor)
             
         Returns:
-            List of matching products with details
+            A page of matching products with details, the total, how many
+            match per category and color, and a cursor for the next page
         """
-        products = CATALOG.get("products", [])
-        filtered = []
+        snapshot = CATALOG.current
+        after, shown = -1, 0
+        if cursor:
+            try:
+                fields = decode_cursor(cursor, snapshot.version)
+                category, color, max_price = fields.get("c"), fields.get("k"), fields.get("p")
+                after, shown = int(fields["a"]), int(fields["n"])
+            except StaleCursorError:
+                return "That cursor has expired because the catalog was updated; please list the products again."
+            except (CursorError, KeyError, TypeError, ValueError):
+                return "That cursor is not valid; please list the products again without it."
         
-        for product in products:
-            # Apply filters
-            if category and product.get("category") != category:
-                continue
-            if max_price and product.get("price", 0) > max_price:
-                continue
-            if color and product.get("color", "").lower() != color.lower():
-                continue
-            
-            filtered.append(product)
+        # Products are listed in catalog order, so a page resumes after the
+        # last position shown at the cost of the first
+        result = snapshot.indexes["facets"].filter(
+            {"category": category, "color": color},
+            max_price=max_price or None,
+            limit=PAGE_SIZE,
+            after=after,
+        )
         
-        if not filtered:
+        if not result.total:
             return f"No products found matching your criteria. Try browsing by category: mug, tshirt, hoodie, or notebook."
         
         # Format results
         formatted = []
-        for i, product in enumerate(filtered[:10], 1):  # Limit to 10 results
+        for i, product in enumerate(result.products, shown + 1):
             price = product.get("price", 0)
             currency = product.get("currency", "INR")
-            color = product.get("color", "")
+            product_color = product.get("color", "")
             size = product.get("size", "")
             
             details = f"{i}. {product['name']} - ₹{price} {currency}"
-            if color:
-                details += f" (Color: {color})"
+            if product_color:
+                details += f" (Color: {product_color})"
             if size:
                 details += f" (Size: {size})"
             details += f" - {product.get('description', '')}"
@@ -121,7 +160,21 @@ class EcommerceAgent(Agent):
             
             formatted.append(details)
         
-        return "Found products:\n" + "\n".join(formatted)
+        header = f"Found {result.total} products"
+        summary = describe_facets(
+            result.counts, skip=tuple(f for f, v in (("category", category), ("color", color)) if v)
+        )
+        if summary:
+            header += f" in {summary}"
+        header += ". " + describe_page(shown, len(result.products), result.total)
+        output = header + ":\n" + "\n".join(formatted)
+        if shown + len(result.products) < result.total:
+            next_cursor = encode_cursor(
+                snapshot.version, c=category, k=color, p=max_price,
+                a=result.positions[-1], n=shown + len(result.products),
+            )
+            output += f"\n\nFor more, call list_products with cursor='{next_cursor}'."
+        return output
 
     @function_tool
     async def create_order(
@@ -143,18 +196,13 @@ class EcommerceAgent(Agent):
             order_items = []
             total = 0
             currency = "INR"
+            lookup = CATALOG.current.indexes["lookup"]
             
             for item in line_items:
                 product_id = item.get("product_id")
                 quantity = item.get("quantity", 1)
                 
-                # Find product in catalog
-                product = None
-                for p in CATALOG.get("products", []):
-                    if p["id"] == product_id:
-                        product = p
-                        break
-                
+                product = lookup.get(product_id)
                 if not product:
                     return f"Product with ID '{product_id}' not found in catalog."
                 
@@ -178,15 +226,11 @@ class EcommerceAgent(Agent):
                 "currency": currency,
                 "created_at": datetime.now().isoformat(),
                 "status": "PENDING",
+                "user": get_user_key(),
             }
             
             # Save order
-            orders = load_json("day9_orders.json", default=[])
-            if not isinstance(orders, list):
-                orders = []
-            orders.append(order)
-            
-            if save_json("day9_orders.json", orders):
+            if await ORDERS.ainsert(order):
                 logger.info(f"Order created: {order['id']}")
                 
                 # Format confirmation
@@ -212,8 +256,8 @@ class EcommerceAgent(Agent):
         Returns:
             Last order summary
         """
-        orders = load_json("day9_orders.json", default=[])
-        if not isinstance(orders, list) or not orders:
+        orders = await ORDERS.aquery_by_key(get_user_key(), 1)
+        if not orders:
             return "You haven't placed any orders yet."
         
         order = orders[-1]  # Most recent order
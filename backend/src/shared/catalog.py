@@ -0,0 +1,456 @@
+"""Search indexes over product catalogs.
+
+``CatalogIndex`` is built once when a catalog is loaded (or prebuilt into
+its snapshot) and answers ``search_catalog`` queries from an inverted
+index instead of scanning every item. ``FacetIndex`` does the same for the
+category, color and price filters of ``list_products``.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from shared.text import normalize
+
+# Item fields that are searchable; list fields (tags) index every element
+SEARCH_FIELDS = ("name", "brand", "tags")
+
+# Product fields filtered and counted by ``FacetIndex``
+FACET_FIELDS = ("category", "color")
+
+# Cumulative price bitmaps kept by ``FacetIndex`` for wide price ranges
+PRICE_CHECKPOINTS = 64
+
+# Shorter query tokens only match whole tokens, since a one-letter prefix
+# would expand to most of the vocabulary
+MIN_PREFIX = 2
+
+
+class CatalogIndex:
+    """Inverted index over catalog items with ranked search.
+
+    Results are ranked in tiers: an exact match of the whole query against
+    an item's name, brand or a tag, then names that start with the query,
+    then items containing every query word as a whole word, then items
+    where each query word is at least a prefix of an item word (so "choc"
+    finds "Chocolate Cookies"). Ties keep catalog order.
+
+    Postings are kept sorted, so each tier is read in catalog order and a
+    search stops as soon as it has ``limit`` results.
+
+    Args:
+        items: Catalog items; each needs an ``id`` and may have the
+            ``SEARCH_FIELDS`` and a ``category``
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]]) -> None:
+        self.items: List[Dict[str, Any]] = list(items)
+        # token -> item positions, ascending
+        self._postings: Dict[str, List[int]] = {}
+        # normalized name, brand or tag -> item positions
+        self._exact: Dict[str, List[int]] = {}
+        # normalized category -> item positions, ascending
+        self._categories: Dict[str, List[int]] = {}
+        # normalized name -> item positions, ascending
+        self._name_postings: Dict[str, List[int]] = {}
+
+        for pos, item in enumerate(self.items):
+            tokens: Set[str] = set()
+            for value in self._field_values(item):
+                norm = normalize(value)
+                if not norm:
+                    continue
+                exact = self._exact.setdefault(norm, [])
+                if not exact or exact[-1] != pos:
+                    exact.append(pos)
+                tokens.update(norm.split())
+            for token in tokens:
+                self._postings.setdefault(token, []).append(pos)
+            self._name_postings.setdefault(normalize(item.get("name", "")), []).append(pos)
+            self._categories.setdefault(normalize(item.get("category", "")), []).append(pos)
+
+        self._vocabulary = sorted(self._postings)
+        self._names = sorted(self._name_postings)
+
+    @staticmethod
+    def _field_values(item: Dict[str, Any]) -> Iterable[str]:
+        for name in SEARCH_FIELDS:
+            value = item.get(name)
+            if isinstance(value, str):
+                yield value
+            elif isinstance(value, list):
+                yield from (v for v in value if isinstance(v, str))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def categories(self) -> List[str]:
+        """Normalized category names, sorted."""
+        return sorted(c for c in self._categories if c)
+
+    def _expand(self, token: str) -> List[str]:
+        """Vocabulary tokens that ``token`` matches: itself, plus longer
+        tokens it is a prefix of."""
+        if len(token) < MIN_PREFIX:
+            return [token] if token in self._postings else []
+        start = bisect_left(self._vocabulary, token)
+        end = bisect_left(self._vocabulary, token + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def _name_prefix(self, query: str) -> List[List[int]]:
+        """Postings of the names that start with ``query``, one list per
+        name; merged, they give the tier in catalog order."""
+        start = bisect_left(self._names, query)
+        end = bisect_left(self._names, query + "\uffff", start)
+        return [self._name_postings[name] for name in self._names[start:end]]
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find the best matching items.
+
+        Args:
+            query: Free-text query (item name, brand or tag)
+            category: Only return items in this category
+            limit: Maximum number of items to return
+
+        Returns:
+            Matching items, best first
+        """
+        norm = normalize(query)
+        if not norm or limit <= 0:
+            return []
+        # The category is one more group every result must belong to
+        filters: List[List[List[int]]] = []
+        if category:
+            in_category = self._categories.get(normalize(category))
+            if not in_category:
+                return []
+            filters.append([in_category])
+
+        ranked: List[int] = []
+        seen: Set[int] = set()
+
+        def take(positions: Iterable[int]) -> bool:
+            for pos in positions:
+                if pos not in seen and all(self._has_any(group, pos) for group in filters):
+                    seen.add(pos)
+                    ranked.append(pos)
+                    if len(ranked) >= limit:
+                        return True
+            return False
+
+        exact = self._exact.get(norm)
+        if exact and take(self._match_all([[exact]] + filters)):
+            return [self.items[pos] for pos in ranked]
+        prefixed = self._name_prefix(norm)
+        if prefixed and take(self._match_all([prefixed] + filters)):
+            return [self.items[pos] for pos in ranked]
+
+        words = list(dict.fromkeys(norm.split()))
+        whole = [[self._postings[word]] if word in self._postings else [] for word in words]
+        if all(whole) and take(self._match_all(whole + filters)):
+            return [self.items[pos] for pos in ranked]
+        expanded = [[self._postings[token] for token in self._expand(word)] for word in words]
+        if all(expanded):
+            take(self._match_all(expanded + filters))
+        return [self.items[pos] for pos in ranked]
+
+    @staticmethod
+    def _has_any(group: List[List[int]], pos: int) -> bool:
+        """Whether any of a group's sorted postings lists holds ``pos``."""
+        for postings in group:
+            i = bisect_left(postings, pos)
+            if i < len(postings) and postings[i] == pos:
+                return True
+        return False
+
+    def _match_all(self, groups: List[List[List[int]]]) -> Iterator[int]:
+        """Ascending positions found in every group of postings lists.
+
+        Walks the merged postings of the smallest group and probes the
+        others with binary search.
+        """
+        groups = sorted(groups, key=lambda group: sum(map(len, group)))
+        last = -1
+        for pos in heapq.merge(*groups[0]):
+            if pos != last and all(self._has_any(group, pos) for group in groups[1:]):
+                yield pos
+            last = pos
+
+
+def day7_items(catalog: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten the day7 catalog's category lists into one item list."""
+    return [item for items in catalog.get("categories", {}).values() for item in items]
+
+
+@dataclass
+class RecipeBundle:
+    """A recipe resolved to catalog items, ready to add to a cart at once."""
+
+    key: str
+    name: str
+    # (item, default quantity) pairs, in recipe order
+    lines: List[Tuple[Dict[str, Any], int]]
+    total: float
+    # Recipe item ids that are not in the catalog
+    missing: List[str] = field(default_factory=list)
+
+
+def _bundle(key: str, recipe: Dict[str, Any], by_id: Dict[str, Dict[str, Any]]) -> RecipeBundle:
+    quantities = recipe.get("quantities") or {}
+    lines = []
+    missing = []
+    for item_id in recipe.get("items", []):
+        item = by_id.get(item_id)
+        if item is None:
+            missing.append(item_id)
+            continue
+        quantity = quantities.get(item_id, 1)
+        lines.append((item, quantity if isinstance(quantity, int) and quantity > 0 else 1))
+    total = sum(item.get("price", 0) * quantity for item, quantity in lines)
+    return RecipeBundle(key, recipe.get("name", key), lines, total, missing)
+
+
+class ProductCatalog:
+    """Constant-time lookups over a product catalog, built once at load.
+
+    Args:
+        products: Catalog products; each needs an ``id``
+        recipes: Recipe key -> recipe with the ``items`` (product ids) it
+            needs and optional ``quantities`` (product id -> default
+            quantity, 1 if not given)
+    """
+
+    def __init__(
+        self,
+        products: Iterable[Dict[str, Any]] = (),
+        recipes: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.products: List[Dict[str, Any]] = list(products)
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        # normalized category -> products, in catalog order
+        self.by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for product in self.products:
+            self.by_id.setdefault(product.get("id"), product)
+            self.by_category.setdefault(normalize(product.get("category", "")), []).append(product)
+
+        self.recipes: Dict[str, Dict[str, Any]] = recipes or {}
+        # recipe key -> its products, in recipe order; unknown ids are dropped
+        self.recipe_items: Dict[str, List[Dict[str, Any]]] = {
+            key: [self.by_id[i] for i in recipe.get("items", []) if i in self.by_id]
+            for key, recipe in self.recipes.items()
+        }
+        # recipe key -> bundle with quantities and total, for one-shot adds
+        self.bundles: Dict[str, RecipeBundle] = {
+            key: _bundle(key, recipe, self.by_id) for key, recipe in self.recipes.items()
+        }
+
+    @classmethod
+    def from_day7(cls, catalog: Dict[str, Any]) -> "ProductCatalog":
+        """Build from the day7 food catalog (categories and recipes)."""
+        return cls(day7_items(catalog), catalog.get("recipes", {}))
+
+    @classmethod
+    def from_day9(cls, catalog: Dict[str, Any]) -> "ProductCatalog":
+        """Build from the day9 product catalog."""
+        return cls(catalog.get("products", []))
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a product by id."""
+        return self.by_id.get(product_id)
+
+    def in_category(self, category: str) -> List[Dict[str, Any]]:
+        """Get the products in a category (matched case- and punctuation-insensitively)."""
+        return self.by_category.get(normalize(category), [])
+
+
+@dataclass
+class FacetResult:
+    """Products matching a set of filters, with facet counts over all of them."""
+
+    products: List[Dict[str, Any]]
+    total: int
+    # facet -> value -> number of matching products, most common first
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Catalog position of each returned product, for paging with ``after``
+    positions: List[int] = field(default_factory=list)
+
+
+def _popcount(mask: int) -> int:
+    return mask.bit_count() if hasattr(mask, "bit_count") else bin(mask).count("1")
+
+
+def _bitmap(positions: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for pos in positions:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bits, "little")
+
+
+class FacetIndex:
+    """Facet filters and counts over a product catalog, built once at load.
+
+    Each facet value keeps a bitmap of the products that have it (bit i is
+    product i), so filters intersect and matches are counted per facet value
+    with a few big-integer operations instead of a pass over the catalog.
+    Prices are kept sorted: a narrow price range is read off the sorted
+    positions found by binary search, and a wide one is cut from cumulative
+    bitmaps saved every ``1/PRICE_CHECKPOINTS`` of the price order.
+
+    Args:
+        products: Catalog products
+        facets: Product fields to filter and count by
+        price_field: Numeric product field for range filters
+    """
+
+    def __init__(
+        self,
+        products: Iterable[Dict[str, Any]],
+        facets: Iterable[str] = FACET_FIELDS,
+        price_field: str = "price",
+    ) -> None:
+        self.products: List[Dict[str, Any]] = list(products)
+        self.facets: Tuple[str, ...] = tuple(facets)
+        self.price_field = price_field
+        size = len(self.products)
+        self._all = (1 << size) - 1
+
+        # facet -> normalized value -> product positions, then bitmap
+        positions: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in self.facets}
+        # facet -> normalized value -> the value as first written in the catalog
+        self._labels: Dict[str, Dict[str, str]] = {facet: {} for facet in self.facets}
+        # facet -> normalized value of each product, for counting small results
+        self._keys: Dict[str, List[Optional[str]]] = {facet: [] for facet in self.facets}
+        # Facets have few distinct values, so normalize each only once
+        normalized: Dict[Any, str] = {}
+        by_price: List[Tuple[float, int]] = []
+        for pos, product in enumerate(self.products):
+            for facet in self.facets:
+                value = product.get(facet)
+                key = normalized.get(value) if isinstance(value, str) else None
+                if key is None:
+                    key = normalize(str(value)) if value is not None else ""
+                    if isinstance(value, str):
+                        normalized[value] = key
+                self._keys[facet].append(key or None)
+                if key:
+                    positions[facet].setdefault(key, []).append(pos)
+                    self._labels[facet].setdefault(key, str(value))
+            price = product.get(price_field)
+            by_price.append((price if isinstance(price, (int, float)) else 0, pos))
+        self._bitmaps: Dict[str, Dict[str, int]] = {
+            facet: {key: _bitmap(found, size) for key, found in values.items()}
+            for facet, values in positions.items()
+        }
+
+        by_price.sort()
+        self._prices: List[float] = [price for price, _ in by_price]
+        self._by_price: List[int] = [pos for _, pos in by_price]
+        # _checkpoints[j] has the bits of _by_price[:j * _step]
+        self._step = max(1, -(-size // PRICE_CHECKPOINTS))
+        bits = bytearray((size + 7) // 8)
+        self._checkpoints: List[int] = [0]
+        for i, pos in enumerate(self._by_price, 1):
+            bits[pos >> 3] |= 1 << (pos & 7)
+            if i % self._step == 0:
+                self._checkpoints.append(int.from_bytes(bits, "little"))
+
+        self._all_counts = self._count(self._all)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def values(self, facet: str) -> List[str]:
+        """Values of a facet as written in the catalog, most common first."""
+        return list(self._all_counts.get(facet, {}))
+
+    def _count(self, mask: int) -> Dict[str, Dict[str, int]]:
+        return {
+            facet: self._ranked(facet, ((key, _popcount(mask & bitmap)) for key, bitmap in values.items()))
+            for facet, values in self._bitmaps.items()
+        }
+
+    def _count_positions(self, positions: List[int]) -> Dict[str, Dict[str, int]]:
+        counts = {}
+        for facet in self.facets:
+            keys = self._keys[facet]
+            found: Dict[str, int] = {}
+            for pos in positions:
+                key = keys[pos]
+                if key is not None:
+                    found[key] = found.get(key, 0) + 1
+            counts[facet] = self._ranked(facet, found.items())
+        return counts
+
+    def _ranked(self, facet: str, counts: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+        """Label the non-zero counts of a facet, most common first."""
+        labels = self._labels[facet]
+        return {labels[key]: n for key, n in sorted(counts, key=lambda pair: (-pair[1], pair[0])) if n}
+
+    def _price_prefix(self, end: int) -> int:
+        """Bitmap of the ``end`` cheapest products."""
+        j = end // self._step
+        mask = self._checkpoints[j]
+        rest = self._by_price[j * self._step:end]
+        return mask | _bitmap(rest, len(self.products)) if rest else mask
+
+    def filter(
+        self,
+        filters: Optional[Dict[str, Optional[str]]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 10,
+        after: int = -1,
+    ) -> FacetResult:
+        """Find the products matching every filter.
+
+        Args:
+            filters: Facet -> wanted value (matched case- and
+                punctuation-insensitively); None values are ignored
+            min_price: Lowest price, inclusive
+            max_price: Highest price, inclusive
+            limit: Maximum number of products to return
+            after: Only return products after this catalog position (the
+                last of ``positions`` from the previous page)
+
+        Returns:
+            Up to ``limit`` matching products in catalog order, the total
+            number of matches and the facet counts over all of them
+        """
+        mask = self._all
+        for facet, value in (filters or {}).items():
+            if value is None or value == "":
+                continue
+            if facet not in self._bitmaps:
+                raise KeyError(f"Unknown facet: {facet}")
+            mask &= self._bitmaps[facet].get(normalize(str(value)), 0)
+
+        if mask and (min_price is not None or max_price is not None):
+            lo = bisect_left(self._prices, min_price) if min_price is not None else 0
+            hi = bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+            if hi - lo <= 2 * self._step:
+                # Few enough to test one by one against the facet bitmap
+                bits = mask.to_bytes((len(self.products) + 7) // 8, "little")
+                matches = sorted(p for p in self._by_price[lo:hi] if bits[p >> 3] >> (p & 7) & 1)
+                start = bisect_right(matches, after)
+                page = matches[start:start + max(limit, 0)]
+                return FacetResult(
+                    [self.products[pos] for pos in page],
+                    len(matches),
+                    self._count_positions(matches) if matches else {},
+                    page,
+                )
+            else:
+                mask &= self._price_prefix(hi) & ~self._price_prefix(lo)
+
+        if not mask:
+            return FacetResult([], 0, {})
+        counts = self._all_counts if mask == self._all else self._count(mask)
+        # Clearing the bits up to ``after`` costs the same on any page
+        rest = mask >> (after + 1) << (after + 1) if after >= 0 else mask
+        page = []
+        while rest and len(page) < limit:
+            low = rest & -rest
+            page.append(low.bit_length() - 1)
+            rest ^= low
+        return FacetResult([self.products[pos] for pos in page], _popcount(mask), counts, page)
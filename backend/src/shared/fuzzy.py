@@ -0,0 +1,300 @@
+"""Typo- and sound-tolerant matching for voice queries.
+
+Speech-to-text often mishears product names ("panir" for paneer, "whole
+weet"). ``FuzzyIndex`` corrects each query word against the vocabulary of
+the indexed names, using character trigrams for spelling slips and a
+Metaphone key for words that sound alike, then ranks the names that
+contain the corrected words.
+"""
+import heapq
+import itertools
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from shared.text import tokenize
+
+# Word candidates kept per query word, and the least similarity they need
+MAX_WORD_CANDIDATES = 8
+MIN_WORD_SCORE = 0.4
+
+# Words that sound alike get this share of the similarity for free
+PHONETIC_WEIGHT = 0.5
+
+# Default per-query time budget; the best results so far are returned
+# when it runs out
+BUDGET_MS = 1.0
+
+# Words in at least 1/BITMAP_RATIO of the names also get a bitmap
+BITMAP_RATIO = 64
+
+_VOWELS = frozenset("AEIOU")
+
+
+def metaphone(word: str) -> str:
+    """Get a Metaphone-style phonetic key for an English word.
+
+    A compact version of Lawrence Philips' original Metaphone: vowels are
+    dropped after the first letter and consonants are mapped to a small
+    set of sounds, so "panir" and "paneer" both become "PNR".
+    """
+    w = "".join(c for c in word.upper() if "A" <= c <= "Z")
+    if not w:
+        return ""
+    if w[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        w = w[1:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+    elif w[:2] == "WH":
+        w = "W" + w[2:]
+
+    key = []
+    n = len(w)
+    for i, c in enumerate(w):
+        prev = w[i - 1] if i else ""
+        nxt = w[i + 1] if i + 1 < n else ""
+        nxt2 = w[i + 2] if i + 2 < n else ""
+        if c == prev and c != "C":
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                key.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                key.append("B")
+        elif c == "C":
+            if nxt == "H" or (nxt == "I" and nxt2 == "A"):
+                key.append("K" if prev == "S" else "X")
+            elif nxt in ("I", "E", "Y"):
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif c == "D":
+            key.append("J" if nxt == "G" and nxt2 in ("E", "I", "Y") else "T")
+        elif c == "G":
+            if nxt == "H" and nxt2 and nxt2 not in _VOWELS:
+                continue
+            if nxt == "N" and (i + 2 == n or w[i + 2:] == "ED"):
+                continue
+            key.append("J" if nxt in ("I", "E", "Y") and prev != "G" else "K")
+        elif c == "H":
+            if prev not in ("C", "S", "P", "T", "G") and nxt in _VOWELS:
+                key.append("H")
+        elif c == "K":
+            if prev != "C":
+                key.append("K")
+        elif c == "P":
+            key.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            key.append("K")
+        elif c == "S":
+            if nxt == "H" or (nxt == "I" and nxt2 in ("O", "A")):
+                key.append("X")
+            else:
+                key.append("S")
+        elif c == "T":
+            if nxt == "I" and nxt2 in ("O", "A"):
+                key.append("X")
+            elif nxt == "H":
+                key.append("0")
+            elif not (nxt == "C" and nxt2 == "H"):
+                key.append("T")
+        elif c == "V":
+            key.append("F")
+        elif c == "W":
+            if nxt in _VOWELS:
+                key.append("W")
+        elif c == "X":
+            key.append("KS")
+        elif c == "Y":
+            if nxt in _VOWELS:
+                key.append("Y")
+        elif c == "Z":
+            key.append("S")
+        else:
+            key.append(c)
+    return "".join(key)
+
+
+def _set_bits(mask: int) -> List[int]:
+    """Positions of the set bits of ``mask``."""
+    digits = bin(mask)
+    top = len(digits) - 3
+    positions = []
+    i = digits.find("1", 2)
+    while i != -1:
+        positions.append(top - (i - 2))
+        i = digits.find("1", i + 1)
+    return positions
+
+
+def trigrams(word: str) -> List[str]:
+    """Get the distinct character trigrams of a word, padded like pg_trgm."""
+    padded = f"  {word} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class FuzzyIndex:
+    """Fuzzy index over short names (catalog items, recipes).
+
+    Args:
+        entries: ``(key, name)`` pairs; ``search`` returns the keys
+    """
+
+    def __init__(self, entries: Iterable[Tuple[Any, str]]) -> None:
+        self.keys: List[Any] = []
+        self._entry_words: List[Tuple[str, ...]] = []
+        # word -> entry positions, shortest name first
+        self._word_entries: Dict[str, List[int]] = {}
+        for key, name in entries:
+            words = tuple(dict.fromkeys(tokenize(name)))
+            if not words:
+                continue
+            pos = len(self.keys)
+            self.keys.append(key)
+            self._entry_words.append(words)
+            for word in words:
+                self._word_entries.setdefault(word, []).append(pos)
+
+        self._sort_keys = [(len(words), pos) for pos, words in enumerate(self._entry_words)]
+        # Bitmaps (bit i = entry i) of words in at least 1/BITMAP_RATIO of
+        # the names; for those a bitmap is no bigger than the postings list
+        self._bitmaps: Dict[str, int] = {}
+        for word, postings in self._word_entries.items():
+            if len(postings) * BITMAP_RATIO >= len(self.keys):
+                bits = bytearray((len(self.keys) + 7) // 8)
+                for pos in postings:
+                    bits[pos >> 3] |= 1 << (pos & 7)
+                self._bitmaps[word] = int.from_bytes(bits, "little")
+            postings.sort(key=self._sort_keys.__getitem__)
+
+        self._vocabulary: List[str] = list(self._word_entries)
+        self._word_trigrams: List[int] = []
+        # trigram or phonetic key -> vocabulary positions
+        self._trigram_words: Dict[str, List[int]] = {}
+        self._phonetic_words: Dict[str, List[int]] = {}
+        for wid, word in enumerate(self._vocabulary):
+            grams = trigrams(word)
+            self._word_trigrams.append(len(grams))
+            for gram in grams:
+                self._trigram_words.setdefault(gram, []).append(wid)
+            phonetic = metaphone(word)
+            if phonetic:
+                self._phonetic_words.setdefault(phonetic, []).append(wid)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def similar_words(self, word: str, limit: int = MAX_WORD_CANDIDATES) -> List[Tuple[str, float]]:
+        """Get vocabulary words that look or sound like ``word``.
+
+        Returns:
+            ``(word, similarity)`` pairs, most similar first; an exact
+            match scores 1.0
+        """
+        if word in self._word_entries:
+            return [(word, 1.0)]
+        grams = trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._trigram_words.get(gram, ()))
+        phonetic = metaphone(word)
+        sounds_alike = set(self._phonetic_words.get(phonetic, ())) if phonetic else set()
+
+        # Only words sharing a trigram are candidates: short phonetic keys
+        # alone collide too often ("xyz" and "sauce" are both "SS")
+        scores = []
+        for wid, count in shared.items():
+            score = 2 * count / (len(grams) + self._word_trigrams[wid])
+            if wid in sounds_alike:
+                score += PHONETIC_WEIGHT * (1 - score)
+            if score >= MIN_WORD_SCORE:
+                scores.append((score, self._vocabulary[wid]))
+        scores.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [(w, score) for score, w in scores[:limit]]
+
+    def search(
+        self, query: str, limit: int = 5, budget_ms: Optional[float] = BUDGET_MS
+    ) -> List[Tuple[Any, float]]:
+        """Find the names closest to a possibly misheard query.
+
+        Each query word is corrected to similar vocabulary words, and a name
+        scores the mean over query words of its best matching word (0 for
+        words it lacks); shorter names win ties.
+
+        Combinations of corrected words are visited best score first, and
+        each combination's names come straight from postings sorted by
+        length, so the search stops after about ``limit`` names instead of
+        scoring every name that shares a word with the query.
+
+        Args:
+            query: Query text
+            limit: Maximum number of results
+            budget_ms: Stop after this long and return the best results so
+                far; None for no limit
+
+        Returns:
+            ``(key, score)`` pairs, best first
+        """
+        deadline = None if budget_ms is None else time.perf_counter() + budget_ms / 1000
+        words = list(dict.fromkeys(tokenize(query)))
+        # Per query word: corrections, best first, then "word missing"
+        options = [self.similar_words(word) + [(None, 0.0)] for word in words]
+        if limit <= 0 or all(len(o) == 1 for o in options):
+            return []
+
+        results: List[Tuple[Any, float]] = []
+        seen = set()
+        start = (0,) * len(options)
+        heap = [(-self._combo_score(options, start), start)]
+        visited = {start}
+        while heap:
+            neg_score, combo = heapq.heappop(heap)
+            if -neg_score <= 0 or len(results) >= limit:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            for i in range(len(combo)):
+                if combo[i] + 1 < len(options[i]):
+                    nxt = combo[:i] + (combo[i] + 1,) + combo[i + 1:]
+                    if nxt not in visited:
+                        visited.add(nxt)
+                        heapq.heappush(heap, (-self._combo_score(options, nxt), nxt))
+
+            components = [options[i][j][0] for i, j in enumerate(combo) if options[i][j][0]]
+            # Names already taken may reappear, so fetch a full ``limit``
+            for pos in self._entries_with_all(components, limit):
+                # A name holding better corrections was found by an
+                # earlier combination
+                if pos not in seen:
+                    seen.add(pos)
+                    results.append((self.keys[pos], round(-neg_score, 3)))
+                    if len(results) >= limit:
+                        break
+        return results
+
+    @staticmethod
+    def _combo_score(options: List[List[Tuple[Optional[str], float]]], combo: Tuple[int, ...]) -> float:
+        return sum(options[i][j][1] for i, j in enumerate(combo)) / len(combo)
+
+    def _entries_with_all(self, words: List[str], need: int) -> Iterable[int]:
+        """Positions of names containing every word, shortest first.
+
+        Frequent words are intersected as bitmaps. Otherwise the rarest
+        word's postings (short, and already in rank order) are filtered by
+        each name's own words, stopping once ``need`` names are found.
+        """
+        if len(words) == 1:
+            return self._word_entries[words[0]]
+        words = sorted(words, key=lambda w: len(self._word_entries[w]))
+        if words[0] in self._bitmaps:
+            mask = self._bitmaps[words[0]]
+            for word in words[1:]:
+                mask &= self._bitmaps[word]
+            return heapq.nsmallest(need, _set_bits(mask), key=self._sort_keys.__getitem__)
+        rest = words[1:]
+        return itertools.islice(
+            (pos for pos in self._word_entries[words[0]] if all(w in self._entry_words[pos] for w in rest)),
+            need,
+        )
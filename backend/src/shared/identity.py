@@ -0,0 +1,48 @@
+"""Who the agent is talking to, for keying per-user records."""
+import json
+import logging
+from typing import Optional
+
+from livekit import rtc
+from livekit.agents import get_job_context
+
+logger = logging.getLogger("agent.identity")
+
+ANONYMOUS_USER = "anonymous"
+
+# Room metadata fields that may carry the user's id, in order of preference
+METADATA_USER_FIELDS = ("user_id", "participant_identity", "user")
+
+
+def get_user_key(room: Optional[rtc.Room] = None) -> str:
+    """Get a stable key for the user in the current room.
+
+    Uses the identity of the first remote participant that is not another
+    agent, then a user id from the room metadata, then ``"anonymous"``.
+
+    Args:
+        room: Room to look in; defaults to the current job's room
+    """
+    if room is None:
+        try:
+            room = get_job_context().room
+        except RuntimeError:
+            # Not running inside a job
+            return ANONYMOUS_USER
+
+    for participant in room.remote_participants.values():
+        if participant.kind != rtc.ParticipantKind.PARTICIPANT_KIND_AGENT and participant.identity:
+            return participant.identity
+
+    if room.metadata:
+        try:
+            metadata = json.loads(room.metadata)
+        except json.JSONDecodeError:
+            logger.warning("Room metadata is not JSON; cannot read a user id from it")
+        else:
+            if isinstance(metadata, dict):
+                for field in METADATA_USER_FIELDS:
+                    if metadata.get(field):
+                        return str(metadata[field])
+
+    return ANONYMOUS_USER
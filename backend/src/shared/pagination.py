@@ -0,0 +1,100 @@
+"""Cursor pagination for the catalog listing tools.
+
+A listing tool returns one page of results, the total and, when there is
+more, an opaque cursor the LLM passes back to get the next page. The
+cursor carries everything needed to resume (the query or filters and where
+the page ended) plus the version of the catalog it was made from, so a
+cursor from before a reload is refused instead of silently skipping or
+repeating items.
+
+Tools whose results are not already in a fixed order compute the full
+ordering once and keep it in ``OrderingCache``; a later page is then a
+slice of it, costing the same as the first.
+"""
+import base64
+import binascii
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# Most results a listing tool orders for one query
+MAX_ORDERING = 1000
+
+
+class CursorError(ValueError):
+    """A cursor is malformed or from another catalog version."""
+
+
+class StaleCursorError(CursorError):
+    """A well-formed cursor made from another catalog version."""
+
+
+def encode_cursor(version: str, **fields: Any) -> str:
+    """Pack a version and resume fields into a short URL-safe string."""
+    payload = json.dumps({"v": version, **fields}, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> Dict[str, Any]:
+    """Unpack a cursor made by ``encode_cursor``.
+
+    Raises:
+        StaleCursorError: if the cursor was made from another version of
+            the data
+        CursorError: if the cursor cannot be read
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.strip() + "=" * (-len(cursor.strip()) % 4))
+        fields = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise CursorError(f"Invalid cursor: {e}") from e
+    if not isinstance(fields, dict):
+        raise CursorError("Invalid cursor")
+    if fields.pop("v", None) != version:
+        raise StaleCursorError("The cursor is from an older version of the catalog")
+    return fields
+
+
+class OrderingCache:
+    """Process-wide LRU of computed result orderings.
+
+    Keys should include the data version, so orderings from before a reload
+    are never served and age out on their own.
+    """
+
+    def __init__(self, max_entries: int = 128) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the ordering for ``key``, computing it on a miss."""
+        with self._lock:
+            ordering = self._entries.get(key)
+            if ordering is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ordering
+            self.misses += 1
+
+        ordering = compute()
+        with self._lock:
+            self._entries[key] = ordering
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return ordering
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+def describe_page(start: int, shown: int, total: int, capped: bool = False) -> str:
+    """Say which results a page holds, e.g. "Showing 6-10 of 42"."""
+    of = f"{total}+" if capped else str(total)
+    if not shown:
+        return f"No more results (all {of} shown)"
+    return f"Showing {start + 1}-{start + shown} of {of}"
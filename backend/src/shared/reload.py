@@ -0,0 +1,191 @@
+"""Hot reload of the static data files.
+
+Agents used to parse their catalog or content once at import, so changing a
+price meant restarting every worker and reloading the VAD and turn-detector
+models. ``watch()`` returns a ``Reloadable`` whose ``current`` snapshot is
+swapped whenever the file changes: a background thread (``start()``, called
+from the worker's prewarm) polls each watched file's mtime, rebuilds the
+data and its indexes off the event loop and replaces the reference in one
+assignment.
+
+Tools read ``current`` once per call and use that snapshot throughout, so a
+call that is in flight during a swap never mixes old and new data. A file
+that cannot be parsed (e.g. half-written by an editor) is logged and the
+previous snapshot is kept.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from shared import snapshots
+from shared.snapshots import Snapshot
+from shared.tools import file_ops
+
+logger = logging.getLogger("agent.reload")
+
+# Seconds between checks of the watched files; 0 disables the watcher
+POLL_INTERVAL = float(os.getenv("DATA_RELOAD_INTERVAL", "2"))
+
+# Stands in for the data of a file that failed to load
+_FAILED = object()
+
+
+def _signature(filename: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(file_ops.DATA_DIR / filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class Reloadable:
+    """A data file's latest snapshot.
+
+    Args:
+        filename: Data file name in the shared data directory
+        default: Data to use when the file cannot be read at startup
+        fallback_indexes: Indexes to use when the file has none of that
+            name (e.g. it is missing or failed validation)
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        default: Any = None,
+        fallback_indexes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.filename = filename
+        self.default = default
+        self.fallback_indexes: Dict[str, Any] = dict(fallback_indexes or {})
+        self.reloads = 0
+        self._listeners: List[Callable[[Snapshot], None]] = []
+        self._lock = threading.Lock()
+        self._signature = _signature(filename)
+        snapshot = self._load()
+        self._current = snapshot if snapshot is not None else self._with_fallbacks(Snapshot(default, {}))
+
+    @property
+    def current(self) -> Snapshot:
+        """The latest snapshot; read it once per tool call."""
+        return self._current
+
+    def _with_fallbacks(self, snapshot: Snapshot) -> Snapshot:
+        if all(name in snapshot.indexes for name in self.fallback_indexes):
+            return snapshot
+        return Snapshot(snapshot.data, {**self.fallback_indexes, **snapshot.indexes}, snapshot.version)
+
+    def _load(self) -> Optional[Snapshot]:
+        """Load the file and its indexes, or None if it cannot be read."""
+        snapshot = snapshots.load(self.filename, default=_FAILED)
+        if snapshot.data is _FAILED:
+            return None
+        return self._with_fallbacks(snapshot)
+
+    def set_defaults(self, default: Any = None, fallback_indexes: Optional[Dict[str, Any]] = None) -> None:
+        """Fill in defaults a later ``watch()`` of the same file asked for."""
+        with self._lock:
+            if default is not None and self.default is None:
+                self.default = default
+                if self._current.data is None:
+                    self._current = Snapshot(default, self._current.indexes)
+            for name, index in (fallback_indexes or {}).items():
+                self.fallback_indexes.setdefault(name, index)
+            self._current = self._with_fallbacks(self._current)
+
+    def subscribe(self, listener: Callable[[Snapshot], None]) -> None:
+        """Call ``listener(snapshot)`` after each swap, on the watcher thread."""
+        self._listeners.append(listener)
+
+    def check(self) -> bool:
+        """Reload the file if it changed since the last check.
+
+        Returns:
+            Whether a new snapshot was swapped in
+        """
+        signature = _signature(self.filename)
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+
+        start = time.perf_counter()
+        snapshot = self._load()
+        if snapshot is None:
+            logger.warning(f"Keeping the previous {self.filename}: the changed file could not be loaded")
+            return False
+        with self._lock:
+            self._current = snapshot
+            self.reloads += 1
+        logger.info(f"Reloaded {self.filename} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Error handling the reload of {self.filename}: {e}")
+        return True
+
+
+_watched: Dict[str, Reloadable] = {}
+_watched_lock = threading.Lock()
+_watcher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def watch(
+    filename: str,
+    default: Any = None,
+    fallback_indexes: Optional[Dict[str, Any]] = None,
+) -> Reloadable:
+    """Get the reloadable snapshot of a data file, loading it on first use.
+
+    Every caller watching the same file shares one ``Reloadable``.
+    """
+    with _watched_lock:
+        reloadable = _watched.get(filename)
+        if reloadable is None:
+            reloadable = _watched[filename] = Reloadable(filename, default, fallback_indexes)
+            return reloadable
+    reloadable.set_defaults(default, fallback_indexes)
+    return reloadable
+
+
+def check_all() -> int:
+    """Check every watched file once; returns how many were reloaded."""
+    with _watched_lock:
+        watched = list(_watched.values())
+    reloaded = 0
+    for reloadable in watched:
+        try:
+            reloaded += reloadable.check()
+        except Exception as e:
+            logger.error(f"Error reloading {reloadable.filename}: {e}")
+    return reloaded
+
+
+def _run(interval: float) -> None:
+    while not _stop.wait(interval):
+        check_all()
+
+
+def start(interval: float = POLL_INTERVAL) -> None:
+    """Start the background watcher thread (once per process)."""
+    global _watcher
+    if interval <= 0:
+        return
+    with _watched_lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        _stop.clear()
+        _watcher = threading.Thread(target=_run, args=(interval,), name="data-reload", daemon=True)
+        _watcher.start()
+
+
+def stop() -> None:
+    """Stop the background watcher thread."""
+    global _watcher
+    _stop.set()
+    if _watcher is not None:
+        _watcher.join()
+        _watcher = None
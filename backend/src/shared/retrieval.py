@@ -0,0 +1,153 @@
+"""Ranked passage retrieval for question answering tools.
+
+``BM25Index`` is built once when a FAQ is loaded (or prebuilt into its
+snapshot) and ranks passages against a spoken question with Okapi BM25:
+rare words count for more than common ones, repeated words saturate, and
+long passages are not favoured just for being long. Only the postings of
+the query's own words are read, so a search costs the number of passages
+sharing a word with the query rather than the size of the FAQ.
+"""
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+from shared.text import tokenize
+
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Questions are repeated this many times in a FAQ passage, so words in the
+# question weigh more than the same words in the answer
+QUESTION_WEIGHT = 2
+
+# Results below this confidence are not worth reading out
+MIN_CONFIDENCE = 0.25
+
+# Words too common in questions to say anything about the topic
+STOPWORDS = frozenset("""
+a about an and any are as at be been but by can could did do does for from
+had has have how i if in into is it its me my of on or our so than that the
+their them then there these they this to us was we were what when where
+which who whom why will with would you your
+""".split())
+
+
+# Suffixes stripped by ``_stem``, longest first, and what replaces them
+_SUFFIXES = (
+    ("izations", ""), ("ization", ""), ("ations", ""), ("ation", ""),
+    ("ings", ""), ("ing", ""), ("ates", ""), ("ated", ""), ("ate", ""),
+    ("ions", ""), ("ion", ""), ("ies", "y"), ("es", ""), ("ed", ""),
+    ("ly", ""), ("s", ""), ("e", ""),
+)
+_MIN_STEM = 3
+
+
+def _stem(word: str) -> str:
+    """Strip one common English suffix, so "pricing" and "price" (or
+    "integrate" and "integration") index as the same term."""
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def analyze(text: str) -> List[str]:
+    """Split text into the stemmed, non-stopword terms that are indexed.
+
+    >>> analyze("What are your pricing plans?")
+    ['pric', 'plan']
+    """
+    return [_stem(word) for word in tokenize(text) if word not in STOPWORDS]
+
+
+class BM25Index:
+    """BM25 index over short text passages.
+
+    Args:
+        passages: ``(key, text)`` pairs; ``search`` returns the keys
+        k1: Term-frequency saturation
+        b: Length normalization, from 0 (none) to 1 (full)
+    """
+
+    def __init__(self, passages: Iterable[Tuple[Any, str]], k1: float = K1, b: float = B) -> None:
+        self.keys: List[Any] = []
+        self.k1 = k1
+        self.b = b
+        # term -> (passage position, term frequency) pairs
+        frequencies: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for key, text in passages:
+            terms = analyze(text)
+            pos = len(self.keys)
+            self.keys.append(key)
+            lengths.append(len(terms))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                frequencies.setdefault(term, []).append((pos, tf))
+
+        n = len(self.keys)
+        average = sum(lengths) / n if n else 0
+        # Per passage: the length part of the BM25 denominator
+        norms = [k1 * (1 - b + b * length / average) if average else k1 for length in lengths]
+        # Lucene's non-negative idf
+        self._idf: Dict[str, float] = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in frequencies.items()
+        }
+        # term -> (passage position, the term's share of its BM25 score);
+        # nothing about a passage depends on the query, so a search only adds
+        self._postings: Dict[str, List[Tuple[int, float]]] = {
+            term: [(pos, idf * tf * (k1 + 1) / (tf + norms[pos])) for pos, tf in frequencies[term]]
+            for term, idf in self._idf.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str, limit: int = 3, min_confidence: float = 0.0) -> List[Tuple[Any, float]]:
+        """Find the passages that best answer a query.
+
+        A passage's confidence is its BM25 score divided by the most any
+        passage could score for the query (every query word present and
+        repeated often), so it falls between 0 and 1 whatever the wording.
+        Query words missing from every passage count against it.
+
+        Args:
+            query: Question or topic
+            limit: Maximum number of results
+            min_confidence: Leave out results below this confidence
+
+        Returns:
+            ``(key, confidence)`` pairs, best first; ties keep passage order
+        """
+        terms = analyze(query)
+        if not terms or limit <= 0:
+            return []
+        # Words the FAQ has never seen get the idf of a word in no passage
+        unseen = math.log(1 + (len(self.keys) + 0.5) / 0.5)
+        best = sum(self._idf.get(term, unseen) for term in terms) * (self.k1 + 1)
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            for pos, weight in self._postings.get(term, ()):
+                scores[pos] = scores.get(pos, 0.0) + weight
+
+        top = heapq.nsmallest(limit, scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [
+            (self.keys[pos], round(score / best, 3))
+            for pos, score in top
+            if score / best >= min_confidence
+        ]
+
+
+def faq_index(faq_data: Dict[str, Any]) -> BM25Index:
+    """Build the index of a company FAQ; keys are positions in ``faq``."""
+    return BM25Index(
+        (i, " ".join([item.get("question", "")] * QUESTION_WEIGHT + [item.get("answer", "")]))
+        for i, item in enumerate(faq_data.get("faq", []))
+    )
@@ -0,0 +1,418 @@
+"""Per-session state that is bounded and cleaned up.
+
+Agents keep conversation state (a cart, a game world, improv rounds) per
+room. It is created in the job's entrypoint and handed to tools as the
+``AgentSession`` userdata, and registered in a ``SessionStore`` so a
+worker process serving many rooms over its lifetime does not keep the
+state of finished ones. The store drops a session's state when:
+
+- the job's shutdown callback calls ``release()`` for its room,
+- the session has not been used (looked up or saved) for longer than the
+  TTL, a safety net for jobs that never shut down cleanly, or
+- the store is full and the session is the least recently used.
+
+Expired sessions are dropped on the next access to the store, oldest
+first, so there is no timer thread. ``stats()`` reports gauges of live
+sessions and an estimate of the bytes they hold.
+
+So that a room can resume after a worker restart or on another node, the
+entrypoint calls ``save()`` after each batch of tool calls and restores
+with ``aget()``; see ``shared.state_backend`` for where snapshots go.
+
+A store given an ``apply`` function can instead log each change: tools
+call ``record()`` with a small JSON delta, which is appended to the
+session's delta log, so a write costs as much as the change rather than
+the whole state. Every ``snapshot_every`` changes (and on release) the
+store saves a snapshot, which compacts the log. Restoring loads the
+snapshot and replays the changes logged after it.
+"""
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from shared.state_backend import StateBackend, get_backend, state_key
+
+logger = logging.getLogger("agent.sessions")
+
+# Seconds a session may sit idle before its state is dropped
+SESSION_TTL = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+
+# Sessions kept per store before the least recently used is dropped
+MAX_SESSIONS = int(os.getenv("SESSION_MAX_ENTRIES", "1000"))
+
+# Changes logged per session before a snapshot compacts its delta log
+SNAPSHOT_EVERY = int(os.getenv("SESSION_SNAPSHOT_EVERY", "50"))
+
+
+def deep_sizeof(value: Any) -> int:
+    """Estimate the bytes held by parsed-JSON-like data."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(deep_sizeof(v) for v in value)
+    elif hasattr(value, "__dict__"):
+        size += deep_sizeof(vars(value))
+    return size
+
+
+class SessionStore:
+    """Session id -> state, with idle TTL and LRU eviction.
+
+    Args:
+        name: Store name, for logs and ``all_stats()``
+        factory: Makes the state of a new session for ``get_or_create``
+        ttl: Seconds a session may be idle; 0 disables expiry
+        max_entries: Sessions kept before evicting the least recently used
+        clock: Monotonic time source, replaceable in tests
+        backend: Where snapshots are saved; defaults to the process-wide
+            backend chosen by ``SESSION_STATE_BACKEND``
+        durable: The state must survive a worker restart, so the default
+            backend is the file backend when ``memory`` is configured
+        decode: Rebuilds a state from its parsed JSON snapshot; defaults
+            to ``factory(**data)`` for a dataclass factory
+        apply: ``apply(state, change)`` applies a change passed to
+            ``record()`` to a state; enables the delta log
+        snapshot_every: Changes logged before a snapshot compacts the log
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Optional[Callable[[], Any]] = None,
+        ttl: float = SESSION_TTL,
+        max_entries: int = MAX_SESSIONS,
+        clock: Callable[[], float] = time.monotonic,
+        backend: Optional[StateBackend] = None,
+        durable: bool = False,
+        decode: Optional[Callable[[Any], Any]] = None,
+        apply: Optional[Callable[[Any, Any], None]] = None,
+        snapshot_every: int = SNAPSHOT_EVERY,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.created = 0
+        self.released = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saves = 0
+        self.restores = 0
+        self.changes = 0
+        self.snapshot_every = snapshot_every
+        self.durable = durable
+        self._backend = backend
+        self._decode = decode
+        self._apply = apply
+        self._clock = clock
+        # session id -> (last access, state), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # session id -> [sequence number of its last change, changes logged
+        # since its last snapshot]; only for stores with a delta log
+        self._logs: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        _stores.append(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session: str) -> bool:
+        return session in self._entries
+
+    def _expire(self, now: float) -> None:
+        """Drop idle sessions; call with the lock held."""
+        if self.ttl <= 0:
+            return
+        while self._entries:
+            session, (last, _) = next(iter(self._entries.items()))
+            if now - last <= self.ttl:
+                break
+            del self._entries[session]
+            self._logs.pop(session, None)
+            self.expired += 1
+            logger.info(f"Dropped {self.name} state of idle session {session}")
+
+    def _touch(self, session: str, now: float) -> Optional[Any]:
+        """Mark a session as used and get its state; call with the lock held."""
+        entry = self._entries.get(session)
+        if entry is None:
+            return None
+        self._entries[session] = (now, entry[1])
+        self._entries.move_to_end(session)
+        return entry[1]
+
+    def get(self, session: str) -> Optional[Any]:
+        """Get a session's state, or None; marks the session as used."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            return self._touch(session, now)
+
+    def setdefault(self, session: str, state: Any) -> Any:
+        """Get a session's state, storing ``state`` first if it has none."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(session)
+            if entry is not None:
+                state = entry[1]
+            else:
+                self.created += 1
+            self._entries[session] = (now, state)
+            self._entries.move_to_end(session)
+            self._evict()
+            return state
+
+    def get_or_create(self, session: str) -> Any:
+        """Get a session's state, making it with the factory if it has none."""
+        state = self.get(session)
+        if state is not None:
+            return state
+        if self.factory is None:
+            raise ValueError(f"SessionStore {self.name} has no factory")
+        return self.setdefault(session, self.factory())
+
+    def set(self, session: str, state: Any) -> None:
+        """Replace a session's state."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if session not in self._entries:
+                self.created += 1
+            self._entries[session] = (now, state)
+            self._entries.move_to_end(session)
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            session, _ = self._entries.popitem(last=False)
+            self._logs.pop(session, None)
+            self.evictions += 1
+            logger.warning(f"Evicted {self.name} state of session {session}: more than {self.max_entries} sessions")
+
+    def release(self, session: str) -> Optional[Any]:
+        """Save and drop a session's state when its job ends; returns the state."""
+        self.save(session)
+        with self._lock:
+            entry = self._entries.pop(session, None)
+            self._logs.pop(session, None)
+            if entry is not None:
+                self.released += 1
+        return entry[1] if entry is not None else None
+
+    @property
+    def backend(self) -> StateBackend:
+        if self._backend is None:
+            self._backend = get_backend(durable=self.durable)
+        return self._backend
+
+    def save(self, session: str, state: Any = None) -> None:
+        """Snapshot a session's state to the backend.
+
+        Serializing happens here, on the caller's thread, so the snapshot is
+        consistent; the backend writes it in the background. With a delta
+        log, the snapshot replaces the changes logged so far.
+
+        Args:
+            session: Session id
+            state: The session's state; defaults to the state held by the
+                store. Either way the session is marked as used.
+        """
+        if state is not None:
+            self.set(session, state)
+        else:
+            now = self._clock()
+            with self._lock:
+                self._expire(now)
+                state = self._touch(session, now)
+            if state is None:
+                return
+        key = state_key(self.name, session)
+        if self._apply is None:
+            snapshot = self._serialize(session, state)
+            if snapshot is None:
+                return
+            self.backend.put(key, snapshot)
+        else:
+            # The sequence number, the snapshot and truncating the log happen
+            # under one lock, so a change recorded meanwhile lands after the
+            # truncation instead of being dropped with it
+            with self._lock:
+                log = self._logs.setdefault(session, [0, 0])
+                snapshot = self._serialize(session, state, log[0])
+                if snapshot is None:
+                    return
+                log[1] = 0
+                self.backend.put(key, snapshot)
+                self.backend.delete(_log_key(key))
+        self.saves += 1
+
+    def _serialize(self, session: str, state: Any, seq: Optional[int] = None) -> Optional[bytes]:
+        data = dataclasses.asdict(state) if dataclasses.is_dataclass(state) else state
+        if seq is not None:
+            data = {"seq": seq, "state": data}
+        try:
+            return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.error(f"Could not snapshot {self.name} state of session {session}: {e}")
+            return None
+
+    def record(self, session: str, change: Any) -> None:
+        """Append a change, already applied to the live state, to the
+        session's delta log; saves a snapshot every ``snapshot_every``.
+
+        Args:
+            session: Session id
+            change: JSON-serializable change that ``apply`` can replay
+        """
+        if self._apply is None:
+            raise ValueError(f"SessionStore {self.name} has no delta log")
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            # Logging a change is a use: a game being played must not expire
+            if self._touch(session, now) is None:
+                logger.warning(f"Not logging a change to {self.name} session {session}: it is not live")
+                return
+            log = self._logs.setdefault(session, [0, 0])
+            try:
+                entry = json.dumps([log[0] + 1, change], separators=(",", ":"), default=str).encode("utf-8")
+            except (TypeError, ValueError) as e:
+                logger.error(f"Could not log a change to {self.name} session {session}: {e}")
+                return
+            log[0] += 1
+            log[1] += 1
+            compact = log[1] >= self.snapshot_every
+            # Appended under the lock so it is ordered against save()'s
+            # truncation; the backend only queues it
+            self.backend.append(_log_key(state_key(self.name, session)), entry)
+            self.changes += 1
+        if compact:
+            self.save(session)
+
+    def restore(self, session: str) -> Optional[Any]:
+        """Load a session's last snapshot from the backend (blocking).
+
+        Returns:
+            The restored state, now live in this store, or None if there is
+            no snapshot (or it cannot be read)
+        """
+        key = state_key(self.name, session)
+        try:
+            snapshot = self.backend.get(key)
+            if snapshot is None:
+                return None
+            data = json.loads(snapshot)
+            if self._apply is None:
+                state = self._decode_state(data)
+            else:
+                state = self._decode_state(data["state"])
+                seq, replayed = self._replay(state, data["seq"], self.backend.get_list(_log_key(key)))
+        except Exception as e:
+            logger.error(f"Could not restore {self.name} state of session {session}: {e}")
+            return None
+        self.restores += 1
+        if self._apply is None:
+            logger.info(f"Restored {self.name} state of session {session}")
+            return self.setdefault(session, state)
+        logger.info(f"Restored {self.name} state of session {session} and replayed {replayed} changes")
+        with self._lock:
+            live = session in self._entries
+        state = self.setdefault(session, state)
+        if not live:
+            with self._lock:
+                self._logs[session] = [seq, replayed]
+        return state
+
+    def _replay(self, state: Any, seq: int, entries: List[bytes]) -> Tuple[int, int]:
+        """Apply logged changes made after the snapshot at ``seq``.
+
+        Returns:
+            The sequence number of the last change and how many were applied
+        """
+        replayed = 0
+        for entry in entries:
+            change_seq, change = json.loads(entry)
+            # Older changes were compacted into the snapshot; a batch that is
+            # retried after a dropped connection may have logged one twice
+            if change_seq <= seq:
+                continue
+            self._apply(state, change)
+            seq = change_seq
+            replayed += 1
+        return seq, replayed
+
+    def _decode_state(self, data: Any) -> Any:
+        if self._decode is not None:
+            return self._decode(data)
+        if dataclasses.is_dataclass(self.factory):
+            return self.factory(**data)
+        return data
+
+    async def aget(self, session: str) -> Optional[Any]:
+        """Get a session's state, restoring its snapshot if it is not live."""
+        state = self.get(session)
+        if state is not None:
+            return state
+        return await asyncio.get_running_loop().run_in_executor(None, self.restore, session)
+
+    async def aget_or_create(self, session: str) -> Any:
+        """Get a session's live or saved state, or make it with the factory."""
+        state = await self.aget(session)
+        if state is not None:
+            return state
+        return self.get_or_create(session)
+
+    def sessions(self) -> List[str]:
+        """Live session ids, least recently used first."""
+        with self._lock:
+            self._expire(self._clock())
+            return list(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Gauges (live sessions, estimated bytes held) and counters."""
+        with self._lock:
+            self._expire(self._clock())
+            states = [state for _, state in self._entries.values()]
+            counters = {
+                "sessions": len(states),
+                "created": self.created,
+                "released": self.released,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "saves": self.saves,
+                "restores": self.restores,
+                "changes": self.changes,
+            }
+        # Sized outside the lock; sessions mutate their own state anyway
+        counters["bytes"] = sum(deep_sizeof(state) for state in states)
+        return counters
+
+
+def _log_key(key: str) -> str:
+    return f"{key}:log"
+
+
+_stores: List[SessionStore] = []
+
+
+def all_stats() -> Dict[str, Dict[str, int]]:
+    """Stats of every session store in this process, by name."""
+    return {store.name: store.stats() for store in list(_stores)}
+
+
+def release_all(session: str) -> None:
+    """Release a session from every store and log ``all_stats()``; for job
+    shutdown callbacks."""
+    for store in list(_stores):
+        if store.release(session) is not None:
+            logger.info(f"Released {store.name} state of session {session}; {len(store)} live sessions left")
+    logger.info(f"Session store stats: {all_stats()}")
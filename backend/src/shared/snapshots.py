@@ -0,0 +1,292 @@
+"""Precompiled snapshots of the static data files.
+
+The tutor content, company FAQ and catalogs are JSON files that every job
+process used to parse at import. ``python -m shared.snapshots build`` (run
+in the Dockerfile) validates each file against a small schema and writes a
+pickled snapshot of the parsed data plus its lookup indexes to
+``data/snapshots/``. Loaders read the snapshot and fall back to the JSON
+file when it is missing, stale or from another snapshot version.
+
+A snapshot starts with a header: ``MAGIC``, the format version and the
+sha256 of the JSON source it was built from.
+"""
+import argparse
+import gc
+import hashlib
+import json
+import logging
+import os
+import pickle
+import struct
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from shared.catalog import CatalogIndex, FacetIndex, ProductCatalog, day7_items
+from shared.fuzzy import FuzzyIndex
+from shared.retrieval import faq_index
+from shared.tools import file_ops
+
+logger = logging.getLogger("agent.snapshots")
+
+MAGIC = b"VAGSNAP"
+# Bump when the snapshot layout or the prebuilt indexes change
+FORMAT_VERSION = 7
+_HEADER = struct.Struct(f"{len(MAGIC)}sH32s")
+
+SNAPSHOT_DIR = "snapshots"
+
+# Schemas use a small notation: a type (or tuple of types) is an isinstance
+# check, ``[schema]`` is a list of items, ``{str: schema}`` is a mapping with
+# arbitrary keys, and any other dict lists required fields.
+_NUMBER = (int, float)
+_DAY7_ITEM = {"id": str, "name": str, "category": str, "price": _NUMBER}
+_DAY9_PRODUCT = {"id": str, "name": str, "price": _NUMBER, "category": str}
+
+SCHEMAS: Dict[str, Any] = {
+    "day4_tutor_content.json": [{"id": str, "title": str, "summary": str, "sample_question": str}],
+    "day5_company_faq.json": {"company_name": str, "faq": [{"question": str, "answer": str}]},
+    "day7_catalog.json": {
+        "categories": {str: [_DAY7_ITEM]},
+        "recipes": {str: {"name": str, "items": [str]}},
+    },
+    "day9_catalog.json": {"products": [_DAY9_PRODUCT]},
+}
+
+
+def _by_id(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {record["id"]: record for record in records}
+
+
+# Lookup indexes stored alongside the data, built from the parsed file
+INDEX_BUILDERS: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "day4_tutor_content.json": {"concepts_by_id": _by_id},
+    "day5_company_faq.json": {"search": faq_index},
+    "day7_catalog.json": {
+        "lookup": ProductCatalog.from_day7,
+        "search": lambda catalog: CatalogIndex(day7_items(catalog)),
+        "fuzzy_items": lambda catalog: FuzzyIndex(
+            (item.get("id"), item.get("name", "")) for item in day7_items(catalog)
+        ),
+        "fuzzy_recipes": lambda catalog: FuzzyIndex(
+            (key, f"{recipe.get('name', '')} {key}") for key, recipe in catalog.get("recipes", {}).items()
+        ),
+    },
+    "day9_catalog.json": {
+        "lookup": ProductCatalog.from_day9,
+        "facets": lambda catalog: FacetIndex(catalog.get("products", [])),
+    },
+}
+
+
+class SchemaError(ValueError):
+    """A data file does not match its schema."""
+
+
+@dataclass
+class Snapshot:
+    """Parsed data file and the lookup indexes built from it."""
+
+    data: Any
+    indexes: Dict[str, Any] = field(default_factory=dict)
+    # Short hash of the source file; empty for default data
+    version: str = ""
+
+
+def validate(value: Any, schema: Any, path: str = "$") -> None:
+    """Check ``value`` against a schema.
+
+    Raises:
+        SchemaError: naming the first path that does not match
+    """
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            raise SchemaError(f"{path}: expected a list, got {type(value).__name__}")
+        for i, item in enumerate(value):
+            validate(item, schema[0], f"{path}[{i}]")
+    elif isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise SchemaError(f"{path}: expected an object, got {type(value).__name__}")
+        if str in schema:
+            for key, item in value.items():
+                validate(item, schema[str], f"{path}.{key}")
+        else:
+            for key, item_schema in schema.items():
+                if key not in value:
+                    raise SchemaError(f"{path}: missing field '{key}'")
+                validate(value[key], item_schema, f"{path}.{key}")
+    elif not isinstance(value, schema) or (isinstance(value, bool) and bool not in _as_tuple(schema)):
+        raise SchemaError(f"{path}: expected {_type_names(schema)}, got {type(value).__name__}")
+
+
+def _as_tuple(schema: Any) -> tuple:
+    return schema if isinstance(schema, tuple) else (schema,)
+
+
+def _type_names(schema: Any) -> str:
+    return " or ".join(t.__name__ for t in _as_tuple(schema))
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Load static data without the cyclic garbage collector.
+
+    Loading a large catalog allocates millions of containers, and the
+    collections they trigger cost more than the load itself. The data has
+    no reference cycles, so it is freed by reference counting; the worker's
+    prewarm freezes what was loaded at startup out of later collections.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def snapshot_path(filename: str) -> Path:
+    """Get the snapshot file for a data file."""
+    return file_ops.DATA_DIR / SNAPSHOT_DIR / f"{Path(filename).stem}.snapshot"
+
+
+def build_indexes(filename: str, data: Any, strict: bool = True) -> Dict[str, Any]:
+    """Build the lookup indexes registered for a data file.
+
+    Args:
+        strict: Raise if an index cannot be built; otherwise log it and
+            leave that index out
+    """
+    indexes = {}
+    for name, build in INDEX_BUILDERS.get(filename, {}).items():
+        try:
+            indexes[name] = build(data)
+        except Exception as e:
+            if strict:
+                raise
+            logger.error(f"Could not build the {name} index of {filename}: {e}")
+    return indexes
+
+
+def build_snapshot(filename: str) -> Path:
+    """Validate a data file and write its snapshot.
+
+    Raises:
+        SchemaError: if the file does not match its schema
+    """
+    source = (file_ops.DATA_DIR / filename).read_bytes()
+    data = json.loads(source)
+    if filename in SCHEMAS:
+        validate(data, SCHEMAS[filename])
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, hashlib.sha256(source).digest())
+    # A plain tuple, so the pickle does not refer to this module by the
+    # name "__main__" when built from the command line
+    payload = pickle.dumps((data, build_indexes(filename, data)), protocol=pickle.HIGHEST_PROTOCOL)
+
+    path = snapshot_path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def _version(source: bytes) -> str:
+    return hashlib.sha256(source).hexdigest()[:12]
+
+
+def _read_snapshot(filename: str, source: bytes) -> Optional[Snapshot]:
+    path = snapshot_path(filename)
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, digest = _HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                logger.info(f"Ignoring snapshot {path.name}: format version {version}")
+                return None
+            if digest != hashlib.sha256(source).digest():
+                logger.info(f"Ignoring snapshot {path.name}: {filename} changed since it was built")
+                return None
+            with _gc_paused():
+                data, indexes = pickle.load(f)
+            return Snapshot(data, indexes, _version(source))
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ValueError, struct.error) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path.name}: {e}")
+        return None
+
+
+def load(filename: str, default: Any = None) -> Snapshot:
+    """Load a data file, preferring its snapshot.
+
+    Falls back to parsing the JSON file (and building the indexes) when the
+    snapshot is missing or stale.
+
+    Args:
+        filename: Data file name in the shared data directory
+        default: Data to use when the file cannot be read
+
+    Returns:
+        The data and its lookup indexes
+    """
+    try:
+        source = (file_ops.DATA_DIR / filename).read_bytes()
+    except OSError as e:
+        logger.error(f"Error loading {filename}: {e}")
+        return Snapshot(default, {})
+
+    snapshot = _read_snapshot(filename, source)
+    if snapshot is not None:
+        return snapshot
+
+    try:
+        with _gc_paused():
+            data = json.loads(source)
+    except json.JSONDecodeError as e:
+        logger.error(f"Error loading {filename}: {e}")
+        return Snapshot(default, {})
+    if filename in SCHEMAS:
+        try:
+            validate(data, SCHEMAS[filename])
+        except SchemaError as e:
+            logger.warning(f"{filename} does not match its schema: {e}")
+            return Snapshot(data, build_indexes(filename, data, strict=False), _version(source))
+    return Snapshot(data, build_indexes(filename, data), _version(source))
+
+
+def main(argv: List[str] = None) -> None:
+    """Command line entry point for building snapshots."""
+    parser = argparse.ArgumentParser(prog="python -m shared.snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="validate the static data files and write their snapshots")
+    build.add_argument("filenames", nargs="*", help="data files (default: all with a schema)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        failed = False
+        for filename in args.filenames or list(SCHEMAS):
+            try:
+                path = build_snapshot(filename)
+            except (OSError, ValueError) as e:
+                print(f"{filename}: {e}")
+                failed = True
+            else:
+                print(f"{filename}: wrote {path.name} ({path.stat().st_size} bytes)")
+        if failed:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
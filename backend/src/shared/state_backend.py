@@ -0,0 +1,592 @@
+"""Where session state snapshots live between jobs.
+
+``SessionStore`` keeps each live session's state in process memory, so
+tools never wait on the network. After each batch of tool calls the store
+serializes the session to a snapshot and hands it to a ``StateBackend``;
+when a room's job starts (e.g. after a worker restart, or on another node)
+its last snapshot is restored. Three backends are available:
+
+- ``memory`` (default): snapshots stay in this process, so a room that
+  reconnects to the same worker resumes, but nothing survives a restart.
+- ``file``: snapshots are files in the data directory, so a room resumes
+  after a restart of this machine's workers.
+- ``redis``: snapshots are written to a Redis-compatible server, so any
+  node can resume a room.
+
+Every backend drops a snapshot ``STATE_TTL_SECONDS`` after its last write,
+so released rooms do not accumulate; the memory backend also keeps at most
+``STATE_MEMORY_MAX_ENTRIES`` keys.
+
+The file and Redis backends write behind: ``put()`` only records the latest
+snapshot of a key, and a background thread writes everything pending as one
+batch every ``STATE_WRITE_INTERVAL`` seconds.
+
+Besides snapshots, a backend keeps append-only lists (``append()``,
+``get_list()``, ``delete()``), which hold the delta logs of stores that
+log each change instead of snapshotting the whole state.
+
+Pick the backend with ``SESSION_STATE_BACKEND`` and the server with
+``SESSION_STATE_URL`` (``redis://host:port/db``). ``benchmarks.fake_redis``
+serves enough of the protocol to run the Redis backend locally. Stores
+that must survive a restart ask for a durable backend, which is the file
+backend when ``memory`` is configured.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import quote, urlparse
+
+from shared.tools import file_ops
+
+logger = logging.getLogger("agent.state")
+
+# Seconds between write-behind batches
+WRITE_INTERVAL = float(os.getenv("STATE_WRITE_INTERVAL", "0.2"))
+
+# Seconds a snapshot is kept after its last write; 0 keeps it forever
+STATE_TTL = int(os.getenv("STATE_TTL_SECONDS", str(24 * 3600)))
+
+# Keys (snapshots and delta logs) the memory backend keeps before dropping
+# the least recently written
+MEMORY_MAX_ENTRIES = int(os.getenv("STATE_MEMORY_MAX_ENTRIES", "2000"))
+
+# Namespace of every key written by the agents
+KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "voice-agents")
+
+SOCKET_TIMEOUT = 5.0
+
+
+class StateBackend(ABC):
+    """Key -> snapshot bytes."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the latest snapshot of a key (blocking)."""
+
+    @abstractmethod
+    def put(self, key: str, value: bytes) -> None:
+        """Store a snapshot; must not block on I/O."""
+
+    @abstractmethod
+    def append(self, key: str, value: bytes) -> None:
+        """Append an item to a list; must not block on I/O."""
+
+    @abstractmethod
+    def get_list(self, key: str) -> List[bytes]:
+        """Get every item of a list, oldest first (blocking)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete a snapshot or list; must not block on I/O."""
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every write so far is stored; returns whether it was."""
+        return True
+
+    def close(self) -> None:
+        """Flush and release connections."""
+
+
+class MemoryBackend(StateBackend):
+    """Snapshots and lists kept in this process.
+
+    Keys expire ``ttl`` seconds after their last write, and past
+    ``max_entries`` keys the least recently written is dropped, so a worker
+    serving many rooms does not keep every released one.
+
+    Args:
+        ttl: Seconds a key is kept after its last write; 0 for no expiry
+        max_entries: Keys kept before dropping the least recently written
+        clock: Monotonic time source, replaceable in tests
+    """
+
+    def __init__(
+        self,
+        ttl: float = STATE_TTL,
+        max_entries: int = MEMORY_MAX_ENTRIES,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.expired = 0
+        self.evictions = 0
+        self._clock = clock
+        # key -> (last write, snapshot bytes or list items), oldest write first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        """Drop expired keys; call with the lock held."""
+        if self.ttl <= 0:
+            return
+        while self._entries:
+            key, (written, _) = next(iter(self._entries.items()))
+            if now - written <= self.ttl:
+                break
+            del self._entries[key]
+            self.expired += 1
+
+    def _read(self, key: str) -> Any:
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def _write(self, key: str, value: Any) -> None:
+        """Store a key as just written; call with the lock held."""
+        now = self._clock()
+        self._expire(now)
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._read(key)
+        return value if isinstance(value, bytes) else None
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._write(key, value)
+
+    def append(self, key: str, value: bytes) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            items = entry[1] if entry is not None and isinstance(entry[1], list) else []
+            items.append(value)
+            self._write(key, items)
+
+    def get_list(self, key: str) -> List[bytes]:
+        value = self._read(key)
+        return list(value) if isinstance(value, list) else []
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RespError(Exception):
+    """An error reply from the server."""
+
+
+class RespConnection:
+    """A blocking connection speaking the Redis protocol (RESP2).
+
+    Args:
+        host: Server host
+        port: Server port
+        db: Database number, selected on connect
+        timeout: Socket timeout in seconds
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, timeout: float = SOCKET_TIMEOUT) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file: Any = None
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+        if self.db:
+            self.pipeline([("SELECT", self.db)])
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            finally:
+                self._sock = self._file = None
+
+    @staticmethod
+    def _encode(args: Sequence[Any]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read(self) -> Any:
+        line = self._file.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by the server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            return RespError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self._file.read(size + 2)
+            if len(data) < size + 2:
+                raise ConnectionError("connection closed by the server")
+            return data[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self._read() for _ in range(size)]
+        raise ConnectionError(f"unexpected reply: {line[:20]!r}")
+
+    def pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Send commands in one write and read their replies.
+
+        Error replies are returned as ``RespError`` values; connection
+        errors raise, after closing the connection so the next call
+        reconnects.
+        """
+        try:
+            if self._sock is None:
+                self._connect()
+            self._sock.sendall(b"".join(self._encode(command) for command in commands))
+            return [self._read() for _ in commands]
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+    def execute(self, *args: Any) -> Any:
+        """Send one command; raises ``RespError`` on an error reply."""
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+
+class WriteBehindBackend(StateBackend):
+    """Base of backends whose writes are batched by a background thread.
+
+    ``put`` only replaces the key's pending snapshot, so a session saved ten
+    times between batches is written once. Reads see pending snapshots
+    before they are written. Failed batches are kept and retried, unless a
+    newer snapshot of the key has been put since.
+
+    A batch runs its deletes first, then its snapshots, then its appends,
+    which is the order they were made in: a delete drops whatever was
+    pending for its key. Subclasses implement the reads and ``_write``.
+
+    Args:
+        interval: Seconds between write-behind batches
+    """
+
+    # Where the writes go, for logs
+    target = ""
+
+    def __init__(self, interval: float = WRITE_INTERVAL) -> None:
+        self.interval = interval
+        self.batches = 0
+        self.writes = 0
+        self.errors = 0
+        self._pending: Dict[str, bytes] = {}
+        self._appends: Dict[str, List[bytes]] = {}
+        self._deletes: Set[str] = set()
+        # Keys being written by the current batch, for read-your-writes
+        self._in_flight: Dict[str, bytes] = {}
+        self._writing = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self._thread.start()
+
+    @abstractmethod
+    def _read(self, key: str) -> Optional[bytes]:
+        """Read a stored snapshot."""
+
+    @abstractmethod
+    def _read_list(self, key: str) -> List[bytes]:
+        """Read a stored list."""
+
+    @abstractmethod
+    def _write(self, batch: Dict[str, bytes], appends: Dict[str, List[bytes]], deletes: Set[str]) -> None:
+        """Write a batch in order; raises ``OSError`` or ``ValueError`` to
+        have it retried."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._pending or key in self._in_flight:
+                return self._pending.get(key, self._in_flight.get(key))
+            if key in self._deletes:
+                return None
+        return self._read(key)
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._pending[key] = value
+
+    def append(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._appends.setdefault(key, []).append(value)
+
+    def get_list(self, key: str) -> List[bytes]:
+        # Lists are read on resume only, so waiting for pending writes is
+        # simpler than merging them into the reply
+        self.flush(timeout=SOCKET_TIMEOUT)
+        return self._read_list(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            self._appends.pop(key, None)
+            self._deletes.add(key)
+
+    def _write_batch(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            appends, self._appends = self._appends, {}
+            deletes, self._deletes = self._deletes, set()
+            self._in_flight = batch
+            self._writing = True
+        try:
+            if not (batch or appends or deletes):
+                return
+            self._write(batch, appends, deletes)
+            self.batches += 1
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            changes = len(batch) + len(appends) + len(deletes)
+            logger.warning(f"Could not write {changes} session state changes to {self.target}: {e}; retrying")
+            with self._lock:
+                # Keep the failed writes, before any made meanwhile, unless
+                # the key has been put or deleted since
+                for key, value in batch.items():
+                    if key not in self._deletes:
+                        self._pending.setdefault(key, value)
+                for key, values in appends.items():
+                    if key not in self._deletes:
+                        self._appends[key] = values + self._appends.get(key, [])
+                self._deletes |= deletes
+        finally:
+            with self._lock:
+                self._in_flight = {}
+                self._writing = False
+                self._idle.notify_all()
+
+    def _run(self) -> None:
+        while not self._stop:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._write_batch()
+        self._write_batch()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        self._wake.set()
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: not (self._pending or self._appends or self._deletes or self._writing), timeout
+            )
+
+    def close(self) -> None:
+        if self._stop:
+            return
+        self._stop = True
+        self._wake.set()
+        self._thread.join(timeout=SOCKET_TIMEOUT)
+
+
+class RedisBackend(WriteBehindBackend):
+    """Snapshots in a Redis-compatible server, written behind.
+
+    Each batch is sent as one pipeline, with one ``RPUSH`` per list.
+
+    Args:
+        url: ``redis://host:port/db``
+        ttl: Seconds each snapshot is kept after its last write; 0 for no
+            expiry
+        interval: Seconds between write-behind batches
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", ttl: int = STATE_TTL, interval: float = WRITE_INTERVAL) -> None:
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        address = (parsed.hostname or "127.0.0.1", parsed.port or 6379, db)
+        self.url = self.target = url
+        self.ttl = ttl
+        self._reader = RespConnection(*address)
+        self._writer = RespConnection(*address)
+        self._reader_lock = threading.Lock()
+        super().__init__(interval)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        with self._reader_lock:
+            return self._reader.execute("GET", key)
+
+    def _read_list(self, key: str) -> List[bytes]:
+        with self._reader_lock:
+            return self._reader.execute("LRANGE", key, 0, -1)
+
+    def _set(self, key: str, value: bytes) -> Tuple[Any, ...]:
+        return ("SET", key, value, "EX", self.ttl) if self.ttl > 0 else ("SET", key, value)
+
+    def _commands(self, batch: Dict[str, bytes], appends: Dict[str, List[bytes]], deletes: Set[str]) -> List[Tuple[str, Tuple[Any, ...]]]:
+        """(key, command) pairs of a batch, in the order they must run."""
+        commands = [(key, ("DEL", key)) for key in deletes]
+        commands += [(key, self._set(key, value)) for key, value in batch.items()]
+        for key, values in appends.items():
+            commands.append((key, ("RPUSH", key, *values)))
+            if self.ttl > 0:
+                commands.append((key, ("EXPIRE", key, self.ttl)))
+        return commands
+
+    def _write(self, batch: Dict[str, bytes], appends: Dict[str, List[bytes]], deletes: Set[str]) -> None:
+        commands = self._commands(batch, appends, deletes)
+        replies = self._writer.pipeline([command for _, command in commands])
+        for (key, command), reply in zip(commands, replies):
+            if isinstance(reply, RespError):
+                logger.error(f"Could not {command[0]} {key}: {reply}")
+            elif command[0] != "EXPIRE":
+                self.writes += 1
+
+    def close(self) -> None:
+        if self._stop:
+            return
+        super().close()
+        self._writer.close()
+        with self._reader_lock:
+            self._reader.close()
+
+
+class FileBackend(WriteBehindBackend):
+    """Snapshots and lists as files in a directory, written behind.
+
+    A snapshot is replaced atomically and a list is a file with one item
+    per line; each batch is fsynced before it counts as written, and a torn
+    last line (from a killed worker) is skipped on read.
+
+    Files are cleaned up like Redis keys expire: ``prune()`` deletes the
+    files not written for ``ttl`` seconds. It runs when the backend is
+    created (i.e. when a worker starts) and then with a write batch at most
+    once every ``PRUNE_INTERVAL`` seconds.
+
+    Args:
+        directory: Where the files go; defaults to ``sessions`` in the
+            shared data directory
+        ttl: Seconds a file is kept after its last write; 0 keeps files
+            until they are deleted
+        interval: Seconds between write-behind batches
+    """
+
+    PRUNE_INTERVAL = 3600.0
+
+    def __init__(self, directory: Optional[Path] = None, ttl: int = STATE_TTL, interval: float = WRITE_INTERVAL) -> None:
+        self.directory = Path(directory) if directory is not None else file_ops.DATA_DIR / "sessions"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.target = str(self.directory)
+        self.ttl = ttl
+        self.pruned = 0
+        self._last_prune = time.monotonic()
+        self.prune()
+        super().__init__(interval)
+
+    def prune(self) -> int:
+        """Delete the files not written for ``ttl`` seconds; returns how many."""
+        if self.ttl <= 0:
+            return 0
+        cutoff = time.time() - self.ttl
+        pruned = 0
+        for path in self.directory.glob("*.json*"):
+            with suppress(FileNotFoundError):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    pruned += 1
+        self.pruned += pruned
+        if pruned:
+            logger.info(f"Deleted {pruned} session state files older than {self.ttl}s from {self.directory}")
+        return pruned
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / (quote(key, safe="-_.") + suffix)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return self._path(key, ".json").read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _read_list(self, key: str) -> List[bytes]:
+        try:
+            data = self._path(key, ".jsonl").read_bytes()
+        except FileNotFoundError:
+            return []
+        lines = data.split(b"\n")
+        # The part after the last newline is empty, or a torn write
+        return [line for line in lines[:-1] if line]
+
+    def _write(self, batch: Dict[str, bytes], appends: Dict[str, List[bytes]], deletes: Set[str]) -> None:
+        for key in deletes:
+            for suffix in (".json", ".jsonl"):
+                with suppress(FileNotFoundError):
+                    self._path(key, suffix).unlink()
+        for key, value in batch.items():
+            file_ops._atomic_write(self._path(key, ".json"), value, sync_dir=False)
+        for key, values in appends.items():
+            file_ops._durable_append(self._path(key, ".jsonl"), b"".join(value + b"\n" for value in values))
+        file_ops._fsync_dir(self.directory)
+        self.writes += len(deletes) + len(batch) + len(appends)
+        if time.monotonic() - self._last_prune >= self.PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            self.prune()
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "file": FileBackend,
+    "redis": RedisBackend,
+}
+
+# Backend names -> process-wide instances
+_backends: Dict[str, StateBackend] = {}
+_backend_lock = threading.Lock()
+
+
+def get_backend(durable: bool = False) -> StateBackend:
+    """Get the process-wide backend chosen by ``SESSION_STATE_BACKEND``.
+
+    Args:
+        durable: The state must survive a restart of this process, so the
+            file backend is used if ``memory`` is configured
+    """
+    name = os.getenv("SESSION_STATE_BACKEND", "memory")
+    if durable and name == "memory":
+        name = "file"
+    with _backend_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name == "redis":
+                backend = RedisBackend(os.getenv("SESSION_STATE_URL", "redis://127.0.0.1:6379/0"))
+            else:
+                backend = BACKENDS[name]()
+            _backends[name] = backend
+            logger.info(f"Session state backend: {name}")
+        return backend
+
+
+def state_key(store: str, session: str) -> str:
+    """Key of a session's snapshot, e.g. ``voice-agents:day7_sessions:room-1``."""
+    return f"{KEY_PREFIX}:{store}:{session}"
+
+
+@atexit.register
+def _close_backends() -> None:
+    for backend in list(_backends.values()):
+        backend.close()
@@ -0,0 +1,530 @@
+"""Record stores for orders, leads and check-ins.
+
+Agents persist records through a small ``Store`` interface instead of
+reading and rewriting JSON arrays by hand. Two backends are available:
+
+- ``json`` (default): the JSONL journals in the shared data directory,
+  exactly what the agents wrote before. Stores with a ``partition`` spec
+  keep one journal per day instead, so time-window queries only touch the
+  days they cover.
+- ``sqlite``: one ``records.db`` in WAL mode, with indexes on the
+  timestamp and customer key of every store.
+
+Orders and check-ins are keyed by the user's LiveKit participant identity
+(the ``user`` field), so per-user queries only read that user's records.
+
+Pick the backend with the ``RECORD_STORE_BACKEND`` environment variable and
+import existing JSON data with ``python -m shared.store migrate``.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from shared.tools import file_ops
+
+logger = logging.getLogger("agent.store")
+
+# Record stores used by the agents
+STORE_SPECS: Dict[str, Dict[str, Optional[str]]] = {
+    "day2_orders": {"filename": "day2_orders.json", "id_field": "id", "key_field": "user", "time_field": None},
+    "day3_checkins": {"filename": "day3_wellness_log.json", "id_field": "id", "key_field": "user", "time_field": "date", "partition": "day"},
+    "day5_leads": {"filename": "day5_leads.json", "id_field": "id", "key_field": "email", "time_field": "date"},
+    "day7_orders": {"filename": "day7_orders.json", "id_field": "order_id", "key_field": "customer_name", "time_field": "timestamp"},
+    "day9_orders": {"filename": "day9_orders.json", "id_field": "id", "key_field": "user", "time_field": "created_at"},
+}
+
+SQLITE_FILE = "records.db"
+
+
+def _normalize_key(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value).strip().lower()
+
+
+class Store(ABC):
+    """A named collection of JSON records.
+
+    Args:
+        name: Store name, e.g. ``"day7_orders"``
+        filename: JSON array file the records live in for the JSON backend
+        id_field: Record field holding the record id; filled in on insert
+            when missing
+        key_field: Optional customer key field for ``query_by_key``
+        time_field: Optional ISO timestamp field for ``query_range``
+        partition: ``"day"`` to split the JSON backend by ``time_field``
+    """
+
+    def __init__(
+        self,
+        name: str,
+        filename: str,
+        id_field: str = "id",
+        key_field: Optional[str] = None,
+        time_field: Optional[str] = None,
+        partition: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.filename = filename
+        self.id_field = id_field
+        self.key_field = key_field
+        self.time_field = time_field
+        self.partition = partition
+
+    @abstractmethod
+    def insert(self, record: Dict[str, Any]) -> Optional[str]:
+        """Insert a record and return its id, or None if it could not be saved."""
+
+    @abstractmethod
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """Get a record by id."""
+
+    @abstractmethod
+    def query_recent(self, n: int) -> List[Dict[str, Any]]:
+        """Get the ``n`` most recent records, oldest first."""
+
+    @abstractmethod
+    def query_by_key(self, key: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the records whose key field matches ``key``, oldest first.
+
+        Keys compare case-insensitively. ``n`` keeps only the most recent ones.
+        """
+
+    @abstractmethod
+    def query_range(
+        self, since: datetime, until: Optional[datetime] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the records whose time field is in ``[since, until)``, oldest first.
+
+        ``key`` restricts the result to one customer key.
+        """
+
+    def _prepare(self, record: Dict[str, Any]) -> str:
+        """Make sure the record has an id and return it."""
+        if not record.get(self.id_field):
+            record[self.id_field] = uuid.uuid4().hex[:12]
+        return str(record[self.id_field])
+
+    async def ainsert(self, record: Dict[str, Any]) -> Optional[str]:
+        return await file_ops.run_io(self.insert, record)
+
+    async def aget(self, record_id: str) -> Optional[Dict[str, Any]]:
+        return await file_ops.run_io(self.get, record_id)
+
+    async def aquery_recent(self, n: int) -> List[Dict[str, Any]]:
+        return await file_ops.run_io(self.query_recent, n)
+
+    async def aquery_by_key(self, key: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await file_ops.run_io(self.query_by_key, key, n)
+
+    async def aquery_range(
+        self, since: datetime, until: Optional[datetime] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return await file_ops.run_io(self.query_range, since, until, key)
+
+    def _in_range(self, record: Dict[str, Any], since: str, until: Optional[str]) -> bool:
+        ts = record.get(self.time_field) or ""
+        return ts >= since and (until is None or ts < until)
+
+
+class JsonStore(Store):
+    """Store backed by the file_ops JSONL journal of a JSON array file.
+
+    Records come back as read-only views from the file_ops read cache. Key
+    lookups go through a ``JournalKeyIndex``, so they read only the
+    matching records.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._key_index = (
+            file_ops.JournalKeyIndex(self.key_field, _normalize_key) if self.key_field else None
+        )
+
+    def _lookup(self, filename: str, key: str) -> List[Dict[str, Any]]:
+        """Records of one journaled file that match ``key``."""
+        journal = file_ops.journal_path(filename)
+        if journal.exists():
+            return self._key_index.lookup(journal, key)
+        wanted = _normalize_key(key)
+        return [
+            record
+            for record in file_ops.iter_records(filename)
+            if _normalize_key(record.get(self.key_field)) == wanted
+        ]
+
+    def insert(self, record: Dict[str, Any]) -> Optional[str]:
+        record_id = self._prepare(record)
+        if file_ops.append_json(self.filename, record, journal=True):
+            return record_id
+        return None
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        for record in file_ops.iter_records(self.filename):
+            if str(record.get(self.id_field)) == str(record_id):
+                return record
+        return None
+
+    def query_recent(self, n: int) -> List[Dict[str, Any]]:
+        return file_ops.read_last(self.filename, n)
+
+    def query_by_key(self, key: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not self.key_field:
+            return []
+        matches = self._lookup(self.filename, key)
+        return matches[-n:] if n else matches
+
+    def query_range(
+        self, since: datetime, until: Optional[datetime] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if not self.time_field or (key is not None and not self.key_field):
+            return []
+        until_iso = until.isoformat() if until else None
+        records = self._lookup(self.filename, key) if key is not None else file_ops.iter_records(self.filename)
+        return [r for r in records if self._in_range(r, since.isoformat(), until_iso)]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every record, oldest first."""
+        return file_ops.iter_records(self.filename)
+
+
+class PartitionedJsonStore(JsonStore):
+    """JsonStore with one journal per day of the record's time field.
+
+    ``day3_wellness_log.json`` becomes ``day3_wellness_log/2025-01-31.jsonl``
+    and so on. The partition name is the index on the date field: a
+    ``query_range`` over N days opens at most N small files, however long the
+    history is. The legacy single file is split into partitions on first use.
+
+    A key directory (``day3_wellness_log.keys.jsonl``) records each key once
+    per day it has records, so ``query_by_key`` only opens the partitions
+    holding that key, newest first, instead of walking every day. Only the
+    key indexes of the ``MAX_INDEXED_PARTITIONS`` most recently used
+    partitions are kept in memory.
+    """
+
+    MAX_INDEXED_PARTITIONS = 64
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if self.key_field:
+            self._key_index = file_ops.JournalKeyIndex(
+                self.key_field, _normalize_key, max_journals=self.MAX_INDEXED_PARTITIONS
+            )
+            self._directory_index = file_ops.JournalKeyIndex(self.key_field, _normalize_key)
+
+    @property
+    def _stem(self) -> str:
+        return Path(self.filename).stem
+
+    def _partition_file(self, day: str) -> str:
+        return f"{self._stem}/{day}.json"
+
+    def _day_of(self, record: Dict[str, Any]) -> str:
+        ts = record.get(self.time_field) or ""
+        return ts[:10] if len(ts) >= 10 else date.today().isoformat()
+
+    def _partitions(self) -> List[str]:
+        """Days that have a partition, oldest first."""
+        self._seed()
+        return sorted(p.stem for p in (file_ops.DATA_DIR / self._stem).glob("*.jsonl"))
+
+    @property
+    def _directory_file(self) -> str:
+        return f"{self._stem}.keys.json"
+
+    def _seed(self) -> None:
+        """Split the legacy single-file log into day partitions, once."""
+        self._seed_partitions()
+        if self.key_field:
+            self._seed_directory()
+
+    def _seed_directory(self) -> None:
+        """Build the key directory from the partitions, once.
+
+        Inserts add to the directory before writing their record and wait on
+        its lock, so none is missed while it is built.
+        """
+        journal = file_ops.journal_path(self._directory_file)
+        if journal.exists():
+            return
+        with file_ops.file_lock(journal):
+            if journal.exists():
+                return
+            entries = []
+            for day in sorted(p.stem for p in (file_ops.DATA_DIR / self._stem).glob("*.jsonl")):
+                keys = {_normalize_key(r.get(self.key_field)) for r in file_ops.iter_records(self._partition_file(day))}
+                entries.extend({self.key_field: key, "day": day} for key in sorted(keys - {None}))
+            file_ops.write_records(self._directory_file, entries)
+
+    def _days_of(self, key: str) -> List[str]:
+        """Days with records of ``key``, oldest first."""
+        entries = self._directory_index.lookup(file_ops.journal_path(self._directory_file), key)
+        return sorted({entry["day"] for entry in entries})
+
+    def _seed_partitions(self) -> None:
+        partition_dir = file_ops.DATA_DIR / self._stem
+        if partition_dir.exists():
+            return
+        with file_ops.file_lock(file_ops.DATA_DIR / self.filename):
+            if partition_dir.exists():
+                return
+            by_day: Dict[str, List[Any]] = {}
+            for record in file_ops.iter_records(self.filename):
+                by_day.setdefault(self._day_of(record), []).append(record)
+            # Build next to the final directory and rename, so a crash
+            # cannot leave a half-split log behind
+            staging = partition_dir.with_name(f".{self._stem}.seeding")
+            shutil.rmtree(staging, ignore_errors=True)
+            staging.mkdir()
+            for day, records in by_day.items():
+                file_ops.write_records(f"{staging.name}/{day}.json", records)
+            os.replace(staging, partition_dir)
+
+    def insert(self, record: Dict[str, Any]) -> Optional[str]:
+        self._seed()
+        record_id = self._prepare(record)
+        day = self._day_of(record)
+        key = _normalize_key(record.get(self.key_field)) if self.key_field else None
+        # Directory first: an entry without its record only costs a lookup
+        if key is not None and day not in self._days_of(key):
+            if not file_ops.append_json(self._directory_file, {self.key_field: key, "day": day}, journal=True):
+                return None
+        if file_ops.append_json(self._partition_file(day), record, journal=True):
+            return record_id
+        return None
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        for record in self.iter_records():
+            if str(record.get(self.id_field)) == str(record_id):
+                return record
+        return None
+
+    def query_recent(self, n: int) -> List[Dict[str, Any]]:
+        records: List[Dict[str, Any]] = []
+        for day in reversed(self._partitions()):
+            if len(records) >= n:
+                break
+            records = file_ops.read_last(self._partition_file(day), n - len(records)) + records
+        return records
+
+    def query_by_key(self, key: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not self.key_field:
+            return []
+        self._seed()
+        matches: List[Dict[str, Any]] = []
+        for day in reversed(self._days_of(key)):
+            if n and len(matches) >= n:
+                break
+            matches = self._lookup(self._partition_file(day), key) + matches
+        return matches[-n:] if n else matches
+
+    def query_range(
+        self, since: datetime, until: Optional[datetime] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if key is not None and not self.key_field:
+            return []
+        self._seed()
+        until = until or datetime.now() + timedelta(seconds=1)
+        since_iso, until_iso = since.isoformat(), until.isoformat()
+        records = []
+        day = since.date()
+        while day <= until.date():
+            partition = self._partition_file(day.isoformat())
+            if file_ops.journal_path(partition).exists():
+                candidates = self._lookup(partition, key) if key is not None else file_ops.iter_records(partition)
+                records.extend(r for r in candidates if self._in_range(r, since_iso, until_iso))
+            day += timedelta(days=1)
+        return records
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        for day in self._partitions():
+            yield from file_ops.iter_records(self._partition_file(day))
+
+
+class SqliteStore(Store):
+    """Store backed by one table in an SQLite database in WAL mode."""
+
+    def __init__(self, *args: Any, db_path: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if not self.name.isidentifier():
+            raise ValueError(f"invalid store name: {self.name!r}")
+        self.db_path = db_path or str(file_ops.DATA_DIR / SQLITE_FILE)
+        self._local = threading.local()
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, since tools run on the I/O pool."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.name}" ('
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "id TEXT, ts TEXT, key TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_id" ON "{self.name}" (id)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_ts" ON "{self.name}" (ts)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_key" ON "{self.name}" (key, seq)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{self.name}_key_ts" ON "{self.name}" (key, ts)')
+
+    def _row_values(self, record: Dict[str, Any]) -> tuple:
+        ts = record.get(self.time_field) if self.time_field else None
+        key = _normalize_key(record.get(self.key_field)) if self.key_field else None
+        return (str(record[self.id_field]), ts, key, json.dumps(record, ensure_ascii=False))
+
+    def insert(self, record: Dict[str, Any]) -> Optional[str]:
+        record_id = self._prepare(record)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f'INSERT INTO "{self.name}" (id, ts, key, data) VALUES (?, ?, ?, ?)',
+                    self._row_values(record),
+                )
+            return record_id
+        except sqlite3.Error as e:
+            logger.error(f"Error inserting into {self.name}: {e}")
+            return None
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> int:
+        """Insert records in one transaction, skipping ids already in the table.
+
+        Returns:
+            Number of records inserted
+        """
+        conn = self._connect()
+        existing = {row[0] for row in conn.execute(f'SELECT id FROM "{self.name}"')}
+        rows = [self._row_values(r) for r in records if str(r[self.id_field]) not in existing]
+        with conn:
+            conn.executemany(
+                f'INSERT INTO "{self.name}" (id, ts, key, data) VALUES (?, ?, ?, ?)', rows
+            )
+        return len(rows)
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f'SELECT data FROM "{self.name}" WHERE id = ? ORDER BY seq LIMIT 1', (str(record_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query_recent(self, n: int) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            f'SELECT data FROM "{self.name}" ORDER BY seq DESC LIMIT ?', (n,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def query_by_key(self, key: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            f'SELECT data FROM "{self.name}" WHERE key = ? ORDER BY seq DESC LIMIT ?',
+            (_normalize_key(key), n if n else -1),
+        ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def query_range(
+        self, since: datetime, until: Optional[datetime] = None, key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        sql = f'SELECT data FROM "{self.name}" WHERE ts >= ?'
+        params: list = [since.isoformat()]
+        if until is not None:
+            sql += " AND ts < ?"
+            params.append(until.isoformat())
+        if key is not None:
+            sql += " AND key = ?"
+            params.append(_normalize_key(key))
+        sql += " ORDER BY ts, seq"
+        return [json.loads(row[0]) for row in self._connect().execute(sql, params)]
+
+
+BACKENDS = {
+    "json": JsonStore,
+    "sqlite": SqliteStore,
+}
+
+_stores: Dict[str, Store] = {}
+_stores_lock = threading.Lock()
+
+
+def _open(name: str, backend: str, **kwargs: Any) -> Store:
+    spec = STORE_SPECS[name]
+    cls = BACKENDS[backend]
+    if cls is JsonStore and spec.get("partition"):
+        cls = PartitionedJsonStore
+    return cls(name, **spec, **kwargs)
+
+
+def get_store(name: str, backend: Optional[str] = None) -> Store:
+    """Get the shared store instance for one of ``STORE_SPECS``.
+
+    Args:
+        name: Store name, e.g. ``"day7_orders"``
+        backend: ``"json"`` or ``"sqlite"``; defaults to the
+            ``RECORD_STORE_BACKEND`` environment variable, then ``"json"``
+    """
+    backend = backend or os.getenv("RECORD_STORE_BACKEND", "json")
+    with _stores_lock:
+        store = _stores.get(f"{backend}:{name}")
+        if store is None:
+            store = _open(name, backend)
+            _stores[f"{backend}:{name}"] = store
+        return store
+
+
+def _legacy_id(record: Dict[str, Any]) -> str:
+    """Stable id for a legacy record without one, so migration is idempotent."""
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def migrate_json_to_sqlite(db_path: Optional[str] = None) -> Dict[str, int]:
+    """Import every JSON store into SQLite. Safe to run more than once.
+
+    Returns:
+        Number of records imported per store
+    """
+    imported = {}
+    for name, spec in STORE_SPECS.items():
+        store = _open(name, "sqlite", db_path=db_path)
+        records = []
+        for record in _open(name, "json").iter_records():
+            record = file_ops.thaw(record)
+            if not record.get(spec["id_field"]):
+                record[spec["id_field"]] = _legacy_id(record)
+            records.append(record)
+        imported[name] = store.insert_many(records)
+    return imported
+
+
+def main(argv: List[str] = None) -> None:
+    """Command line entry point for record store maintenance."""
+    parser = argparse.ArgumentParser(prog="python -m shared.store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import the JSON data files into SQLite")
+    migrate.add_argument("--db", help=f"database path (default: data/{SQLITE_FILE})")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        for name, count in migrate_json_to_sqlite(args.db).items():
+            print(f"{name}: {count} records imported")
+
+
+if __name__ == "__main__":
+    main()
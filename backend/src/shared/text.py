@@ -0,0 +1,20 @@
+"""Text normalization shared by the search indexes."""
+import re
+from typing import List
+
+# Runs of letters and digits in any script; punctuation and "_" split tokens
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into case-folded word tokens.
+
+    >>> tokenize("Peanut-Butter (500g)")
+    ['peanut', 'butter', '500g']
+    """
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def normalize(text: str) -> str:
+    """Case-fold text and collapse punctuation and whitespace to single spaces."""
+    return " ".join(tokenize(text))
@@ -1,20 +1,391 @@
 """Shared file operations for agents."""
+import argparse
+import asyncio
 import json
 import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
 
 # Base data directory
-DATA_DIR = Path(__file__).parent.parent / "shared" / "data"
+DATA_DIR = Path(__file__).parent.parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Bounded pool that runs blocking file I/O for the async API
+IO_WORKERS = int(os.getenv("FILE_OPS_IO_WORKERS", "4"))
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="file_ops")
+
+
+def _readonly(*args: Any, **kwargs: Any) -> None:
+    raise TypeError("cached data is read-only; use .copy() or thaw() to modify it")
+
+
+class FrozenDict(dict):
+    """Read-only dict returned from the read cache.
+
+    It is still a ``dict`` for ``isinstance`` checks and ``json.dumps``;
+    ``.copy()`` returns a plain, mutable shallow copy.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self) -> Any:
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list returned from the read cache."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self) -> Any:
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed JSON into read-only containers."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively copy frozen data into plain, mutable containers."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+class ReadCache:
+    """Process-wide LRU of parsed files.
+
+    Entries are keyed by path and validated against the file's
+    (mtime, size, inode) on every lookup, so an unchanged file is parsed
+    once no matter how many tools read it. Values are frozen, so callers
+    cannot corrupt each other's view.
+    """
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Path, Tuple[Tuple[int, int, int], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, filepath: Path, parse: Callable[[Path], Any]) -> Any:
+        """Return the frozen parse of ``filepath``, re-parsing only if it changed."""
+        st = os.stat(filepath)
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            entry = self._entries.get(filepath)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(filepath)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = freeze(parse(filepath))
+        with self._lock:
+            self._entries[filepath] = (signature, value)
+            self._entries.move_to_end(filepath)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, filepath: Path) -> None:
+        """Drop the entry for a file that was just written."""
+        with self._lock:
+            self._entries.pop(filepath, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+
+read_cache = ReadCache(max_entries=int(os.getenv("FILE_OPS_CACHE_ENTRIES", "64")))
+
+
+def cache_stats() -> Dict[str, int]:
+    """Hit/miss counters of the read cache."""
+    return read_cache.stats()
+
+
+_held_locks = threading.local()
+_thread_locks: Dict[Path, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(filepath: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock for a data file across processes.
+
+    LiveKit runs every job in its own process, so read-modify-write cycles
+    and journal appends take this lock. ``x.json`` and its journal
+    ``x.jsonl`` share the sidecar ``.x.lock``. The lock is reentrant within a
+    thread.
+    """
+    lock_path = filepath.with_name(f".{filepath.stem}.lock")
+    held = getattr(_held_locks, "paths", None)
+    if held is None:
+        held = _held_locks.paths = {}
+    if held.get(lock_path):
+        held[lock_path] += 1
+        try:
+            yield
+        finally:
+            held[lock_path] -= 1
+        return
+
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(lock_path, threading.Lock())
+        lock.acquire()
+        release = lock.release
+    else:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        def release() -> None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    held[lock_path] = 1
+    try:
+        yield
+    finally:
+        held[lock_path] = 0
+        release()
+
+
+def _fsync_dir(dirpath: Path) -> None:
+    """Flush a directory entry so a rename survives a crash."""
+    try:
+        fd = os.open(dirpath, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(filepath: Path, payload: bytes, sync_dir: bool = True) -> None:
+    """Replace a file with write-to-temp + fsync + rename.
+
+    Readers see either the old or the new contents, never a truncated file.
+    """
+    with file_lock(filepath):
+        _replace_file(filepath, payload)
+    if sync_dir:
+        _fsync_dir(filepath.parent)
+
+
+def _replace_file(filepath: Path, payload: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filepath)
+        read_cache.invalidate(filepath)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def _durable_append(filepath: Path, payload: bytes) -> None:
+    """Append bytes to a file and fsync them."""
+    with file_lock(filepath), open(filepath, "ab") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    read_cache.invalidate(filepath)
+
+
+class GroupCommitter:
+    """Background writer that coalesces pending writes into one flush per batch.
+
+    Writes submitted within ``window`` seconds of each other are committed
+    together: several saves of the same file collapse into the last one,
+    appends to the same journal share one write and one fsync, and the data
+    directory is fsynced once per batch.
+    """
+
+    def __init__(self, window: float = 0.005) -> None:
+        self.window = window
+        self.batches = 0
+        self.writes = 0
+        self._pending: List[Tuple[str, Path, bytes, Future]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="file_ops-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind: str, filepath: Path, payload: bytes) -> Future:
+        """Queue a ``"save"`` or ``"append"`` and return a future for its commit."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("group committer is closed")
+            self._pending.append((kind, filepath, payload, future))
+            self._cond.notify()
+        return future
+
+    def close(self) -> None:
+        """Commit anything pending and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # Let concurrent sessions pile onto this batch
+            time.sleep(self.window)
+            with self._cond:
+                batch, self._pending = self._pending, []
+            try:
+                self._commit(batch)
+            except Exception as e:
+                # Fail this batch's writes and keep serving later ones
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _commit(self, batch: List[Tuple[str, Path, bytes, Future]]) -> None:
+        saves: Dict[Path, Tuple[bytes, List[Future]]] = {}
+        appends: Dict[Path, Tuple[List[bytes], List[Future]]] = {}
+        for kind, filepath, payload, future in batch:
+            if kind == "save":
+                futures = saves.get(filepath, (b"", []))[1]
+                saves[filepath] = (payload, futures + [future])
+            else:
+                appends.setdefault(filepath, ([], []))
+                appends[filepath][0].append(payload)
+                appends[filepath][1].append(future)
+
+        dirs = set()
+        committed: List[Future] = []
+        for filepath, (payload, futures) in saves.items():
+            if self._try(futures, _atomic_write, filepath, payload, False):
+                committed.extend(futures)
+                dirs.add(filepath.parent)
+        for filepath, (payloads, futures) in appends.items():
+            if self._try(futures, _durable_append, filepath, b"".join(payloads)):
+                committed.extend(futures)
+        # Saves only count once their renames are durable too
+        for dirpath in dirs:
+            _fsync_dir(dirpath)
+        for future in committed:
+            future.set_result(True)
+
+        self.batches += 1
+        self.writes += len(committed)
+
+    @staticmethod
+    def _try(futures: List[Future], fn: Callable[..., None], *args: Any) -> bool:
+        """Run one write; on failure, fail its futures and return False."""
+        try:
+            fn(*args)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return False
+        return True
+
+
+_group_committer: Optional[GroupCommitter] = None
+
+
+def enable_group_commit(window_ms: float = 5.0) -> GroupCommitter:
+    """Route writes through a shared ``GroupCommitter``.
+
+    Each write still waits for its own commit, so durability is unchanged;
+    concurrent writes just share the disk flush.
+    """
+    global _group_committer
+    if _group_committer is None:
+        _group_committer = GroupCommitter(window=window_ms / 1000)
+    return _group_committer
+
+
+def disable_group_commit() -> None:
+    """Flush pending writes and go back to one flush per write."""
+    global _group_committer
+    committer, _group_committer = _group_committer, None
+    if committer is not None:
+        committer.close()
+
+
+if os.getenv("FILE_OPS_GROUP_COMMIT_MS"):
+    enable_group_commit(float(os.environ["FILE_OPS_GROUP_COMMIT_MS"]))
+
+
+def _write(kind: str, filepath: Path, payload: bytes) -> Optional[Future]:
+    """Write now, or queue on the group committer and return its future."""
+    if _group_committer is not None:
+        return _group_committer.submit(kind, filepath, payload)
+    if kind == "save":
+        _atomic_write(filepath, payload)
+    else:
+        _durable_append(filepath, payload)
+    return None
+
+
+def _encode_json(data: Any) -> bytes:
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _encode_line(item: Any) -> bytes:
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
 
 def save_json(filename: str, data: Any) -> bool:
-    """Save data to a JSON file in the shared data directory."""
+    """Save data to a JSON file in the shared data directory.
+
+    The file is replaced atomically, so a crash mid-write leaves the previous
+    version in place.
+    """
     try:
-        filepath = DATA_DIR / filename
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        future = _write("save", DATA_DIR / filename, _encode_json(data))
+        if future is not None:
+            future.result()
         return True
     except Exception as e:
         print(f"Error saving {filename}: {e}")
@@ -22,29 +393,415 @@ def save_json(filename: str, data: Any) -> bool:
 
 
 def load_json(filename: str, default: Any = None) -> Any:
-    """Load data from a JSON file in the shared data directory."""
+    """Load data from a JSON file in the shared data directory.
+
+    A file that fails to parse is copied to ``<name>.corrupt`` before the
+    default is returned, so a later save cannot destroy what is left of it.
+    """
     try:
         filepath = DATA_DIR / filename
         if not filepath.exists():
             return default if default is not None else {}
         with open(filepath, "r", encoding="utf-8") as f:
             return json.load(f)
+    except json.JSONDecodeError as e:
+        print(f"Error loading {filename}: {e}; keeping a copy as {filename}.corrupt")
+        shutil.copy2(filepath, filepath.with_name(filepath.name + ".corrupt"))
+        return default if default is not None else {}
     except Exception as e:
         print(f"Error loading {filename}: {e}")
         return default if default is not None else {}
 
 
-def append_json(filename: str, item: Any) -> bool:
-    """Append an item to a JSON array file."""
+def _parse_json(filepath: Path) -> Any:
+    with open(filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_json_view(filename: str, default: Any = None) -> Any:
+    """Load a read-only view of a JSON file through the read cache.
+
+    Repeated reads of an unchanged file skip parsing. Use ``load_json`` (or
+    ``thaw`` the result) when the data is going to be modified.
+    """
     try:
         filepath = DATA_DIR / filename
-        data = load_json(filename, default=[])
-        if not isinstance(data, list):
-            data = []
-        data.append(item)
-        return save_json(filename, data)
+        if not filepath.exists():
+            return default if default is not None else {}
+        return read_cache.get(filepath, _parse_json)
+    except Exception as e:
+        print(f"Error loading {filename}: {e}")
+        return default if default is not None else {}
+
+
+def journal_path(filename: str) -> Path:
+    """Get the path of the JSONL journal that backs a JSON array file.
+
+    ``day7_orders.json`` is journaled to ``day7_orders.jsonl``.
+    """
+    return (DATA_DIR / filename).with_suffix(".jsonl")
+
+
+def _seed_journal(filename: str) -> None:
+    """Import a legacy JSON array file into a new journal.
+
+    Runs once, the first time a file is journaled. From then on the journal
+    is the source of truth and the array file is only an export.
+    """
+    journal = journal_path(filename)
+    if journal.exists():
+        return
+    with file_lock(journal):
+        if journal.exists():
+            return
+        legacy = load_json(filename, default=[])
+        if not isinstance(legacy, list):
+            legacy = []
+        _atomic_write(journal, b"".join(_encode_line(item) for item in legacy))
+
+
+def append_json(filename: str, item: Any, journal: bool = False) -> bool:
+    """Append an item to a JSON array file.
+
+    Args:
+        filename: Name of the JSON array file in the shared data directory
+        item: Record to append
+        journal: Append one line to the file's JSONL journal instead of
+            rewriting the whole array. Read journaled files back with
+            ``iter_records``/``load_records``.
+
+    Returns:
+        True if the item was written
+    """
+    try:
+        if journal:
+            _seed_journal(filename)
+            future = _write("append", journal_path(filename), _encode_line(item))
+            if future is not None:
+                future.result()
+            return True
+
+        def _append(data: Any) -> List[Any]:
+            data = data if isinstance(data, list) else []
+            data.append(item)
+            return data
+
+        return update_json(filename, _append, default=[])
     except Exception as e:
         print(f"Error appending to {filename}: {e}")
         return False
 
 
+def update_json(filename: str, update: Callable[[Any], Any], default: Any = None) -> bool:
+    """Read-modify-write a JSON file while holding its cross-process lock.
+
+    Args:
+        filename: Name of the JSON file in the shared data directory
+        update: Called with the current (mutable) contents; returns the new
+            contents to save
+        default: Contents to start from when the file does not exist
+
+    Returns:
+        True if the new contents were saved
+    """
+    filepath = DATA_DIR / filename
+    try:
+        with file_lock(filepath):
+            data = update(load_json(filename, default=default))
+            # Write directly: the group committer would wait on this lock
+            _atomic_write(filepath, _encode_json(data))
+        return True
+    except Exception as e:
+        print(f"Error updating {filename}: {e}")
+        return False
+
+
+def _parse_journal(filepath: Path) -> List[Any]:
+    """Parse a JSONL journal, skipping a torn trailing line."""
+    records = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"Skipping bad record {filepath.name}:{line_no}: {e}")
+    return records
+
+
+def iter_records(filename: str) -> Iterator[Any]:
+    """Iterate over the records of a JSON array file, oldest first.
+
+    Reads the journal when one exists and falls back to the legacy array
+    file otherwise. A torn trailing line (e.g. from a killed worker) is
+    skipped. Records come from the read cache and are read-only.
+    """
+    journal = journal_path(filename)
+    if not journal.exists():
+        data = load_json_view(filename, default=[])
+        if isinstance(data, list):
+            yield from data
+        return
+    yield from read_cache.get(journal, _parse_journal)
+
+
+def load_records(filename: str) -> List[Any]:
+    """Load all records of a JSON array file, journaled or not.
+
+    The returned list is new, but the records in it are read-only views.
+    """
+    try:
+        return list(iter_records(filename))
+    except Exception as e:
+        print(f"Error loading records from {filename}: {e}")
+        return []
+
+
+READ_LAST_BLOCK = 8 * 1024
+
+
+def _tail_lines(filepath: Path, n: int) -> List[bytes]:
+    """Return up to ``n`` complete lines from the end of a file, newest first.
+
+    Reads fixed-size blocks backwards from the end, so the cost depends on
+    ``n`` and the record size, not on how long the file is. A trailing
+    segment without a newline is a torn write and is skipped.
+    """
+    lines: List[bytes] = []
+    with open(filepath, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        skip_tail = True  # Segment after the final newline: empty or torn
+        while pos > 0 and len(lines) < n:
+            size = min(READ_LAST_BLOCK, pos)
+            pos -= size
+            f.seek(pos)
+            buf = f.read(size) + buf
+            parts = buf.split(b"\n")
+            # The first part may continue in the previous block
+            buf = parts.pop(0) if pos > 0 else b""
+            for part in reversed(parts):
+                if skip_tail:
+                    skip_tail = False
+                    continue
+                if part.strip():
+                    lines.append(part)
+                    if len(lines) == n:
+                        break
+    return lines
+
+
+def read_last(filename: str, n: int) -> List[Any]:
+    """Read the last ``n`` records of a JSON array file, oldest first.
+
+    Journaled files are read backwards from the end without parsing the rest
+    of the history, so latency stays flat as the journal grows. Files that
+    were never journaled fall back to the (cached) array.
+    """
+    if n <= 0:
+        return []
+    try:
+        journal = journal_path(filename)
+        if not journal.exists():
+            return load_records(filename)[-n:]
+        records = []
+        for line in _tail_lines(journal, n):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"Skipping bad record in {journal.name}: {e}")
+        records.reverse()
+        return records
+    except Exception as e:
+        print(f"Error reading last records from {filename}: {e}")
+        return []
+
+
+class JournalKeyIndex:
+    """In-memory index from a record field to line offsets in journals.
+
+    The first lookup on a journal scans it once; later lookups only scan
+    what was appended since, then read exactly the matching lines. A
+    lookup therefore costs O(k) in the number of matching records rather
+    than O(n) in the journal. A journal that was replaced (new inode) or
+    shrank is re-indexed from scratch.
+
+    Args:
+        field: Record field to index
+        normalize: Maps field values to index keys; records whose key is
+            None are not indexed
+        max_journals: Journals kept indexed before the least recently
+            used is dropped (and re-indexed if looked up again); 0 keeps
+            every one
+    """
+
+    def __init__(
+        self,
+        field: str,
+        normalize: Optional[Callable[[Any], Optional[str]]] = None,
+        max_journals: int = 0,
+    ) -> None:
+        self.field = field
+        self.normalize = normalize or (lambda value: None if value is None else str(value))
+        self.max_journals = max_journals
+        # path -> (inode, indexed up to offset, key -> [(offset, length)]),
+        # least recently used first
+        self._journals: "OrderedDict[Path, Tuple[int, int, Dict[str, List[Tuple[int, int]]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refresh(self, filepath: Path, f: Any) -> Dict[str, List[Tuple[int, int]]]:
+        st = os.fstat(f.fileno())
+        inode, offset, postings = self._journals.get(filepath, (st.st_ino, 0, {}))
+        if inode != st.st_ino or st.st_size < offset:
+            inode, offset, postings = st.st_ino, 0, {}
+        if st.st_size > offset:
+            f.seek(offset)
+            chunk = f.read(st.st_size - offset)
+            # Only index complete lines; a partial one is picked up next time
+            end = chunk.rfind(b"\n") + 1
+            pos = 0
+            while pos < end:
+                nl = chunk.index(b"\n", pos)
+                line = chunk[pos:nl]
+                if line.strip():
+                    try:
+                        key = self.normalize(json.loads(line).get(self.field))
+                    except (json.JSONDecodeError, AttributeError):
+                        key = None
+                    if key is not None:
+                        postings.setdefault(key, []).append((offset + pos, nl - pos))
+                pos = nl + 1
+            offset += end
+        self._journals[filepath] = (inode, offset, postings)
+        self._journals.move_to_end(filepath)
+        while self.max_journals and len(self._journals) > self.max_journals:
+            self._journals.popitem(last=False)
+        return postings
+
+    def lookup(self, filepath: Path, value: Any) -> List[Any]:
+        """Get the records of a journal whose field matches ``value``, oldest first."""
+        key = self.normalize(value)
+        if key is None or not filepath.exists():
+            return []
+        records = []
+        # Index and read through one descriptor, so a concurrent compaction
+        # (which swaps in a new file) cannot mix up offsets
+        with open(filepath, "rb") as f:
+            with self._lock:
+                locations = list(self._refresh(filepath, f).get(key, []))
+            for offset, length in locations:
+                f.seek(offset)
+                records.append(json.loads(f.read(length)))
+        return records
+
+
+def compact_journal(filename: str) -> int:
+    """Export a journal to its legacy JSON array file.
+
+    The journal is rewritten without unreadable lines and the array file is
+    regenerated from it, so tools that still use ``load_json`` see every
+    record.
+
+    Returns:
+        Number of records exported
+    """
+    journal = journal_path(filename)
+    if not journal.exists():
+        return len(load_records(filename))
+    # Appends wait on the lock, so none are lost between read and rewrite
+    with file_lock(journal):
+        records = load_records(filename)
+        write_records(filename, records)
+        _atomic_write(DATA_DIR / filename, _encode_json(records))
+    return len(records)
+
+
+def write_records(filename: str, records: List[Any]) -> None:
+    """Atomically replace the journal of a JSON array file with ``records``."""
+    journal = journal_path(filename)
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(journal, b"".join(_encode_line(item) for item in records))
+
+
+async def run_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking file operation on the I/O pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, partial(fn, *args, **kwargs))
+
+
+async def aload_json(filename: str, default: Any = None) -> Any:
+    """Async ``load_json`` that does not block the event loop."""
+    return await run_io(load_json, filename, default)
+
+
+async def asave_json(filename: str, data: Any) -> bool:
+    """Async ``save_json`` that does not block the event loop.
+
+    ``data`` is serialized on a worker thread, so do not mutate it until the
+    call returns. With group commit enabled the coroutine waits for the batch
+    without holding an I/O thread.
+    """
+    if _group_committer is None:
+        return await run_io(save_json, filename, data)
+    try:
+        payload = await run_io(_encode_json, data)
+        await asyncio.wrap_future(_group_committer.submit("save", DATA_DIR / filename, payload))
+        return True
+    except Exception as e:
+        print(f"Error saving {filename}: {e}")
+        return False
+
+
+async def aload_json_view(filename: str, default: Any = None) -> Any:
+    """Async ``load_json_view`` that does not block the event loop."""
+    return await run_io(load_json_view, filename, default)
+
+
+async def aappend_json(filename: str, item: Any, journal: bool = False) -> bool:
+    """Async ``append_json`` that does not block the event loop."""
+    if _group_committer is None or not journal:
+        return await run_io(append_json, filename, item, journal)
+    try:
+        await run_io(_seed_journal, filename)
+        payload = _encode_line(item)
+        await asyncio.wrap_future(_group_committer.submit("append", journal_path(filename), payload))
+        return True
+    except Exception as e:
+        print(f"Error appending to {filename}: {e}")
+        return False
+
+
+async def aread_last(filename: str, n: int) -> List[Any]:
+    """Async ``read_last`` that does not block the event loop."""
+    return await run_io(read_last, filename, n)
+
+
+async def aupdate_json(filename: str, update: Callable[[Any], Any], default: Any = None) -> bool:
+    """Async ``update_json`` that does not block the event loop."""
+    return await run_io(update_json, filename, update, default)
+
+
+async def aload_records(filename: str) -> List[Any]:
+    """Async ``load_records`` that does not block the event loop."""
+    return await run_io(load_records, filename)
+
+
+def main(argv: List[str] = None) -> None:
+    """Command line entry point for data file maintenance."""
+    parser = argparse.ArgumentParser(prog="python -m shared.tools.file_ops")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="export journals to JSON array files")
+    compact.add_argument("filenames", nargs="+", help="e.g. day7_orders.json")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        for filename in args.filenames:
+            count = compact_journal(filename)
+            print(f"{filename}: {count} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Offline semantic search with hashed n-gram vectors.
+
+Keyword search misses paraphrases ("if else" for the conditionals concept,
+"choc cookie" for "Chocolate Cookies"). ``VectorIndex`` embeds each passage
+without any model or network: stemmed words, word pairs and character
+trigrams are hashed into a fixed number of dimensions, weighted by how rare
+they are, and normalized, so cosine similarity is a dot product. With NumPy
+the passages are rows of one matrix and a query costs a single
+matrix-vector product; without it the same scores come from sparse vectors.
+
+Surface features cannot know that "how much is it" means pricing, so
+queries are first expanded with ``ALIASES``, a small table of everyday
+phrasings and the words the content uses for them. ``best()`` only returns
+a match that clearly beats the runner-up, so a query the index does not
+understand gets no answer rather than a confident wrong one.
+
+The indexes the agents use are listed in ``SOURCES``, built by
+``prewarm()`` in the worker's prewarm step and fetched with ``get()``. They
+are rebuilt when ``shared.reload`` swaps in a changed data file.
+"""
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with the livekit plugins
+    np = None
+
+from shared import reload
+from shared.fuzzy import trigrams
+from shared.retrieval import QUESTION_WEIGHT, analyze
+
+logger = logging.getLogger("agent.vectors")
+
+# Hashed feature dimensions; a power of two
+DIMENSIONS = 1024
+
+# Weight of each kind of feature before idf weighting
+WORD_WEIGHT = 1.0
+PAIR_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25
+
+# Query vectors kept per index
+QUERY_CACHE_SIZE = 256
+
+# Matches below this cosine similarity are not worth reading out
+MIN_SIMILARITY = 0.15
+
+# How much more similar than the runner-up a match must be for ``best()``,
+# as a fraction of its own score
+MIN_MARGIN = 0.3
+
+# Everyday phrasings -> the words the content uses for them
+ALIASES: Dict[str, str] = {
+    "how much": "pricing price plans",
+    "cost": "pricing price plans",
+    "costs": "pricing price plans",
+    "expensive": "pricing price plans",
+    "cheap": "pricing price free",
+    "afford": "pricing price",
+    "pay": "pricing plans",
+    "subscription": "pricing plans",
+    "repeat": "loops",
+    "iterate": "loops",
+    "decide": "conditionals if else",
+    "decision": "conditionals if else",
+    "store a value": "variables",
+}
+
+_ALIAS_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, ALIASES), key=len, reverse=True)) + r")\b"
+)
+
+
+def expand(query: str) -> str:
+    """Add the ``ALIASES`` of the phrasings a query uses to it."""
+    found = dict.fromkeys(ALIASES[match] for match in _ALIAS_PATTERN.findall(query.lower()))
+    return " ".join([query, *found]) if found else query
+
+
+def features(text: str) -> Dict[str, float]:
+    """Get the weighted features of a text: stemmed words (as used by the
+    keyword index), adjacent word pairs and each word's character trigrams."""
+    words = analyze(text)
+    found: Dict[str, float] = {}
+    for word in words:
+        found["w:" + word] = found.get("w:" + word, 0.0) + WORD_WEIGHT
+        for gram in trigrams(word):
+            found["c:" + gram] = found.get("c:" + gram, 0.0) + TRIGRAM_WEIGHT
+    for pair in zip(words, words[1:]):
+        key = "p:" + " ".join(pair)
+        found[key] = found.get(key, 0.0) + PAIR_WEIGHT
+    return found
+
+
+def hash_features(text: str, dimensions: int = DIMENSIONS) -> Dict[int, float]:
+    """Hash a text's features into a sparse ``dimension -> value`` vector.
+
+    crc32 is stable across processes (unlike ``hash``), and its top bit
+    gives each feature a sign so collisions tend to cancel out.
+    """
+    vector: Dict[int, float] = {}
+    for feature, weight in features(text).items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        dim = h % dimensions
+        vector[dim] = vector.get(dim, 0.0) + (weight if h >> 31 else -weight)
+    return vector
+
+
+class VectorIndex:
+    """Cosine-similarity index over hashed n-gram vectors of short texts.
+
+    Args:
+        entries: ``(key, text)`` pairs; searches return the keys
+        dimensions: Hashed feature dimensions
+        cache_size: Query vectors kept in the LRU cache
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[Any, str]],
+        dimensions: int = DIMENSIONS,
+        cache_size: int = QUERY_CACHE_SIZE,
+    ) -> None:
+        self.dimensions = dimensions
+        self.keys: List[Any] = []
+        rows: List[Dict[int, float]] = []
+        for key, text in entries:
+            row = hash_features(text, dimensions)
+            if row:
+                self.keys.append(key)
+                rows.append(row)
+
+        n = len(rows)
+        df: Dict[int, int] = {}
+        for row in rows:
+            for dim in row:
+                df[dim] = df.get(dim, 0) + 1
+        # Smoothed idf per dimension; dimensions no passage uses get the most
+        self._idf = [math.log((1 + n) / (1 + df.get(dim, 0))) + 1 for dim in range(dimensions)]
+        rows = [self._weigh(row) for row in rows]
+
+        self._use_numpy = np is not None
+        if self._use_numpy:
+            self._matrix = np.zeros((n, dimensions), dtype=np.float32)
+            for i, row in enumerate(rows):
+                self._matrix[i, list(row)] = list(row.values())
+        else:
+            # dimension -> (passage position, value)
+            self._columns: Dict[int, List[Tuple[int, float]]] = {}
+            for i, row in enumerate(rows):
+                for dim, value in row.items():
+                    self._columns.setdefault(dim, []).append((i, value))
+
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Dict[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _weigh(self, vector: Dict[int, float]) -> Dict[int, float]:
+        """Apply idf weights and scale to unit length."""
+        weighted = {dim: value * self._idf[dim] for dim, value in vector.items()}
+        norm = math.sqrt(sum(value * value for value in weighted.values()))
+        return {dim: value / norm for dim, value in weighted.items()} if norm else {}
+
+    def query_vector(self, query: str) -> Dict[int, float]:
+        """Get the unit vector of a query, from the LRU cache when possible."""
+        with self._lock:
+            vector = self._cache.get(query)
+            if vector is not None:
+                self._cache.move_to_end(query)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        vector = self._weigh(hash_features(expand(query), self.dimensions))
+        with self._lock:
+            self._cache[query] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vector
+
+    def search(self, query: str, limit: int = 3, min_score: float = 0.0) -> List[Tuple[Any, float]]:
+        """Find the texts most similar to a query.
+
+        Returns:
+            ``(key, cosine similarity)`` pairs, best first; ties keep entry
+            order
+        """
+        return self.search_many([query], limit, min_score)[0]
+
+    def best(
+        self, query: str, min_score: float = MIN_SIMILARITY, min_margin: float = MIN_MARGIN
+    ) -> Optional[Tuple[Any, float]]:
+        """Get the most similar text if it is similar enough and clearly
+        ahead of the next one.
+
+        Returns:
+            ``(key, cosine similarity)``, or None
+        """
+        results = self.search(query, limit=2, min_score=0.0)
+        if not results or results[0][1] < min_score:
+            return None
+        if len(results) > 1 and results[1][1] > results[0][1] * (1 - min_margin):
+            return None
+        return results[0]
+
+    def search_many(
+        self, queries: List[str], limit: int = 3, min_score: float = 0.0
+    ) -> List[List[Tuple[Any, float]]]:
+        """Search several queries at once; with NumPy this is one
+        matrix-matrix product.
+
+        Returns:
+            The results of each query, as ``search`` returns them
+        """
+        vectors = [self.query_vector(query) for query in queries]
+        if not self.keys or limit <= 0:
+            return [[] for _ in queries]
+        if not self._use_numpy:
+            return [self._top(self._sparse_scores(vector), limit, min_score) for vector in vectors]
+
+        batch = np.zeros((self.dimensions, len(vectors)), dtype=np.float32)
+        for j, vector in enumerate(vectors):
+            batch[list(vector), j] = list(vector.values())
+        scores = self._matrix @ batch
+        results = []
+        for j, vector in enumerate(vectors):
+            column = scores[:, j]
+            if not vector:
+                results.append([])
+                continue
+            if limit < len(column):
+                candidates = np.argpartition(-column, limit - 1)[:limit]
+                # Keep passages tied with the last candidate, for entry
+                # order; passages with no similarity are never returned
+                candidates = np.flatnonzero(column >= max(column[candidates].min(), 1e-9))
+            else:
+                candidates = range(len(column))
+            results.append(self._top({int(i): float(column[i]) for i in candidates}, limit, min_score))
+        return results
+
+    def _sparse_scores(self, vector: Dict[int, float]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for dim, value in vector.items():
+            for i, weight in self._columns.get(dim, ()):
+                scores[i] = scores.get(i, 0.0) + value * weight
+        return scores
+
+    def _top(self, scores: Dict[int, float], limit: int, min_score: float) -> List[Tuple[Any, float]]:
+        ranked = sorted(scores.items(), key=lambda pair: (-round(pair[1], 6), pair[0]))[:limit]
+        return [(self.keys[i], round(score, 3)) for i, score in ranked if score > 0 and score >= min_score]
+
+
+def _faq_entries(faq_data: Dict[str, Any]) -> Iterable[Tuple[Any, str]]:
+    # Keyed by the entries themselves, so results stay valid across reloads
+    for item in faq_data.get("faq", []):
+        yield item, " ".join([item.get("question", "")] * QUESTION_WEIGHT + [item.get("answer", "")])
+
+
+def _concept_entries(concepts: List[Dict[str, Any]]) -> Iterable[Tuple[Any, str]]:
+    for concept in concepts:
+        text = " ".join(concept.get(field, "") for field in ("id", "title", "title", "summary", "sample_question"))
+        yield concept.get("id"), text
+
+
+# Index name -> (data file, function listing its (key, text) entries)
+SOURCES: Dict[str, Tuple[str, Callable[[Any], Iterable[Tuple[Any, str]]]]] = {
+    "faq": ("day5_company_faq.json", _faq_entries),
+    "concepts": ("day4_tutor_content.json", _concept_entries),
+}
+
+_indexes: Dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _build(name: str, data: Any) -> VectorIndex:
+    start = time.perf_counter()
+    index = VectorIndex(SOURCES[name][1](data) if data is not None else ())
+    logger.info(f"Built the {name} vector index ({len(index)} entries) in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return index
+
+
+def _load(name: str) -> VectorIndex:
+    """Build an index from its data file, and rebuild it when the file is reloaded."""
+    source = reload.watch(SOURCES[name][0])
+    index = _build(name, source.current.data)
+    with _indexes_lock:
+        if name not in _indexes:
+            source.subscribe(lambda snapshot: _swap(name, _build(name, snapshot.data)))
+        _indexes[name] = index
+    return index
+
+
+def _swap(name: str, index: VectorIndex) -> None:
+    with _indexes_lock:
+        _indexes[name] = index
+
+
+def prewarm(names: Optional[Iterable[str]] = None) -> Dict[str, VectorIndex]:
+    """Build vector indexes ahead of the first job (all of ``SOURCES`` by default)."""
+    return {name: _load(name) for name in names or SOURCES}
+
+
+def get(name: str) -> VectorIndex:
+    """Get a vector index, building it now if prewarm did not."""
+    with _indexes_lock:
+        index = _indexes.get(name)
+    return index if index is not None else _load(name)
@@ -0,0 +1,178 @@
+import random
+
+import pytest
+
+from shared.catalog import CatalogIndex, FacetIndex, ProductCatalog
+
+ITEMS = [
+    {"id": "bread-white", "name": "White Bread", "brand": "FreshBake", "category": "groceries", "tags": ["vegetarian"]},
+    {"id": "bread-wholewheat", "name": "Whole Wheat Bread", "brand": "HealthyLoaf", "category": "groceries", "tags": ["healthy"]},
+    {"id": "peanut-butter", "name": "Peanut Butter", "brand": "NuttyDelight", "category": "groceries", "tags": ["vegan"]},
+    {"id": "cookies", "name": "Chocolate Cookies", "brand": "SweetTreat", "category": "snacks", "tags": ["vegetarian"]},
+    {"id": "bread-pudding", "name": "Bread Pudding", "brand": "SweetTreat", "category": "prepared_food", "tags": []},
+    {"id": "bread", "name": "Bread", "brand": "FreshBake", "category": "groceries", "tags": []},
+]
+
+
+@pytest.fixture
+def index() -> CatalogIndex:
+    return CatalogIndex(ITEMS)
+
+
+def ids(items) -> list:
+    return [item["id"] for item in items]
+
+
+def test_ranks_exact_then_prefix_then_token(index) -> None:
+    """Exact name matches beat name prefixes, which beat word matches."""
+    assert ids(index.search("bread")) == [
+        "bread", "bread-pudding", "bread-white", "bread-wholewheat",
+    ]
+
+
+def test_name_prefix_ties_keep_catalog_order() -> None:
+    """Items whose names start with the query come in catalog order, not
+    alphabetically."""
+    index = CatalogIndex([
+        {"id": "milk-toned", "name": "Milk Toned"},
+        {"id": "milk-almond", "name": "Milk Almond"},
+        {"id": "milk-full", "name": "Milk Full Cream"},
+    ])
+    assert ids(index.search("milk")) == ["milk-toned", "milk-almond", "milk-full"]
+    assert ids(index.search("milk", limit=2)) == ["milk-toned", "milk-almond"]
+
+
+def test_name_prefix_tier_stops_at_limit() -> None:
+    """The prefix tier is read in catalog order and only until it is full."""
+    items = [{"id": f"milk-{i}", "name": f"Milk {999 - i:03d}", "category": "dairy"} for i in range(1000)]
+    index = CatalogIndex(items)
+    probes = []
+    has_any = index._has_any
+    index._has_any = lambda group, pos: probes.append(pos) or has_any(group, pos)
+    assert ids(index.search("milk", category="dairy", limit=3)) == ["milk-0", "milk-1", "milk-2"]
+    assert set(probes) == {0, 1, 2}
+
+
+def test_matches_word_prefixes_brand_and_tags(index) -> None:
+    """Query words may be prefixes of name, brand or tag words."""
+    assert ids(index.search("choc")) == ["cookies"]
+    assert ids(index.search("nuttydelight")) == ["peanut-butter"]
+    assert ids(index.search("veg")) == ["bread-white", "peanut-butter", "cookies"]
+    assert ids(index.search("Whole-Wheat")) == ["bread-wholewheat"]
+
+
+def test_all_query_words_must_match(index) -> None:
+    """Multi-word queries only return items matching every word."""
+    assert ids(index.search("white bread")) == ["bread-white"]
+    assert index.search("white cookies") == []
+
+
+def test_category_filter_and_limit(index) -> None:
+    """The category filter is applied in every tier, and results are capped."""
+    assert ids(index.search("bread", category="Prepared Food")) == ["bread-pudding"]
+    assert index.search("bread", category="beverages") == []
+    assert len(index.search("bread", limit=2)) == 2
+
+
+def test_product_catalog_lookups() -> None:
+    """Products resolve by id, category and recipe without scanning."""
+    catalog = ProductCatalog.from_day7({
+        "categories": {"groceries": ITEMS[:3], "snacks": ITEMS[3:4]},
+        "recipes": {"pb_sandwich": {"name": "PB Sandwich", "items": ["peanut-butter", "missing", "bread-white"]}},
+    })
+
+    assert catalog.get("cookies")["name"] == "Chocolate Cookies"
+    assert catalog.get("missing") is None
+    assert ids(catalog.in_category("Groceries")) == ["bread-white", "bread-wholewheat", "peanut-butter"]
+    assert ids(catalog.recipe_items["pb_sandwich"]) == ["peanut-butter", "bread-white"]
+
+
+def test_recipe_bundles() -> None:
+    """Recipes are resolved to items, default quantities and a total at load."""
+    items = [dict(item, price=price) for item, price in zip(ITEMS, (45, 55, 180))]
+    catalog = ProductCatalog.from_day7({
+        "categories": {"groceries": items},
+        "recipes": {"pb_sandwich": {
+            "name": "PB Sandwich",
+            "items": ["peanut-butter", "missing", "bread-white"],
+            "quantities": {"bread-white": 2},
+        }},
+    })
+
+    bundle = catalog.bundles["pb_sandwich"]
+    assert bundle.name == "PB Sandwich"
+    assert [(item["id"], quantity) for item, quantity in bundle.lines] == [("peanut-butter", 1), ("bread-white", 2)]
+    assert bundle.total == 180 + 2 * 45
+    assert bundle.missing == ["missing"]
+
+
+PRODUCTS = [
+    {"id": "mug-1", "category": "mug", "color": "white", "price": 800},
+    {"id": "mug-2", "category": "mug", "color": "Blue", "price": 750},
+    {"id": "hoodie-1", "category": "hoodie", "color": "black", "price": 1999},
+    {"id": "hoodie-2", "category": "hoodie", "color": "navy", "price": 2499},
+    {"id": "hoodie-3", "category": "hoodie", "color": "black", "price": 1799},
+    {"id": "tee-1", "category": "tshirt", "color": "black", "price": 599},
+]
+
+
+def test_facet_filters_and_counts() -> None:
+    """Filters intersect, and counts cover every match, not just those returned."""
+    facets = FacetIndex(PRODUCTS)
+
+    hoodies = facets.filter({"category": "Hoodie"}, limit=2)
+    assert ids(hoodies.products) == ["hoodie-1", "hoodie-2"]
+    assert hoodies.total == 3
+    assert hoodies.counts["color"] == {"black": 2, "navy": 1}
+
+    assert ids(facets.filter({"color": "BLACK"}, max_price=1999).products) == ["hoodie-1", "hoodie-3", "tee-1"]
+    assert ids(facets.filter({"color": "blue"}).products) == ["mug-2"]
+    assert facets.filter({"category": "mug", "color": "black"}).total == 0
+    assert facets.filter({"category": "hat"}).total == 0
+    assert facets.filter(max_price=100).total == 0
+    assert facets.filter().counts["category"] == {"hoodie": 3, "mug": 2, "tshirt": 1}
+
+
+def test_facet_filter_matches_a_scan() -> None:
+    """Every combination of filters returns what a linear scan would."""
+    rng = random.Random(7)
+    products = [
+        {"id": str(i), "category": rng.choice("abcd"), "color": rng.choice("xyz"), "price": rng.randrange(100)}
+        for i in range(300)
+    ]
+    facets = FacetIndex(products)
+    for category in (None, "a", "d"):
+        for color in (None, "x"):
+            for max_price in (None, 5, 60):
+                expected = [
+                    p for p in products
+                    if (category is None or p["category"] == category)
+                    and (color is None or p["color"] == color)
+                    and (max_price is None or p["price"] <= max_price)
+                ]
+                result = facets.filter({"category": category, "color": color}, max_price=max_price, limit=1000)
+                assert result.products == expected
+                assert result.total == len(expected)
+                assert sum(result.counts.get("color", {}).values()) == len(expected)
+
+
+def test_facet_filter_pages_with_after() -> None:
+    """Paging with ``after`` walks every match once, on both price paths."""
+    rng = random.Random(9)
+    products = [
+        {"id": str(i), "category": rng.choice("ab"), "color": "x", "price": rng.randrange(1000)}
+        for i in range(500)
+    ]
+    facets = FacetIndex(products)
+    # Narrow price ranges take the sorted-positions path, wide ones the bitmaps
+    for max_price in (None, 5, 700):
+        expected = facets.filter({"category": "a"}, max_price=max_price, limit=1000).products
+        paged, after = [], -1
+        while True:
+            page = facets.filter({"category": "a"}, max_price=max_price, limit=7, after=after)
+            assert page.total == len(expected)
+            if not page.products:
+                break
+            paged.extend(page.products)
+            after = page.positions[-1]
+        assert paged == expected
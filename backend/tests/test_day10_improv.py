@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from agents import day10_improv
+from agents.day10_improv import ImprovHostAgent, ImprovSession
+
+
+def _no_job_context():
+    """``get_job_context`` as in livekit-agents 1.3: no arguments, raises
+    outside a job."""
+    raise RuntimeError("no job context found")
+
+
+async def test_player_name_from_room_metadata(monkeypatch) -> None:
+    """The name in the room metadata wins over the one in the session."""
+    room = SimpleNamespace(metadata='{"player_name": "Asha"}')
+    monkeypatch.setattr(day10_improv, "get_job_context", lambda: SimpleNamespace(room=room))
+    context = SimpleNamespace(userdata=ImprovSession(player_name="Ben"))
+    assert await ImprovHostAgent.get_player_name(None, context) == "Asha"
+
+
+async def test_player_name_without_job_context(monkeypatch) -> None:
+    """Outside a job the session's name, then a placeholder, is used."""
+    monkeypatch.setattr(day10_improv, "get_job_context", _no_job_context)
+    context = SimpleNamespace(userdata=ImprovSession(player_name="Ben"))
+    assert await ImprovHostAgent.get_player_name(None, context) == "Ben"
+    context.userdata.player_name = None
+    assert await ImprovHostAgent.get_player_name(None, context) == "Contestant"
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from livekit.agents.llm import utils
+from livekit.plugins.google.utils import _GeminiJsonSchema
+
+from agents.day7_food import CATALOG, FoodOrderingAgent, FoodSession
+from shared.pagination import encode_cursor
+
+
+def test_add_items_schema_describes_item_fields() -> None:
+    """Each item in the tool schema is an object with properties Gemini keeps."""
+    model = utils.function_arguments_to_pydantic_model(FoodOrderingAgent().add_items_to_cart)
+    schema = _GeminiJsonSchema(model.model_json_schema()).simplify()
+    item = schema["properties"]["items"]["items"]
+    assert set(item["properties"]) == {"item_id", "quantity"}
+    assert item["required"] == ["item_id"]
+
+
+async def test_add_items_validates_each_entry() -> None:
+    """Bad entries are reported without stopping the good ones."""
+    item_id = next(iter(CATALOG.current.indexes["lookup"].by_id))
+    context = SimpleNamespace(userdata=FoodSession())
+    result = await FoodOrderingAgent.add_items_to_cart(
+        None, context, items=[{"item_id": item_id, "quantity": 2}, "eggs", {"item_id": "nope"}, {"item_id": item_id, "quantity": 0}]
+    )
+    assert [line["quantity"] for line in context.userdata.cart] == [2]
+    assert "'eggs' is not an item_id" in result and "'nope' was not found" in result
+    assert "at least 1" in result
+
+
+async def test_search_tells_stale_cursors_from_malformed_ones() -> None:
+    """Only a cursor from another catalog version is reported as expired."""
+    context = SimpleNamespace(userdata=FoodSession())
+    stale = encode_cursor("old-version", q="bread", c=None, o=5)
+    result = await FoodOrderingAgent.search_catalog(None, context, cursor=stale)
+    assert "catalog was updated" in result
+    result = await FoodOrderingAgent.search_catalog(None, context, cursor="not a cursor!")
+    assert "not valid" in result and "catalog was updated" not in result
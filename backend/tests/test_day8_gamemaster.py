@@ -0,0 +1,66 @@
+import pytest
+
+from agents import day8_gamemaster
+from agents.day8_gamemaster import DEFAULT_WORLD, WorldTemplate, world_template
+from shared import reload
+from shared.tools import file_ops
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(reload, "_watched", {})
+    monkeypatch.setattr(day8_gamemaster, "_template", None)
+    return tmp_path
+
+
+def containers(value, found=None) -> dict:
+    """Every list and dict in a nested structure, by id."""
+    found = {} if found is None else found
+    if isinstance(value, (list, dict)):
+        found[id(value)] = value
+    children = value.values() if isinstance(value, dict) else value if isinstance(value, (list, tuple)) else ()
+    for child in children:
+        containers(child, found)
+    return found
+
+
+def test_new_worlds_share_no_containers() -> None:
+    """Copies share no nested list or dict with the template or each other."""
+    template = WorldTemplate(DEFAULT_WORLD)
+    first, second = template.new_world(), template.new_world()
+    assert first == second
+    assert len(containers(first)) > 1
+
+    first_ids, second_ids = containers(first).keys(), containers(second).keys()
+    assert not first_ids & second_ids
+    assert not (first_ids | second_ids) & containers(template.world).keys()
+    assert not (first_ids | second_ids) & containers(DEFAULT_WORLD).keys()
+
+
+def test_changing_a_copy_leaves_the_template_alone() -> None:
+    """A session's changes are not seen by the template or later sessions."""
+    template = WorldTemplate(DEFAULT_WORLD)
+    world = template.new_world()
+    for value in containers(world).values():
+        if isinstance(value, list):
+            value.append("changed")
+        else:
+            value["changed"] = True
+    assert template.new_world() == WorldTemplate(DEFAULT_WORLD).new_world()
+    assert template.new_world() != world
+
+
+def test_template_is_rebuilt_after_reload() -> None:
+    """The template is parsed once and again only when the file changes."""
+    file_ops.save_json(day8_gamemaster.WORLD_STATE_FILE.name, {"location": "cave"})
+    template = world_template()
+    assert world_template() is template
+    assert template.new_world() == {"location": "cave"}
+
+    file_ops.save_json(day8_gamemaster.WORLD_STATE_FILE.name, {"location": "castle"})
+    assert reload.check_all() == 1
+    rebuilt = world_template()
+    assert rebuilt is not template
+    assert rebuilt.new_world() == {"location": "castle"}
+    assert template.new_world() == {"location": "cave"}
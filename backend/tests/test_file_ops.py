@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from shared.tools import file_ops
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+def test_journal_append_imports_legacy_array(data_dir) -> None:
+    """The first journaled append keeps records from the existing array file."""
+    file_ops.save_json("orders.json", [{"id": 1}, {"id": 2}])
+
+    assert file_ops.append_json("orders.json", {"id": 3}, journal=True)
+
+    lines = (data_dir / "orders.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+    assert [r["id"] for r in file_ops.load_records("orders.json")] == [1, 2, 3]
+
+
+def test_iter_records_skips_torn_line(data_dir) -> None:
+    """A partially written trailing line does not hide earlier records."""
+    file_ops.append_json("orders.json", {"id": 1}, journal=True)
+    with open(data_dir / "orders.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": 2')
+
+    assert [r["id"] for r in file_ops.iter_records("orders.json")] == [1]
+
+
+def test_compact_exports_legacy_array(data_dir) -> None:
+    """Compaction produces an array file readable through load_json."""
+    for i in range(3):
+        file_ops.append_json("orders.json", {"id": i}, journal=True)
+
+    assert file_ops.compact_journal("orders.json") == 3
+    assert file_ops.load_json("orders.json") == [{"id": 0}, {"id": 1}, {"id": 2}]
+    assert len(file_ops.load_records("orders.json")) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_api_round_trip() -> None:
+    """The async counterparts read and write the same files."""
+    assert await file_ops.asave_json("cases.json", [{"userName": "a"}])
+    assert await file_ops.aload_json("cases.json") == [{"userName": "a"}]
+
+    assert await file_ops.aappend_json("orders.json", {"id": 1}, journal=True)
+    assert await file_ops.aload_records("orders.json") == [{"id": 1}]
+
+
+def test_save_json_replaces_atomically(data_dir) -> None:
+    """Saving leaves no temp files behind and never a partial target."""
+    file_ops.save_json("orders.json", [{"id": 1}])
+    file_ops.save_json("orders.json", [{"id": 2}])
+
+    assert file_ops.load_json("orders.json") == [{"id": 2}]
+    assert not list(data_dir.glob("*.tmp"))
+
+
+def test_load_json_keeps_corrupt_copy(data_dir) -> None:
+    """A truncated file is preserved before the default is returned."""
+    (data_dir / "orders.json").write_text('[{"id": 1}, {"id"', encoding="utf-8")
+
+    assert file_ops.load_json("orders.json", default=[]) == []
+    assert (data_dir / "orders.json.corrupt").exists()
+
+
+@pytest.mark.asyncio
+async def test_group_commit_coalesces_concurrent_appends() -> None:
+    """Appends from concurrent sessions share one batch."""
+    committer = file_ops.enable_group_commit(window_ms=20)
+    try:
+        results = await asyncio.gather(
+            *(file_ops.aappend_json("orders.json", {"id": i}, journal=True) for i in range(10))
+        )
+    finally:
+        file_ops.disable_group_commit()
+
+    assert all(results)
+    assert committer.batches == 1
+    assert sorted(r["id"] for r in file_ops.load_records("orders.json")) == list(range(10))
+
+
+def test_group_commit_survives_a_failed_fsync(data_dir, monkeypatch) -> None:
+    """A batch whose directory fsync fails fails its writes; later ones commit."""
+    fsync_dir = file_ops._fsync_dir
+    failures = [OSError("disk on fire")]
+
+    def flaky_fsync_dir(dirpath):
+        if failures:
+            raise failures.pop()
+        fsync_dir(dirpath)
+
+    monkeypatch.setattr(file_ops, "_fsync_dir", flaky_fsync_dir)
+    committer = file_ops.enable_group_commit(window_ms=1)
+    try:
+        failed = committer.submit("save", data_dir / "a.json", b"{}")
+        with pytest.raises(OSError, match="disk on fire"):
+            failed.result(timeout=5)
+        assert file_ops.save_json("b.json", {"ok": True})
+        assert file_ops.append_json("log.json", {"id": 1}, journal=True)
+    finally:
+        file_ops.disable_group_commit()
+
+    assert file_ops.load_json("b.json") == {"ok": True}
+    assert committer.writes == 2
+
+
+def test_load_json_view_is_cached_and_read_only(data_dir) -> None:
+    """Unchanged files are parsed once; writes invalidate the entry."""
+    file_ops.read_cache.clear()
+    file_ops.save_json("cases.json", [{"userName": "a"}])
+    before = file_ops.cache_stats()
+
+    first = file_ops.load_json_view("cases.json")
+    second = file_ops.load_json_view("cases.json")
+    assert first is second
+    with pytest.raises(TypeError):
+        first[0]["case"] = "confirmed_fraud"
+
+    file_ops.save_json("cases.json", [{"userName": "b"}])
+    assert file_ops.load_json_view("cases.json")[0]["userName"] == "b"
+
+    stats = file_ops.cache_stats()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+
+
+def test_read_cache_evicts_least_recently_used(tmp_path) -> None:
+    """The cache stays within its entry bound."""
+    cache = file_ops.ReadCache(max_entries=2)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("[]", encoding="utf-8")
+        cache.get(tmp_path / name, file_ops._parse_json)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_update_json_serializes_concurrent_writers() -> None:
+    """Read-modify-write cycles under the file lock do not lose updates."""
+    file_ops.save_json("counter.json", {"n": 0})
+
+    def _increment(data):
+        data["n"] += 1
+        return data
+
+    def _worker() -> None:
+        for _ in range(25):
+            assert file_ops.update_json("counter.json", _increment)
+
+    threads = [threading.Thread(target=_worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert file_ops.load_json("counter.json") == {"n": 100}
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 2000])
+def test_read_last_matches_full_read(monkeypatch, count) -> None:
+    """Tail reads agree with slicing the full history, across block edges."""
+    monkeypatch.setattr(file_ops, "READ_LAST_BLOCK", 64)
+    for i in range(count):
+        file_ops.append_json("log.json", {"id": i, "note": "x" * (i % 50)}, journal=True)
+
+    for n in (1, 3, 10):
+        assert file_ops.read_last("log.json", n) == file_ops.load_records("log.json")[-n:]
+
+
+def test_read_last_skips_torn_line(data_dir) -> None:
+    """A partial final line is ignored by tail reads."""
+    file_ops.append_json("log.json", {"id": 1}, journal=True)
+    with open(data_dir / "log.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": 2')
+
+    assert file_ops.read_last("log.json", 2) == [{"id": 1}]
+
+
+def test_read_last_handles_records_larger_than_a_block(monkeypatch) -> None:
+    """Records longer than the read block are reassembled."""
+    monkeypatch.setattr(file_ops, "READ_LAST_BLOCK", 16)
+    records = [{"id": i, "note": "y" * 100} for i in range(3)]
+    for record in records:
+        file_ops.append_json("log.json", record, journal=True)
+
+    assert file_ops.read_last("log.json", 2) == records[1:]
+
+
+def test_key_index_reads_only_new_appends(data_dir) -> None:
+    """The key index picks up appends and survives a rewrite of the journal."""
+    index = file_ops.JournalKeyIndex("user", str.lower)
+    journal = data_dir / "orders.jsonl"
+    file_ops.append_json("orders.json", {"id": 1, "user": "Asha"}, journal=True)
+    file_ops.append_json("orders.json", {"id": 2, "user": "ravi"}, journal=True)
+
+    assert [r["id"] for r in index.lookup(journal, "asha")] == [1]
+
+    file_ops.append_json("orders.json", {"id": 3, "user": "ASHA"}, journal=True)
+    assert [r["id"] for r in index.lookup(journal, "asha")] == [1, 3]
+
+    file_ops.write_records("orders.json", [{"id": 4, "user": "asha"}])
+    assert [r["id"] for r in index.lookup(journal, "asha")] == [4]
+    assert index.lookup(journal, "ravi") == []
+
+
+def test_key_index_drops_cold_journals(data_dir) -> None:
+    """Only the most recently used journals stay indexed."""
+    index = file_ops.JournalKeyIndex("user", max_journals=2)
+    for day in range(1, 4):
+        file_ops.append_json(f"log-{day}.json", {"user": "asha", "day": day}, journal=True)
+        assert [r["day"] for r in index.lookup(data_dir / f"log-{day}.jsonl", "asha")] == [day]
+    assert list(index._journals) == [data_dir / "log-2.jsonl", data_dir / "log-3.jsonl"]
+    assert [r["day"] for r in index.lookup(data_dir / "log-1.jsonl", "asha")] == [1]
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from shared import fuzzy
+from shared.fuzzy import FuzzyIndex, metaphone
+from shared.text import tokenize
+
+NAMES = [
+    ("paneer", "Fresh Paneer"),
+    ("bread-wholewheat", "Whole Wheat Bread"),
+    ("bread-white", "White Bread"),
+    ("peanut-butter", "Peanut Butter"),
+    ("cookies", "Chocolate Cookies"),
+    ("sauce", "Tomato Pasta Sauce"),
+]
+
+
+@pytest.mark.parametrize("heard, meant", [
+    ("panir", "paneer"), ("weet", "wheat"), ("buter", "butter"),
+    ("choclate", "chocolate"), ("yoghurt", "yogurt"), ("fone", "phone"),
+])
+def test_metaphone_matches_common_mishearings(heard, meant) -> None:
+    """Misheard spellings share the phonetic key of the real word."""
+    assert metaphone(heard) == metaphone(meant)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("panir", "paneer"),
+    ("whole weet bread", "bread-wholewheat"),
+    ("peanut buter", "peanut-butter"),
+    ("choclate cookie", "cookies"),
+])
+def test_search_corrects_misheard_queries(query, expected) -> None:
+    """The intended item ranks first."""
+    assert FuzzyIndex(NAMES).search(query, budget_ms=None)[0][0] == expected
+
+
+def test_search_ignores_unrelated_queries() -> None:
+    """Words with no similar vocabulary word match nothing."""
+    assert FuzzyIndex(NAMES).search("xyz") == []
+
+
+def test_search_matches_brute_force_ranking(monkeypatch) -> None:
+    """Ranked scores equal a full scan, with and without bitmaps."""
+    rng = random.Random(3)
+    words = ["paneer", "wheat", "bread", "whole", "fresh", "butter", "masala", "rice", "brand"]
+    names = [(i, " ".join(rng.sample(words, rng.randint(1, 4)))) for i in range(2000)]
+
+    for ratio in (64, 10**9):
+        monkeypatch.setattr(fuzzy, "BITMAP_RATIO", ratio)
+        index = FuzzyIndex(names)
+        for query in ["whole weet bread", "panir masala", "fresh"]:
+            similar = [dict(index.similar_words(word)) for word in tokenize(query)]
+            expected = sorted(
+                (round(sum(max((s.get(w, 0.0) for w in tokenize(name)), default=0.0) for s in similar) / len(similar), 3)
+                 for _, name in names),
+                reverse=True,
+            )[:5]
+            assert [score for _, score in index.search(query, budget_ms=None)] == expected
+
+
+def test_search_respects_budget() -> None:
+    """An exhausted budget returns early instead of finishing the search."""
+    assert FuzzyIndex(NAMES).search("panir", budget_ms=0) == []
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from livekit import rtc
+
+from shared import identity
+
+
+def _get_job_context():
+    """``get_job_context`` as in livekit-agents 1.3: no arguments, raises
+    outside a job."""
+    raise RuntimeError("no job context found")
+
+
+def test_no_job_context_is_anonymous(monkeypatch) -> None:
+    """Outside a job the user is anonymous instead of the lookup failing."""
+    monkeypatch.setattr(identity, "get_job_context", _get_job_context)
+    assert identity.get_user_key() == identity.ANONYMOUS_USER
+
+
+def test_user_key_from_job_room(monkeypatch) -> None:
+    """The current job's room gives the participant identity, then metadata."""
+    agent = SimpleNamespace(kind=rtc.ParticipantKind.PARTICIPANT_KIND_AGENT, identity="agent-1")
+    user = SimpleNamespace(kind=rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD, identity="asha")
+    room = SimpleNamespace(remote_participants={"a": agent, "u": user}, metadata="")
+    monkeypatch.setattr(identity, "get_job_context", lambda: SimpleNamespace(room=room))
+    assert identity.get_user_key() == "asha"
+
+    room.remote_participants = {"a": agent}
+    room.metadata = '{"user_id": "u-42"}'
+    assert identity.get_user_key() == "u-42"
@@ -0,0 +1,48 @@
+import pytest
+
+from shared.pagination import CursorError, OrderingCache, StaleCursorError, decode_cursor, describe_page, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    """A cursor gives back the fields it was made with."""
+    cursor = encode_cursor("abc123", q="peanut butter", c=None, o=5)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "abc123") == {"q": "peanut butter", "c": None, "o": 5}
+
+
+def test_cursor_from_another_version_is_stale() -> None:
+    """Cursors made before a reload raise StaleCursorError."""
+    cursor = encode_cursor("abc123", o=5)
+    with pytest.raises(StaleCursorError):
+        decode_cursor(cursor, "def456")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", encode_cursor("abc123")[:-3], "WzFd"])
+def test_malformed_cursor_is_not_stale(cursor) -> None:
+    """Cursors garbled by the LLM raise CursorError, not StaleCursorError."""
+    with pytest.raises(CursorError) as raised:
+        decode_cursor(cursor, "abc123")
+    assert not isinstance(raised.value, StaleCursorError)
+
+
+def test_ordering_cache_computes_once() -> None:
+    """Later pages reuse the ordering, and the oldest one is evicted first."""
+    cache = OrderingCache(max_entries=2)
+    calls = []
+
+    def compute(key: str):
+        return lambda: calls.append(key) or [key]
+
+    assert cache.get("a", compute("a")) == ["a"]
+    assert cache.get("a", compute("a")) == ["a"]
+    cache.get("b", compute("b"))
+    cache.get("c", compute("c"))
+    cache.get("a", compute("a"))
+    assert calls == ["a", "b", "c", "a"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_describe_page() -> None:
+    """Pages are described with 1-based ranges."""
+    assert describe_page(5, 5, 12) == "Showing 6-10 of 12"
+    assert describe_page(0, 5, 1000, capped=True) == "Showing 1-5 of 1000+"
@@ -0,0 +1,60 @@
+import pytest
+
+from shared import reload
+from shared.catalog import ProductCatalog
+from shared.tools import file_ops
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(reload, "_watched", {})
+    return tmp_path
+
+
+def catalog(*prices) -> dict:
+    return {"products": [
+        {"id": f"mug-{i}", "name": "Mug", "price": price, "category": "mug"} for i, price in enumerate(prices)
+    ]}
+
+
+def test_changed_file_is_swapped_in() -> None:
+    """A changed file gets a new snapshot; one already taken stays as it was."""
+    file_ops.save_json("day9_catalog.json", catalog(800))
+    watched = reload.watch("day9_catalog.json")
+    before = watched.current
+    swapped = []
+    watched.subscribe(swapped.append)
+
+    assert reload.check_all() == 0
+    file_ops.save_json("day9_catalog.json", catalog(950, 300))
+    assert reload.check_all() == 1
+
+    assert watched.current.indexes["lookup"].get("mug-0")["price"] == 950
+    assert watched.current.indexes["lookup"].get("mug-1") is not None
+    assert before.indexes["lookup"].get("mug-0")["price"] == 800
+    assert swapped == [watched.current] and watched.reloads == 1
+
+
+def test_unreadable_change_keeps_previous_snapshot(data_dir) -> None:
+    """A half-written file is ignored until the next change."""
+    file_ops.save_json("day9_catalog.json", catalog(800))
+    watched = reload.watch("day9_catalog.json")
+    before = watched.current
+
+    (data_dir / "day9_catalog.json").write_text('{"products": [', encoding="utf-8")
+    assert not watched.check()
+    assert watched.current is before
+
+
+def test_missing_file_uses_defaults_until_it_appears() -> None:
+    """Defaults and fallback indexes stand in for a missing file."""
+    empty = ProductCatalog()
+    watched = reload.watch("day9_catalog.json", default={"products": []}, fallback_indexes={"lookup": empty})
+    assert watched.current.data == {"products": []}
+    assert watched.current.indexes["lookup"] is empty
+    assert reload.watch("day9_catalog.json") is watched
+
+    file_ops.save_json("day9_catalog.json", catalog(800))
+    assert watched.check()
+    assert watched.current.indexes["lookup"].get("mug-0")["price"] == 800
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from shared.retrieval import BM25Index, analyze, faq_index
+from shared.tools import file_ops
+
+
+@pytest.fixture(scope="module")
+def faq() -> dict:
+    return json.loads((file_ops.DATA_DIR / "day5_company_faq.json").read_text())
+
+
+def question(faq, results) -> str:
+    return faq["faq"][results[0][0]]["question"]
+
+
+def test_analyze_drops_stopwords_and_inflections() -> None:
+    """Stopwords are dropped and word forms share a stem."""
+    assert analyze("What are your pricing plans?") == analyze("price plan")
+    assert analyze("integrations") == analyze("integrate")
+    assert analyze("what is it") == []
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("what is the price", "What are your pricing plans?"),
+    ("how do integrations work", "How does the integration work?"),
+    ("what can I automate", "What kind of automations can I create?"),
+    ("do you offer support", "Is there customer support?"),
+])
+def test_faq_answers_paraphrases(faq, query, expected) -> None:
+    """Paraphrased questions find their FAQ entry with high confidence."""
+    results = faq_index(faq).search(query)
+    assert question(faq, results) == expected
+    assert results[0][1] >= 0.25
+
+
+def test_stopword_only_and_unrelated_queries_find_nothing(faq) -> None:
+    """"what" no longer matches every question, and off-topic queries are not confident."""
+    index = faq_index(faq)
+    assert index.search("what") == []
+    assert index.search("tell me about the weather on mars", min_confidence=0.25) == []
+
+
+def test_rare_words_outrank_common_ones() -> None:
+    """A word in one passage counts for more than a word in all of them."""
+    index = BM25Index([
+        ("a", "plan plan plan team"),
+        ("b", "plan team enterprise"),
+        ("c", "plan team"),
+    ])
+    assert [key for key, _ in index.search("enterprise plan")] == ["b", "a", "c"]
+    assert all(0 < confidence < 1 for _, confidence in index.search("enterprise plan"))
+    assert index.search("plan", limit=1) == index.search("plan")[:1]
@@ -0,0 +1,151 @@
+import threading
+from typing import List
+
+from shared.session_store import SessionStore, all_stats, release_all
+from shared.state_backend import MemoryBackend
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_or_create_and_release() -> None:
+    """State is made once per session and dropped on release."""
+    store = SessionStore("test_carts", factory=list, ttl=0)
+    cart: List[str] = store.get_or_create("room-1")
+    cart.append("eggs")
+    assert store.get_or_create("room-1") == ["eggs"]
+    assert store.get("room-2") is None
+
+    assert store.release("room-1") == ["eggs"]
+    assert "room-1" not in store
+    assert store.get_or_create("room-1") == []
+    assert store.stats()["released"] == 1
+
+
+def test_idle_sessions_expire() -> None:
+    """Sessions idle for longer than the TTL are dropped on the next access."""
+    clock = FakeClock()
+    store = SessionStore("test_idle", factory=dict, ttl=60, clock=clock)
+    store.get_or_create("old")
+    clock.now = 30
+    store.get_or_create("recent")
+    clock.now = 61
+    assert store.get("recent") == {}
+    assert store.sessions() == ["recent"]
+    assert store.stats()["expired"] == 1
+
+
+def test_least_recently_used_is_evicted() -> None:
+    """A full store evicts the session used longest ago."""
+    store = SessionStore("test_lru", factory=dict, ttl=0, max_entries=2)
+    store.set("a", {"n": 1})
+    store.set("b", {"n": 2})
+    store.get("a")
+    store.set("c", {"n": 3})
+    assert store.sessions() == ["a", "c"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_gauges_and_release_all(caplog) -> None:
+    """Stats report live sessions and bytes; release_all empties every store
+    and logs the stats."""
+    carts = SessionStore("test_gauge_carts", factory=list, ttl=0)
+    worlds = SessionStore("test_gauge_worlds", factory=dict, ttl=0)
+    carts.get_or_create("room").extend(["x" * 1000])
+    worlds.get_or_create("room")["npcs"] = []
+
+    stats = all_stats()
+    assert stats["test_gauge_carts"]["sessions"] == 1
+    assert stats["test_gauge_carts"]["bytes"] > 1000
+
+    with caplog.at_level("INFO", logger="agent.sessions"):
+        release_all("room")
+    assert len(carts) == 0 and len(worlds) == 0
+    assert "Session store stats: {" in caplog.text and "test_gauge_worlds" in caplog.text
+
+
+def test_delta_log_replays_after_snapshot() -> None:
+    """Logged changes are compacted into snapshots and replayed on restore."""
+
+    def apply(cart: List[str], change: str) -> None:
+        cart.append(change)
+
+    backend = MemoryBackend()
+    store = SessionStore("test_log", factory=list, ttl=0, backend=backend, apply=apply, snapshot_every=3)
+    cart = store.get_or_create("room")
+    for item in ["eggs", "milk", "bread", "jam"]:
+        cart.append(item)
+        store.record("room", item)
+    assert store.stats()["saves"] == 1
+    assert len(backend.get_list("voice-agents:test_log:room:log")) == 1
+
+    restored = SessionStore("test_log", factory=list, ttl=0, backend=backend, apply=apply)
+    assert restored.restore("room") == ["eggs", "milk", "bread", "jam"]
+    restored.get("room").append("tea")
+    restored.record("room", "tea")
+    restored.release("room")
+    assert backend.get_list("voice-agents:test_log:room:log") == []
+    resumed = SessionStore("test_log", factory=list, ttl=0, backend=backend, apply=apply)
+    assert resumed.restore("room") == ["eggs", "milk", "bread", "jam", "tea"]
+
+
+def test_change_recorded_during_save_is_kept() -> None:
+    """A change recorded while a snapshot is being stored survives it."""
+
+    def apply(cart: List[str], change: str) -> None:
+        cart.append(change)
+
+    class RecordingBackend(MemoryBackend):
+        def put(self, key: str, value: bytes) -> None:
+            super().put(key, value)
+            # Another thread records a change between the snapshot and
+            # truncating the log
+            cart.append("milk")
+            recorder = threading.Thread(target=store.record, args=("room", "milk"))
+            recorder.start()
+            recorder.join(timeout=0.2)
+            threads.append(recorder)
+
+    threads: List[threading.Thread] = []
+    backend = RecordingBackend()
+    store = SessionStore("test_log_race", factory=list, ttl=0, backend=backend, apply=apply)
+    cart = store.get_or_create("room")
+    cart.append("eggs")
+    store.record("room", "eggs")
+    store.save("room")
+    threads[0].join()
+
+    restored = SessionStore("test_log_race", factory=list, ttl=0, backend=backend, apply=apply)
+    assert restored.restore("room") == ["eggs", "milk"]
+
+
+def test_logging_changes_keeps_a_session_alive() -> None:
+    """A session that only records changes is not expired by the TTL."""
+    clock = FakeClock()
+    backend = MemoryBackend()
+
+    def apply(cart: List[str], change: str) -> None:
+        cart.append(change)
+
+    store = SessionStore("test_log_ttl", factory=list, ttl=60, clock=clock, backend=backend, apply=apply)
+    cart = store.get_or_create("room")
+    for i in range(10):
+        clock.now += 30
+        cart.append(str(i))
+        store.record("room", str(i))
+        # Other rooms using the store expire idle sessions
+        store.get_or_create("other")
+    clock.now += 30
+    store.save("room")
+    clock.now += 30
+    store.get_or_create("other")
+    assert store.release("room") == [str(i) for i in range(10)]
+    assert store.stats()["expired"] == 0
+
+    restored = SessionStore("test_log_ttl", factory=list, ttl=60, backend=backend, apply=apply)
+    assert restored.restore("room") == [str(i) for i in range(10)]
@@ -0,0 +1,84 @@
+import gc
+import runpy
+import sys
+
+import pytest
+
+from shared import snapshots
+from shared.tools import file_ops
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+CATALOG = {"products": [{"id": "mug-001", "name": "Mug", "price": 800, "category": "mug"}]}
+
+
+def test_snapshot_round_trip(data_dir, monkeypatch) -> None:
+    """A built snapshot is loaded with its indexes instead of the JSON file."""
+    file_ops.save_json("day9_catalog.json", CATALOG)
+    snapshots.build_snapshot("day9_catalog.json")
+    monkeypatch.setattr(snapshots.json, "loads", lambda *args, **kwargs: pytest.fail("parsed JSON"))
+
+    snapshot = snapshots.load("day9_catalog.json")
+
+    assert snapshot.data == CATALOG
+    assert snapshot.indexes["lookup"].get("mug-001")["name"] == "Mug"
+    assert snapshots.snapshot_path("day9_catalog.json").exists()
+
+
+def test_stale_snapshot_falls_back_to_json(data_dir) -> None:
+    """Editing the JSON file after a build invalidates the snapshot."""
+    file_ops.save_json("day9_catalog.json", CATALOG)
+    snapshots.build_snapshot("day9_catalog.json")
+    updated = {"products": CATALOG["products"] + [{"id": "cap-001", "name": "Cap", "price": 500, "category": "hat"}]}
+    file_ops.save_json("day9_catalog.json", updated)
+
+    snapshot = snapshots.load("day9_catalog.json")
+
+    assert snapshot.data == updated
+    assert set(snapshot.indexes["lookup"].by_id) == {"mug-001", "cap-001"}
+
+
+def test_build_rejects_invalid_data(data_dir) -> None:
+    """The build fails on data that does not match the schema."""
+    file_ops.save_json("day9_catalog.json", {"products": [{"id": "mug-001", "name": "Mug", "price": "free"}]})
+
+    with pytest.raises(snapshots.SchemaError, match=r"\$\.products\[0\]"):
+        snapshots.build_snapshot("day9_catalog.json")
+    with pytest.raises(SystemExit):
+        snapshots.main(["build", "day9_catalog.json"])
+    assert not snapshots.snapshot_path("day9_catalog.json").exists()
+
+
+def test_load_returns_default_for_missing_file() -> None:
+    """A missing data file yields the default and no indexes."""
+    snapshot = snapshots.load("day9_catalog.json", default={"products": []})
+
+    assert snapshot.data == {"products": []} and snapshot.indexes == {}
+
+
+@pytest.mark.filterwarnings("ignore:.*found in sys.modules:RuntimeWarning")
+def test_command_line_build_is_loadable(data_dir, monkeypatch) -> None:
+    """Snapshots built by ``python -m shared.snapshots`` load in the agents."""
+    file_ops.save_json("day9_catalog.json", CATALOG)
+    monkeypatch.setattr(sys, "argv", ["shared.snapshots", "build", "day9_catalog.json"])
+    runpy.run_module("shared.snapshots", run_name="__main__")
+    monkeypatch.setattr(snapshots.json, "loads", lambda *args, **kwargs: pytest.fail("parsed JSON"))
+
+    assert snapshots.load("day9_catalog.json").data == CATALOG
+
+
+def test_load_does_not_freeze_objects(data_dir) -> None:
+    """Loading (and so every hot reload) leaves the permanent generation alone."""
+    file_ops.save_json("day9_catalog.json", CATALOG)
+    snapshots.build_snapshot("day9_catalog.json")
+    frozen = gc.get_freeze_count()
+    for _ in range(3):
+        snapshots.load("day9_catalog.json")
+        snapshots.load("day9_catalog.json", default={})
+    assert gc.get_freeze_count() == frozen
+    assert gc.isenabled()
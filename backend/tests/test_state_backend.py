@@ -0,0 +1,150 @@
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List
+
+import pytest
+
+from benchmarks.fake_redis import FakeRedisServer
+from shared import state_backend
+from shared.session_store import SessionStore
+from shared.state_backend import FileBackend, MemoryBackend, RedisBackend, RespConnection
+from shared.tools import file_ops
+
+
+@dataclass
+class Cart:
+    items: List[str] = field(default_factory=list)
+
+
+@pytest.fixture
+def server() -> Iterator[FakeRedisServer]:
+    server = FakeRedisServer().start()
+    yield server
+    server.stop()
+
+
+def test_resp_round_trip(server: FakeRedisServer) -> None:
+    """The client and the fake server agree on the protocol."""
+    host, port = server.server_address[:2]
+    conn = RespConnection(host, port)
+    assert conn.execute("PING") == "PONG"
+    assert conn.execute("SET", "k", b"\x00binary\r\n", "EX", 60) == "OK"
+    assert conn.execute("GET", "k") == b"\x00binary\r\n"
+    assert conn.execute("GET", "missing") is None
+    assert 0 < conn.execute("TTL", "k") <= 60
+    assert conn.pipeline([("DEL", "k"), ("EXISTS", "k")]) == [1, 0]
+    conn.close()
+
+
+def test_write_behind_coalesces_puts(server: FakeRedisServer) -> None:
+    """Puts between batches are sent once, and reads see unsent snapshots."""
+    backend = RedisBackend(server.url, interval=60)
+    for i in range(10):
+        backend.put("room-1", b"v%d" % i)
+    assert backend.get("room-1") == b"v9"
+    assert server.redis.commands == 0
+
+    assert backend.flush(timeout=5)
+    assert backend.batches == 1 and backend.writes == 1
+    assert RedisBackend(server.url).get("room-1") == b"v9"
+    backend.close()
+
+
+def test_session_resumes_on_another_node(server: FakeRedisServer) -> None:
+    """A session saved by one worker is restored by another."""
+    first = SessionStore("test_carts", factory=Cart, ttl=0, backend=RedisBackend(server.url))
+    cart = first.get_or_create("room-1")
+    cart.items.append("eggs")
+    first.save("room-1", cart)
+    first.release("room-1")
+    assert first.backend.flush(timeout=5)
+
+    second = SessionStore("test_carts", factory=Cart, ttl=0, backend=RedisBackend(server.url))
+    assert second.restore("room-1") == Cart(items=["eggs"])
+    assert second.restore("room-2") is None
+    assert second.get_or_create("room-2") == Cart()
+
+
+async def test_memory_backend_restores_in_process() -> None:
+    """The default backend resumes a released session in the same process."""
+    store = SessionStore("test_memory", factory=Cart, ttl=0, backend=MemoryBackend())
+    (await store.aget_or_create("room")).items.append("milk")
+    store.release("room")
+    assert "room" not in store
+    assert (await store.aget_or_create("room")).items == ["milk"]
+
+
+def test_write_behind_keeps_list_order(server: FakeRedisServer) -> None:
+    """A delete and the appends around it run in the order they were made."""
+    backend = RedisBackend(server.url, interval=60)
+    backend.append("log", b"1")
+    backend.append("log", b"2")
+    backend.delete("log")
+    backend.append("log", b"3")
+    backend.append("log", b"4")
+    assert backend.get_list("log") == [b"3", b"4"]
+    assert backend.batches == 1
+    backend.close()
+
+
+def test_file_backend_survives_a_restart(tmp_path) -> None:
+    """Snapshots and logs written to files are read back by a new process."""
+    backend = FileBackend(tmp_path, interval=60)
+    backend.put("voice-agents:game:room/1", b'{"seq":0}')
+    backend.append("voice-agents:game:room/1:log", b"[1]")
+    backend.delete("voice-agents:game:room/1:log")
+    backend.append("voice-agents:game:room/1:log", b"[2]")
+    backend.close()
+    with open(tmp_path / "voice-agents%3Agame%3Aroom%2F1%3Alog.jsonl", "ab") as f:
+        f.write(b"[3")  # torn by a killed worker
+
+    restarted = FileBackend(tmp_path)
+    assert restarted.get("voice-agents:game:room/1") == b'{"seq":0}'
+    assert restarted.get_list("voice-agents:game:room/1:log") == [b"[2]"]
+    assert restarted.get("missing") is None and restarted.get_list("missing") == []
+    restarted.close()
+
+
+def test_durable_store_defaults_to_files(tmp_path, monkeypatch) -> None:
+    """With the memory backend configured, a durable store writes files."""
+    monkeypatch.setenv("SESSION_STATE_BACKEND", "memory")
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(state_backend, "_backends", {})
+    assert isinstance(SessionStore("test_plain").backend, MemoryBackend)
+    backend = SessionStore("test_durable", durable=True).backend
+    assert isinstance(backend, FileBackend) and backend.directory == tmp_path / "sessions"
+    backend.close()
+
+
+def test_memory_backend_stays_bounded_after_releases() -> None:
+    """Snapshots of released sessions age out and are capped in number."""
+    now = [0.0]
+    backend = MemoryBackend(ttl=60, max_entries=100, clock=lambda: now[0])
+    store = SessionStore("test_bounded", factory=Cart, ttl=0, backend=backend)
+    for i in range(5000):
+        store.get_or_create(f"room-{i}").items.append("eggs")
+        store.release(f"room-{i}")
+    assert len(store) == 0
+    assert len(backend) == 100 and backend.evictions == 4900
+    assert store.restore("room-4999") == Cart(items=["eggs"])
+
+    now[0] = 61
+    assert len(backend) == 0 and backend.expired == 100
+
+
+def test_file_backend_prunes_old_files(tmp_path) -> None:
+    """Files not written for the TTL are deleted when a worker starts."""
+    backend = FileBackend(tmp_path, ttl=60, interval=60)
+    backend.put("old", b"{}")
+    backend.append("old:log", b"[1]")
+    backend.put("new", b"{}")
+    backend.close()
+    for path in tmp_path.glob("old*"):
+        os.utime(path, (time.time() - 120, time.time() - 120))
+
+    restarted = FileBackend(tmp_path, ttl=60)
+    assert restarted.pruned == 2
+    assert restarted.get("old") is None and restarted.get_list("old:log") == []
+    assert restarted.get("new") == b"{}"
+    restarted.close()
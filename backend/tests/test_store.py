@@ -0,0 +1,139 @@
+from datetime import datetime
+
+import pytest
+
+from shared import store as store_module
+from shared.tools import file_ops
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_ops, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def orders(request):
+    spec = store_module.STORE_SPECS["day7_orders"]
+    return store_module.BACKENDS[request.param]("day7_orders", **spec)
+
+
+def test_insert_and_get(orders) -> None:
+    """Records can be read back by id."""
+    order_id = orders.insert({"order_id": "ORD-1", "customer_name": "Asha", "total": 10})
+
+    assert order_id == "ORD-1"
+    assert orders.get("ORD-1")["total"] == 10
+    assert orders.get("missing") is None
+
+
+def test_query_recent_and_by_key(orders) -> None:
+    """Recent and per-customer queries return records oldest first."""
+    for i, name in enumerate(["Asha", "Ravi", "asha", "Ravi"]):
+        orders.insert({"order_id": f"ORD-{i}", "customer_name": name})
+
+    assert [o["order_id"] for o in orders.query_recent(2)] == ["ORD-2", "ORD-3"]
+    assert [o["order_id"] for o in orders.query_by_key("ASHA")] == ["ORD-0", "ORD-2"]
+    assert [o["order_id"] for o in orders.query_by_key("ravi", n=1)] == ["ORD-3"]
+
+
+def test_insert_assigns_missing_id() -> None:
+    """Records without an id get one on insert."""
+    orders = store_module.JsonStore("day2_orders", **store_module.STORE_SPECS["day2_orders"])
+    record = {"drinkType": "latte", "name": "Asha"}
+
+    record_id = orders.insert(record)
+
+    assert record_id and record["id"] == record_id
+
+
+def test_migrate_is_idempotent(data_dir) -> None:
+    """Migration imports legacy arrays and journals once."""
+    file_ops.save_json("day2_orders.json", [{"drinkType": "latte", "name": "Asha"}])
+    file_ops.append_json("day9_orders.json", {"id": "ORD-1", "total": 5}, journal=True)
+    db_path = str(data_dir / "records.db")
+
+    first = store_module.migrate_json_to_sqlite(db_path)
+    second = store_module.migrate_json_to_sqlite(db_path)
+
+    assert first["day2_orders"] == 1 and first["day9_orders"] == 1
+    assert sum(second.values()) == 0
+    sqlite_orders = store_module.SqliteStore(
+        "day9_orders", db_path=db_path, **store_module.STORE_SPECS["day9_orders"]
+    )
+    assert sqlite_orders.query_recent(5) == [{"id": "ORD-1", "total": 5}]
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def checkins(request):
+    return store_module._open("day3_checkins", request.param)
+
+
+def test_query_range_uses_time_window(checkins) -> None:
+    """Only records inside [since, until) are returned, oldest first."""
+    for day in (1, 5, 9, 10):
+        checkins.insert({"date": f"2025-03-{day:02d}T09:00:00", "mood": f"m{day}"})
+
+    window = checkins.query_range(datetime(2025, 3, 5), datetime(2025, 3, 10))
+
+    assert [r["mood"] for r in window] == ["m5", "m9"]
+    assert [r["mood"] for r in checkins.query_recent(3)] == ["m5", "m9", "m10"]
+
+
+def test_partitioned_store_splits_legacy_log(data_dir) -> None:
+    """The single-file wellness log is split into day partitions on first use."""
+    file_ops.save_json("day3_wellness_log.json", [
+        {"date": "2025-03-01T09:00:00", "mood": "calm"},
+        {"date": "2025-03-02T09:00:00", "mood": "tired"},
+    ])
+    checkins = store_module._open("day3_checkins", "json")
+
+    checkins.insert({"date": "2025-03-02T20:00:00", "mood": "happy"})
+
+    partitions = sorted(p.name for p in (data_dir / "day3_wellness_log").glob("*.jsonl"))
+    assert partitions == ["2025-03-01.jsonl", "2025-03-02.jsonl"]
+    assert [r["mood"] for r in checkins.iter_records()] == ["calm", "tired", "happy"]
+
+
+def test_per_user_queries_are_isolated(checkins) -> None:
+    """Check-ins from one user never show up in another user's history."""
+    checkins.insert({"date": "2025-03-05T09:00:00", "mood": "calm", "user": "asha"})
+    checkins.insert({"date": "2025-03-06T09:00:00", "mood": "tired", "user": "ravi"})
+    checkins.insert({"date": "2025-03-07T09:00:00", "mood": "happy", "user": "asha"})
+
+    window = checkins.query_range(datetime(2025, 3, 1), datetime(2025, 3, 10), key="asha")
+
+    assert [r["mood"] for r in window] == ["calm", "happy"]
+    assert [r["mood"] for r in checkins.query_by_key("ravi")] == ["tired"]
+    assert [r["mood"] for r in checkins.query_by_key("asha", 1)] == ["happy"]
+    assert checkins.query_by_key("anonymous") == []
+
+
+def test_key_lookup_opens_only_the_keys_partitions(data_dir, monkeypatch) -> None:
+    """query_by_key reads the partitions holding the key, not every day."""
+    checkins = store_module._open("day3_checkins", "json")
+    for day in range(1, 31):
+        checkins.insert({"date": f"2025-03-{day:02d}T09:00:00", "mood": "busy", "user": f"u{day}"})
+    checkins.insert({"date": "2025-03-02T21:00:00", "mood": "calm", "user": "asha"})
+    checkins.insert({"date": "2025-03-02T22:00:00", "mood": "sleepy", "user": "Asha"})
+
+    opened = []
+    lookup = checkins._lookup
+    monkeypatch.setattr(checkins, "_lookup", lambda filename, key: opened.append(filename) or lookup(filename, key))
+    assert [r["mood"] for r in checkins.query_by_key("asha")] == ["calm", "sleepy"]
+    assert checkins.query_by_key("nobody") == []
+    assert opened == ["day3_wellness_log/2025-03-02.json"]
+
+
+def test_key_directory_is_built_for_existing_partitions(data_dir) -> None:
+    """Partitions written before the key directory existed are still found."""
+    checkins = store_module._open("day3_checkins", "json")
+    checkins.insert({"date": "2025-03-01T09:00:00", "mood": "calm", "user": "asha"})
+    checkins.insert({"date": "2025-03-04T09:00:00", "mood": "happy", "user": "asha"})
+    file_ops.journal_path(checkins._directory_file).unlink()
+
+    reopened = store_module._open("day3_checkins", "json")
+    assert [r["mood"] for r in reopened.query_by_key("asha", 1)] == ["happy"]
+    reopened.insert({"date": "2025-03-05T09:00:00", "mood": "tired", "user": "asha"})
+    assert [r["mood"] for r in reopened.query_by_key("asha")] == ["calm", "happy", "tired"]
+    assert len(file_ops.load_records(checkins._directory_file)) == 3
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from shared import vectors
+from shared.vectors import VectorIndex
+
+CONCEPTS = [
+    ("loops", "Loops repeat an action: for loops run a set number of times, while loops run while a condition holds"),
+    ("conditionals", "Conditional statements like if else let a program make decisions"),
+    ("arrays", "Arrays and lists are collections of items you access by index"),
+    ("functions", "Functions are reusable blocks of code that take parameters and return values"),
+]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("for loop", "loops"),
+    ("if else", "conditionals"),
+    ("list", "arrays"),
+    ("reusable code", "functions"),
+])
+def test_finds_paraphrased_concepts(query, expected) -> None:
+    """Queries sharing words or word parts with a text find it."""
+    results = VectorIndex(CONCEPTS).search(query)
+    assert results[0][0] == expected
+    assert 0 < results[0][1] <= 1.0001
+
+
+def test_unrelated_and_stopword_queries_find_nothing() -> None:
+    """Queries with no indexed words return no results."""
+    index = VectorIndex(CONCEPTS)
+    assert index.search("what is it") == []
+    assert index.search("xylophone", min_score=vectors.MIN_SIMILARITY) == []
+
+
+def test_numpy_and_sparse_scores_agree(monkeypatch) -> None:
+    """The matrix and the pure-Python fallback rank and score alike."""
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    words = [f"{a}{b}" for a in ("pay", "ship", "return", "track", "gift") for b in ("", "ment", "ing", "s")]
+    entries = [(i, " ".join(rng.choices(words, k=8))) for i in range(200)]
+    queries = [" ".join(rng.choices(words, k=3)) for _ in range(20)]
+
+    batched_results = VectorIndex(entries).search_many(queries, limit=5)
+    monkeypatch.setattr(vectors, "np", None)
+    sparse = VectorIndex(entries)
+
+    for query, batched in zip(queries, batched_results):
+        expected = sparse.search(query, limit=5)
+        assert [key for key, _ in batched] == [key for key, _ in expected]
+        assert [s for _, s in batched] == pytest.approx([s for _, s in expected], abs=0.002)
+
+
+def test_query_vectors_are_cached() -> None:
+    """Repeated queries reuse their vector, and the cache is bounded."""
+    index = VectorIndex(CONCEPTS, cache_size=2)
+    index.search("for loop")
+    index.search("for loop")
+    index.search("if else")
+    index.search("lists")
+    assert (index.hits, index.misses) == (1, 3)
+    assert list(index._cache) == ["if else", "lists"]
+
+
+@pytest.mark.parametrize("query", ["how much is it", "how much does it cost", "is it expensive"])
+def test_price_questions_find_pricing_faq(query) -> None:
+    """Everyday price questions reach the pricing FAQ through the aliases."""
+    match = vectors.get("faq").best(query)
+    assert match is not None
+    assert match[0]["question"] == "What are your pricing plans?"
+
+
+def test_repeat_finds_loops() -> None:
+    """"repeat things" ranks loops first among the concepts."""
+    assert vectors.get("concepts").best("repeat things")[0] == "loops"
+
+
+def test_best_needs_a_clear_winner() -> None:
+    """``best()`` declines when the top two matches are nearly tied."""
+    index = VectorIndex([("a", "pricing plans monthly"), ("b", "pricing plans yearly")])
+    assert index.search("pricing plans", limit=1)
+    assert index.best("pricing plans") is None
+    assert index.best("monthly pricing")[0] == "a"